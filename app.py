@@ -3,10 +3,20 @@ Caption Composer Web Interface
 Local Flask server for the trading intelligence tool
 """
 
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, Response, g, jsonify, send_from_directory, request, stream_with_context
 from flask_cors import CORS
-from caption_composer import generate_from_ticker
+from caption_composer import (CaptionComposer, caption_validator, coalescing_stats, generate_from_ticker,
+                              iter_from_tickers, pipeline, warm_up)
+import http_encoding
+import json
+import log_setup
+import metrics
 import os
+import re
+import sys
+import time
+
+log = log_setup.get_logger("web")
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -14,6 +24,84 @@ CORS(app)  # Enable CORS for all routes
 # Configure Flask
 app.config['JSON_SORT_KEYS'] = False
 
+# Most tickers accepted by one /api/captions request
+MAX_BATCH_TICKERS = int(os.environ.get('CAPTION_MAX_BATCH', '50'))
+
+# Ticker symbols: letters, digits and the . - ^ = used by share classes, indices and FX pairs
+TICKER_PATTERN = re.compile(r'[A-Za-z0-9.\-^=]{1,10}')
+
+@app.before_request
+def start_request_metrics():
+    """Track in-flight requests and start the latency timer"""
+    g.request_started = time.perf_counter()
+    g.request_endpoint = request.endpoint or 'unknown'
+    metrics.REQUESTS_IN_FLIGHT.inc(endpoint=g.request_endpoint)
+
+@app.after_request
+def record_request_metrics(response):
+    """Record request latency by endpoint and status"""
+    if 'request_started' in g:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - g.request_started,
+                                        endpoint=g.request_endpoint, status=str(response.status_code))
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress the body with the negotiated Accept-Encoding (streamed bodies chunk by chunk)"""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = http_encoding.negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = http_encoding.compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < http_encoding.MIN_COMPRESS_BYTES:
+            return response
+        response.set_data(http_encoding.compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if 'ETag' in response.headers:
+        response.headers['ETag'] = http_encoding.weaken_etag(response.headers['ETag'])
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'request_endpoint' in g:
+        metrics.REQUESTS_IN_FLIGHT.dec(endpoint=g.request_endpoint)
+
+def collect_runtime_metrics():
+    """Scrape-time metrics read from the cache, coalescing layers and stream hub"""
+    cache = CaptionComposer.cache.stats()
+    coalescing = coalescing_stats()
+    import stream_hub
+    stream = stream_hub.hub.stats()
+    logging_stats = log_setup.stats()
+    layers = list(coalescing.items())
+    return [
+        metrics.counter_family('caption_cache_hits_total', 'Market data cache hits', [({}, cache['hits'])]),
+        metrics.counter_family('caption_cache_misses_total', 'Market data cache misses', [({}, cache['misses'])]),
+        metrics.counter_family('caption_cache_evictions_total', 'Tickers evicted from the market data cache', [({}, cache['evictions'])]),
+        metrics.gauge_family('caption_cache_hit_ratio', 'Market data cache hit ratio since start', [({}, cache['hit_ratio'])]),
+        metrics.gauge_family('caption_cache_tickers', 'Tickers held in the market data cache', [({}, cache['size'])]),
+        metrics.gauge_family('caption_coalesced_in_flight', 'Distinct tickers currently being computed',
+                             [({'layer': layer}, layer_stats['in_flight']) for layer, layer_stats in layers]),
+        metrics.counter_family('caption_coalesced_saved_total', 'Computations avoided by joining an in-flight call',
+                               [({'layer': layer}, layer_stats['saved']) for layer, layer_stats in layers]),
+        metrics.gauge_family('caption_stream_subscribers', 'Connected live stream clients', [({}, stream['subscribers'])]),
+        metrics.gauge_family('caption_stream_tickers', 'Tickers polled for live streams', [({}, stream['tickers'])]),
+        metrics.counter_family('caption_log_dropped_total', 'Log records dropped because the log queue was full',
+                               [({}, logging_stats['dropped'])]),
+        metrics.counter_family('caption_log_suppressed_total', 'Log records suppressed by rate limiting',
+                               [({}, logging_stats['suppressed'])])
+    ]
+
+metrics.REGISTRY.register_collector(collect_runtime_metrics)
+
 @app.route('/')
 def index():
     """Serve the main HTML page"""
@@ -24,36 +112,184 @@ def serve_static(path):
     """Serve static files (CSS, JS, etc.)"""
     return send_from_directory('.', path)
 
+def invalid_ticker_error(ticker):
+    """Return the 400 error body for an invalid ticker, or None if it is valid"""
+    if not ticker or not TICKER_PATTERN.fullmatch(ticker) or '..' in ticker:
+        return {
+            'error': 'Invalid ticker symbol',
+            'message': 'Please provide a valid ticker symbol (1-10 letters, digits or . - ^ =)'
+        }
+    return None
+
+def fetch_error(ticker, e):
+    """Return the 500 error body for a failed caption request"""
+    return {
+        'error': 'Failed to fetch data',
+        'message': str(e),
+        'ticker': ticker.upper()
+    }
+
+def cache_headers(validator):
+    """Return the ETag and Cache-Control headers for a caption_validator result"""
+    if validator is None:
+        return {'Cache-Control': 'no-cache'}
+    etag, max_age = validator
+    return {'ETag': etag, 'Cache-Control': f'public, max-age={max_age}'}
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    bare = etag[2:] if etag.startswith('W/') else etag
+    return any((tag[2:] if tag.startswith('W/') else tag) == bare
+               for tag in (part.strip() for part in if_none_match.split(',')))
+
 @app.route('/api/caption/<ticker>')
 def get_caption(ticker):
     """
     API endpoint to get trading intelligence for a ticker
     Returns comprehensive market data, analyst ratings, and poetic captions
+    Answers If-None-Match with 304 while the cached inputs are unchanged
+    Sends MessagePack instead of JSON for Accept: application/msgpack (if msgpack is installed)
     """
     try:
         # Validate ticker
-        if not ticker or len(ticker) > 10:
-            return jsonify({
-                'error': 'Invalid ticker symbol',
-                'message': 'Please provide a valid ticker symbol (1-10 characters)'
-            }), 400
+        invalid = invalid_ticker_error(ticker)
+        if invalid:
+            return jsonify(invalid), 400
+        
+        # ?seed=... makes the tone and caption reproducible
+        seed = request.args.get('seed')
+        
+        # Unchanged inputs: skip the pipeline entirely
+        validator = caption_validator(ticker, seed)
+        if validator and etag_matches(request.headers.get('If-None-Match'), validator[0]):
+            return Response(status=304, headers=cache_headers(validator))
         
         # Generate caption and intelligence
-        result = generate_from_ticker(ticker.upper())
+        result = generate_from_ticker(ticker.upper(), seed)
         
-        # Debug log to see what we're sending
-        print(f"📅 Earnings date: {result.get('earnings_date')}")
-        print(f"📅 Days to earnings: {result.get('days_to_earnings')} (type: {type(result.get('days_to_earnings'))})")
+        log.debug("Caption served", extra={'ticker': result['ticker'],
+                                           'earnings_date': result.get('earnings_date'),
+                                           'days_to_earnings': result.get('days_to_earnings')})
         
         # Return full result
-        return jsonify(result)
+        headers = cache_headers(caption_validator(ticker, seed))
+        if http_encoding.wants_msgpack(request.headers.get('Accept')):
+            response = Response(http_encoding.pack(result), mimetype=http_encoding.MSGPACK_TYPE)
+            if 'ETag' in headers:
+                headers['ETag'] = http_encoding.weaken_etag(headers['ETag'])
+        else:
+            response = jsonify(result)
+        response.headers.update(headers)
+        response.vary.add('Accept')
+        return response
     
     except Exception as e:
+        log.warning('Caption request failed', extra={'ticker': ticker.upper(), 'error': str(e)})
+        return jsonify(fetch_error(ticker, e)), 500
+
+@app.route('/api/captions', methods=['POST'])
+def get_captions():
+    """
+    Batch API endpoint: trading intelligence for many tickers in one round trip
+    Body: {"tickers": ["AAPL", "NVDA", ...]}
+    Streams one JSON object per line (NDJSON) as each ticker completes,
+    or concatenated MessagePack objects for Accept: application/msgpack
+    """
+    payload = request.get_json(silent=True) or {}
+    tickers = payload.get('tickers')
+    
+    # Validate tickers
+    if not isinstance(tickers, list) or not tickers or not all(isinstance(t, str) for t in tickers):
+        return jsonify({
+            'error': 'Invalid request',
+            'message': 'Please provide {"tickers": [...]} with at least one ticker symbol'
+        }), 400
+    
+    if len(tickers) > MAX_BATCH_TICKERS:
         return jsonify({
-            'error': 'Failed to fetch data',
-            'message': str(e),
-            'ticker': ticker.upper()
-        }), 500
+            'error': 'Too many tickers',
+            'message': f'Please request at most {MAX_BATCH_TICKERS} tickers at a time'
+        }), 400
+    
+    for ticker in tickers:
+        invalid = invalid_ticker_error(ticker.strip())
+        if invalid:
+            return jsonify(dict(invalid, ticker=ticker)), 400
+    
+    symbols = [ticker.strip().upper() for ticker in tickers]
+    
+    if http_encoding.wants_msgpack(request.headers.get('Accept')):
+        encode, mimetype = http_encoding.pack, http_encoding.MSGPACK_TYPE
+    else:
+        encode, mimetype = (lambda item: json.dumps(item, default=str) + '\n'), 'application/x-ndjson'
+    
+    def generate():
+        try:
+            for result in iter_from_tickers(symbols):
+                yield encode(result)
+        except Exception as e:
+            yield encode({
+                'error': 'Failed to fetch data',
+                'message': str(e)
+            })
+    
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+@app.route('/api/stream')
+def stream():
+    """
+    Live updates as Server-Sent Events
+    Query: ?tickers=AAPL,NVDA
+    Sends a "snapshot" event per ticker, then "update" events with only the changed fields
+    """
+    tickers = [t.strip() for t in request.args.get('tickers', '').split(',') if t.strip()]
+    
+    # Validate tickers
+    if not tickers:
+        return jsonify({
+            'error': 'Invalid request',
+            'message': 'Please provide ?tickers=AAPL,NVDA with at least one ticker symbol'
+        }), 400
+    
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({
+            'error': 'Too many tickers',
+            'message': f'Please stream at most {MAX_BATCH_TICKERS} tickers at a time'
+        }), 400
+    
+    for ticker in tickers:
+        invalid = invalid_ticker_error(ticker)
+        if invalid:
+            return jsonify(dict(invalid, ticker=ticker)), 400
+    
+    import stream_hub
+    subscription = stream_hub.hub.subscribe(tickers)
+    
+    def generate():
+        try:
+            for event, payload in subscription.events():
+                if payload is None:
+                    yield ': keep-alive\n\n'
+                else:
+                    yield f'event: {event}\ndata: {json.dumps(payload, default=str)}\n\n'
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint: stage latency histograms, cache, fallback and in-flight metrics"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
 @app.route('/api/health')
 def health_check():
@@ -64,6 +300,20 @@ def health_check():
         'version': '2.1'
     })
 
+@app.route('/api/stats')
+def stats():
+    """Cache, request-coalescing and pipeline timing counters"""
+    import stream_hub
+    provider = CaptionComposer.get_provider()
+    return jsonify({
+        'cache': CaptionComposer.cache.stats(),
+        'coalescing': coalescing_stats(),
+        'pipeline': pipeline.stats(),
+        'stream': stream_hub.hub.stats(),
+        'logging': log_setup.stats(),
+        'history_store': provider.stats() if hasattr(provider, 'stats') else None
+    })
+
 if __name__ == '__main__':
     print("\n" + "="*80)
     print("🪔 TradeGPT-Aladdin Web Interface")
@@ -71,12 +321,28 @@ if __name__ == '__main__':
     print("\n📊 Serving live market data with poetic intelligence")
     print("🌐 Access at: http://localhost:5000")
     print("💡 API Endpoint: http://localhost:5000/api/caption/<TICKER>")
+    print("💡 Batch Endpoint: POST http://localhost:5000/api/captions")
+    print("💡 Live Stream: http://localhost:5000/api/stream?tickers=<TICKER>,<TICKER>")
+    print("📈 Metrics: http://localhost:5000/metrics")
     print("\nPress Ctrl+C to stop the server\n")
     
-    # Run the Flask app
-    app.run(
-        host='0.0.0.0',
-        port=5000,
-        debug=True,
-        use_reloader=True
-    )
+    # Import pandas/yfinance in the background so the first request does not pay for it
+    warm_up()
+    
+    if '--dev' in sys.argv:
+        # Flask development server with debugger and auto-reload
+        app.run(
+            host='0.0.0.0',
+            port=5000,
+            debug=True,
+            use_reloader=True
+        )
+    else:
+        try:
+            import uvicorn
+        except ImportError:
+            print("⚠️  uvicorn not installed (pip install uvicorn). Falling back to the Flask server...")
+            app.run(host='0.0.0.0', port=5000, threaded=True)
+        else:
+            # Production ASGI server (see asgi.py)
+            uvicorn.run('asgi:app', host='0.0.0.0', port=5000, log_level='warning')
@@ -0,0 +1,324 @@
+"""
+Caption Composer ASGI Server
+Production async entry point for the trading intelligence API
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+/api/caption/<ticker> is handled natively: the blocking pipeline runs in a
+bounded executor, concurrent requests for the same ticker share one
+upstream fetch, and requests beyond the queue limit get 429. Every other
+route is served by the Flask app in app.py; /api/stream responses, which
+block a thread between events, get their own executor so open streams
+never starve the other routes.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+from app import app as flask_app, cache_headers, etag_matches, fetch_error, invalid_ticker_error
+from caption_composer import caption_validator, generate_from_ticker, warm_up
+import http_encoding
+import metrics
+
+
+# Threads running caption pipelines
+CAPTION_WORKERS = int(os.environ.get("CAPTION_ASGI_WORKERS", "16"))
+
+# Distinct tickers allowed in flight or queued before answering 429
+MAX_PENDING = int(os.environ.get("CAPTION_ASGI_MAX_PENDING", "64"))
+
+# Threads serving the remaining Flask routes (static files, health, ...)
+FLASK_WORKERS = int(os.environ.get("CAPTION_ASGI_FLASK_WORKERS", "32"))
+
+# Open /api/stream connections (each holds a thread while waiting for events); more get 503
+STREAM_WORKERS = int(os.environ.get("CAPTION_ASGI_STREAM_WORKERS", "256"))
+
+_END = object()
+
+
+class Backpressure(Exception):
+    """Raised when the caption queue is full."""
+
+
+class CaptionService:
+    """Runs caption pipelines in a bounded executor, coalescing identical tickers."""
+
+    def __init__(self, max_workers: int = CAPTION_WORKERS, max_pending: int = MAX_PENDING):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="caption-asgi")
+        self.max_pending = max_pending
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def caption(self, ticker: str, seed: Optional[str] = None) -> Dict:
+        """
+        Return the caption result for a ticker.
+
+        Args:
+            ticker: Upper-cased ticker symbol
+            seed: Optional selection seed (see generate_from_ticker)
+
+        Returns:
+            Dictionary from generate_from_ticker (shared by coalesced callers, do not mutate)
+
+        Raises:
+            Backpressure: If MAX_PENDING distinct tickers are already queued
+        """
+        key = ticker if seed is None else (ticker, seed)
+        future = self.inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        if len(self.inflight) >= self.max_pending:
+            self.rejected += 1
+            raise Backpressure()
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, partial(generate_from_ticker, ticker, seed))
+        self.inflight[key] = future
+        # Clean up when the work finishes, even if every waiting client disconnected
+        future.add_done_callback(lambda done: self.inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class CaptionASGIApp:
+    """ASGI application: native async caption endpoint plus the Flask app for everything else."""
+
+    def __init__(self, wsgi_app, service: CaptionService = None):
+        self.wsgi_app = wsgi_app
+        self.service = service or CaptionService()
+        self.wsgi_executor = ThreadPoolExecutor(max_workers=FLASK_WORKERS, thread_name_prefix="caption-wsgi")
+        self.stream_executor = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="caption-sse")
+        self.max_streams = STREAM_WORKERS
+        self.streams = 0
+        self.streams_rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            ticker = scope["path"][len("/api/caption/"):]
+            if scope["method"] == "GET" and scope["path"].startswith("/api/caption/") and ticker and "/" not in ticker:
+                query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+                headers = {name: value.decode("latin-1") for name, value in scope.get("headers") or []}
+                await self._caption(ticker, send, query.get("seed", [None])[0], headers)
+            elif scope["path"] == "/api/stream":
+                await self._stream(scope, receive, send)
+            else:
+                await self._wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Preload pandas/yfinance without delaying startup
+                warm_up()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.service.shutdown()
+                self.wsgi_executor.shutdown(wait=False, cancel_futures=True)
+                self.stream_executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _caption(self, ticker: str, send, seed: Optional[str] = None, headers: Dict[bytes, str] = None):
+        """Async /api/caption/<ticker> handler (metrics share the Flask endpoint name)."""
+        started = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.inc(endpoint="get_caption")
+        try:
+            status = await self._caption_response(ticker, send, seed, headers or {})
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec(endpoint="get_caption")
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="get_caption", status=str(status))
+
+    async def _caption_response(self, ticker: str, send, seed: Optional[str], headers: Dict[bytes, str]) -> int:
+        accept, accept_encoding = headers.get(b"accept"), headers.get(b"accept-encoding")
+        invalid = invalid_ticker_error(ticker)
+        if invalid:
+            await _send_json(send, 400, invalid, accept_encoding=accept_encoding)
+            return 400
+
+        # Unchanged inputs: answer from the validator without queueing a pipeline run
+        validator = caption_validator(ticker, seed)
+        if validator and etag_matches(headers.get(b"if-none-match"), validator[0]):
+            headers = [(b"access-control-allow-origin", b"*")] + _cache_headers(validator)
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return 304
+
+        try:
+            result = await self.service.caption(ticker.upper(), seed)
+        except Backpressure:
+            await _send_json(send, 429, {
+                'error': 'Too many requests',
+                'message': 'Server is busy, please retry shortly',
+                'ticker': ticker.upper()
+            }, extra_headers=[(b"retry-after", b"1")], accept_encoding=accept_encoding)
+            return 429
+        except Exception as e:
+            await _send_json(send, 500, fetch_error(ticker, e), accept_encoding=accept_encoding)
+            return 500
+
+        await _send_json(send, 200, result, extra_headers=_cache_headers(caption_validator(ticker, seed)),
+                         accept=accept, accept_encoding=accept_encoding)
+        return 200
+
+    async def _stream(self, scope, receive, send):
+        """Serve /api/stream through the Flask app on the stream executor, refusing new streams when it is full."""
+        if self.streams >= self.max_streams:
+            self.streams_rejected += 1
+            await _send_json(send, 503, {"error": "Too many streams",
+                                         "message": "Live stream capacity reached, please retry shortly"},
+                             extra_headers=[(b"retry-after", b"5")])
+            return
+        self.streams += 1
+        try:
+            await self._wsgi(scope, receive, send, self.stream_executor)
+        finally:
+            self.streams -= 1
+
+    async def _wsgi(self, scope, receive, send, executor: ThreadPoolExecutor = None):
+        """Serve a request through the Flask app, streaming its response body."""
+        executor = executor or self.wsgi_executor
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                                   for name, value in headers]
+
+        loop = asyncio.get_running_loop()
+        iterable = await loop.run_in_executor(executor, self.wsgi_app,
+                                              _wsgi_environ(scope, body), start_response)
+        iterator = iter(iterable)
+        started = False
+        try:
+            while not disconnected.is_set():
+                chunk = await loop.run_in_executor(executor, next, iterator, _END)
+                if chunk is _END:
+                    break
+                if not started:
+                    await send({"type": "http.response.start", "status": response["status"],
+                                "headers": response["headers"]})
+                    started = True
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            watcher.cancel()
+            if hasattr(iterable, "close"):
+                await loop.run_in_executor(executor, iterable.close)
+
+        if not started:
+            await send({"type": "http.response.start", "status": response["status"],
+                        "headers": response["headers"]})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _wsgi_environ(scope, body: bytes) -> Dict:
+    """Build a PEP 3333 environ from an ASGI HTTP scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1")
+        value = value.decode("latin-1")
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif name != "content-length":
+            key = "HTTP_" + name.upper().replace("-", "_")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _cache_headers(validator):
+    return [(name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in cache_headers(validator).items()]
+
+
+async def _send_json(send, status: int, payload: Dict, extra_headers=None,
+                     accept: Optional[str] = None, accept_encoding: Optional[str] = None):
+    """Send a payload as JSON (MessagePack if accepted), compressed when negotiated."""
+    body, content_type = http_encoding.serialize(payload, accept)
+    body, encoding = http_encoding.encode_body(body, accept_encoding)
+    headers = [
+        (b"content-type", content_type.encode("latin-1")),
+        (b"access-control-allow-origin", b"*"),
+        (b"vary", b"Accept-Encoding, Accept"),
+        (b"content-length", str(len(body)).encode())
+    ]
+    if encoding is not None:
+        headers.append((b"content-encoding", encoding.encode("latin-1")))
+    for name, value in extra_headers or []:
+        if name == b"etag" and (encoding is not None or content_type != "application/json"):
+            # Not the identity JSON bytes, so the strong validator only holds weakly
+            value = http_encoding.weaken_etag(value.decode("latin-1")).encode("latin-1")
+        headers.append((name, value))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+app = CaptionASGIApp(flask_app)
+
+
+def _collect_service_metrics():
+    service = app.service
+    return [
+        metrics.gauge_family("caption_asgi_pending", "Distinct tickers queued or running in the ASGI caption executor",
+                             [({}, len(service.inflight))]),
+        metrics.counter_family("caption_asgi_coalesced_total", "ASGI caption requests that joined an in-flight ticker",
+                               [({}, service.coalesced)]),
+        metrics.counter_family("caption_asgi_rejected_total", "ASGI caption requests answered with 429",
+                               [({}, service.rejected)]),
+        metrics.gauge_family("caption_asgi_streams", "Open /api/stream connections on the ASGI stream executor",
+                             [({}, app.streams)]),
+        metrics.counter_family("caption_asgi_streams_rejected_total", "ASGI /api/stream requests answered with 503",
+                               [({}, app.streams_rejected)])
+    ]
+
+
+metrics.REGISTRY.register_collector(_collect_service_metrics)
@@ -0,0 +1,347 @@
+"""
+Backtest - Historical replay of the entry/exit/stop rules for Caption Composer
+
+Applies the RSI-band levels from CaptionComposer.calculate_entry_exit_points
+at every daily bar of every ticker (via indicators.entry_exit_levels, so the
+rules cannot drift apart) and simulates each signal as one hypothetical
+trade, all tickers and bars at once on 2-D NumPy arrays:
+
+- Entry: an order at the entry level, live for ENTRY_WINDOW bars after the
+  signal bar. Below the signal close it is a buy limit (fills when the low
+  reaches it), above it a buy stop (fills when the high reaches it); a bar
+  that opens through the level fills at the open.
+- Exit: whichever comes first of the stop loss (low reaches it), the target
+  (high reaches it, from the bar after the fill) or MAX_HOLD bars, closing
+  at that bar's close. A bar that reaches both counts as stopped out.
+- Trades still open when the data ends are reported but not scored.
+
+Results are grouped by the motif the signal bar's RSI falls in.
+
+Usage:
+    python backtest.py AAPL NVDA MSFT            # 10 years from the configured provider
+    python backtest.py --synthetic 500           # 500 synthetic tickers x 10 years
+    python backtest.py --synthetic 50 --json     # machine-readable report
+    python backtest.py --synthetic 2000 --processes -1   # one worker process per core
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from typing import Dict, List
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+import indicators
+import parallel
+from caption_composer import CaptionComposer
+
+
+# Bars after the signal bar during which the entry order can fill
+ENTRY_WINDOW = 5
+
+# Bars a filled trade is held before it is closed at the bar's close
+MAX_HOLD = 20
+
+# Outcome codes in simulate()'s "outcome" array
+UNFILLED, OPEN, TARGET, STOP, TIMEOUT = 0, 1, 2, 3, 4
+
+MOTIF_NAMES = list(CaptionComposer.MOTIFS)
+
+
+def stack_ohlc(histories: List) -> Dict[str, np.ndarray]:
+    """
+    Stack full per-ticker histories into right-aligned (tickers x bars) arrays.
+
+    Args:
+        histories: pandas DataFrames with High/Low/Close (and optionally Open) columns
+
+    Returns:
+        Dictionary of open, high, low, close arrays; histories without an
+        Open column get NaN opens, which fill at the order level
+    """
+    bars = max((len(hist) for hist in histories), default=0)
+    closes, highs, lows = indicators.stack_histories(histories, bars=bars)
+    opens = np.full_like(closes, np.nan)
+    for row, hist in enumerate(histories):
+        if len(hist) and "Open" in hist.columns:
+            opens[row, -len(hist):] = hist["Open"].to_numpy(dtype=float)
+    return {"open": opens, "high": highs, "low": lows, "close": closes}
+
+
+def rolling_rsi(closes: np.ndarray, period: int = indicators.RSI_PERIOD) -> np.ndarray:
+    """
+    RSI at every bar, as calculate_rsi would return for the history up to that bar.
+
+    Args:
+        closes: Closing prices, shape (tickers x bars), right-aligned
+
+    Returns:
+        Array of the same shape, NaN until period bars are available
+    """
+    delta = np.diff(closes, axis=1, prepend=np.nan)
+    with np.errstate(invalid="ignore"):
+        # A missing previous close counts as no change, as in Series.where
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+
+    rsi = np.full(closes.shape, np.nan)
+    if closes.shape[1] >= period:
+        window_gain = np.lib.stride_tricks.sliding_window_view(gain, period, axis=1).mean(axis=-1)
+        window_loss = np.lib.stride_tricks.sliding_window_view(loss, period, axis=1).mean(axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rsi[:, period - 1:] = 100 - (100 / (1 + window_gain / window_loss))
+
+    available = np.cumsum(~np.isnan(closes), axis=1)
+    rsi[(available < period) | np.isnan(closes)] = np.nan
+    return rsi
+
+
+def rolling_levels(bars: Dict[str, np.ndarray], lookback: int = indicators.LOOKBACK) -> Dict[str, np.ndarray]:
+    """
+    RSI and entry/exit/stop levels at every bar.
+
+    Args:
+        bars: Output of stack_ohlc
+        lookback: Bars used for the recent high/low (default 20)
+
+    Returns:
+        Dictionary of (tickers x bars) arrays: rsi plus everything from
+        indicators.entry_exit_levels
+    """
+    closes = bars["close"]
+    pad = np.full((closes.shape[0], lookback - 1), np.nan)
+
+    def windows(values: np.ndarray) -> np.ndarray:
+        return np.lib.stride_tricks.sliding_window_view(np.concatenate((pad, values), axis=1), lookback, axis=1)
+
+    recent_high = np.fmax.reduce(windows(bars["high"]), axis=-1)
+    recent_low = np.fmin.reduce(windows(bars["low"]), axis=-1)
+    rsi = rolling_rsi(closes)
+
+    return {"rsi": rsi, **indicators.entry_exit_levels(closes, recent_high, recent_low, rsi)}
+
+
+def simulate(bars: Dict[str, np.ndarray], levels: Dict[str, np.ndarray],
+             entry_window: int = ENTRY_WINDOW, max_hold: int = MAX_HOLD) -> Dict[str, np.ndarray]:
+    """
+    Trade every signal bar against the bars that follow it.
+
+    Args:
+        bars: Output of stack_ohlc
+        levels: Output of rolling_levels
+        entry_window: Bars the entry order stays live
+        max_hold: Bars a filled trade is held at most
+
+    Returns:
+        Dictionary of (tickers x bars) arrays indexed by signal bar: outcome
+        (UNFILLED/OPEN/TARGET/STOP/TIMEOUT), fill_price, exit_price,
+        return_pct and bars_held
+    """
+    closes = bars["close"]
+    shape = closes.shape
+    entry, target, stop = levels["entry"], levels["exit"], levels["stop_loss"]
+    signal = ~np.isnan(levels["rsi"]) & ~np.isnan(entry)
+    with np.errstate(invalid="ignore"):
+        buy_limit = entry < closes
+
+    # Right-pad once so bar t + k is a zero-copy view
+    horizon = entry_window + max_hold
+    pad = np.full((shape[0], horizon), np.nan)
+    ahead = {name: np.concatenate((values, pad), axis=1) for name, values in bars.items()}
+
+    def bar(name: str, k: int) -> np.ndarray:
+        return ahead[name][:, k:k + shape[1]]
+
+    filled_at = np.zeros(shape, dtype=np.int16)
+    fill_price = np.full(shape, np.nan)
+    with np.errstate(invalid="ignore"):
+        for k in range(1, entry_window + 1):
+            opens, highs, lows = bar("open", k), bar("high", k), bar("low", k)
+            hit = signal & (filled_at == 0) & np.where(buy_limit, lows <= entry, highs >= entry)
+            price = np.where(buy_limit, np.fmin(opens, entry), np.fmax(opens, entry))
+            fill_price[hit] = price[hit]
+            filled_at[hit] = k
+
+    outcome = np.where(filled_at > 0, OPEN, UNFILLED).astype(np.int8)
+    exit_price = np.full(shape, np.nan)
+    exit_at = np.zeros(shape, dtype=np.int16)
+    with np.errstate(invalid="ignore"):
+        for k in range(1, horizon + 1):
+            live = (outcome == OPEN) & (filled_at <= k)
+            if not live.any():
+                continue
+            opens, highs, lows, closes_k = bar("open", k), bar("high", k), bar("low", k), bar("close", k)
+            on_fill_bar = filled_at == k
+
+            stopped = live & (lows <= stop)
+            # On the fill bar the open came before the fill, so only the stop level applies
+            stop_price = np.where(on_fill_bar, np.fmin(stop, fill_price), np.fmin(opens, stop))
+            targeted = live & ~stopped & ~on_fill_bar & (highs >= target)
+            timed_out = live & ~stopped & ~targeted & (k - filled_at >= max_hold) & ~np.isnan(closes_k)
+
+            for mask, code, price in ((stopped, STOP, stop_price),
+                                      (targeted, TARGET, np.fmax(opens, target)),
+                                      (timed_out, TIMEOUT, closes_k)):
+                outcome[mask] = code
+                exit_price[mask] = price[mask]
+                exit_at[mask] = k
+
+    closed = outcome >= TARGET
+    with np.errstate(invalid="ignore"):
+        return_pct = np.where(closed, (exit_price / fill_price - 1) * 100, np.nan)
+
+    return {
+        "outcome": outcome,
+        "fill_price": fill_price,
+        "exit_price": exit_price,
+        "return_pct": return_pct,
+        "bars_held": np.where(closed, exit_at - filled_at, 0)
+    }
+
+
+def motif_codes(rsi: np.ndarray) -> np.ndarray:
+    """Index into MOTIF_NAMES for every RSI value (same bands as determine_motif)."""
+    with np.errstate(invalid="ignore"):
+        return np.select([rsi < 30, rsi < 50, rsi < 70], [0, 1, 2], 3)
+
+
+def _summary(outcome: np.ndarray, return_pct: np.ndarray, bars_held: np.ndarray) -> Dict:
+    counts = np.bincount(outcome, minlength=TIMEOUT + 1)
+    filled = int(counts[OPEN:].sum())
+    closed = int(counts[TARGET:].sum())
+    returns = return_pct[outcome >= TARGET]
+
+    def rate(count: int, total: int) -> float:
+        return round(100 * count / total, 2) if total else 0.0
+
+    return {
+        "signals": int(len(outcome)),
+        "filled": filled,
+        "fill_rate": rate(filled, len(outcome)),
+        "targets": int(counts[TARGET]),
+        "stops": int(counts[STOP]),
+        "timeouts": int(counts[TIMEOUT]),
+        "open": int(counts[OPEN]),
+        "hit_rate": rate(int(counts[TARGET]), closed),
+        "stop_rate": rate(int(counts[STOP]), closed),
+        "win_rate": rate(int(np.count_nonzero(returns > 0)), closed),
+        "avg_return_pct": round(float(returns.mean()), 2) if closed else 0.0,
+        "median_return_pct": round(float(np.median(returns)), 2) if closed else 0.0,
+        "avg_bars_held": round(float(bars_held[outcome >= TARGET].mean()), 1) if closed else 0.0
+    }
+
+
+def summarize(levels: Dict[str, np.ndarray], trades: Dict[str, np.ndarray]) -> Dict:
+    """
+    Hit rates and returns per motif.
+
+    Returns:
+        Dictionary with "motifs" (motif name -> stats) and "overall" stats
+    """
+    signal = ~np.isnan(levels["rsi"]) & ~np.isnan(levels["entry"])
+    motifs = motif_codes(levels["rsi"])[signal]
+    outcome = trades["outcome"][signal]
+    return_pct = trades["return_pct"][signal]
+    bars_held = trades["bars_held"][signal]
+
+    report = {"motifs": {}}
+    for code, name in enumerate(MOTIF_NAMES):
+        mask = motifs == code
+        report["motifs"][name] = _summary(outcome[mask], return_pct[mask], bars_held[mask])
+    report["overall"] = _summary(outcome, return_pct, bars_held)
+    return report
+
+
+def _replay_rows(bars: Dict[str, np.ndarray], outputs: Dict[str, np.ndarray],
+                 entry_window: int, max_hold: int) -> None:
+    """parallel.map_rows worker: levels and trades for a slice of tickers."""
+    levels = rolling_levels(bars)
+    trades = simulate(bars, levels, entry_window, max_hold)
+    for name, values in outputs.items():
+        values[...] = levels[name] if name in levels else trades[name]
+
+
+def backtest(histories: Dict, entry_window: int = ENTRY_WINDOW, max_hold: int = MAX_HOLD,
+             workers: int = None) -> Dict:
+    """
+    Replay the entry/exit/stop rules over every bar of every history.
+
+    Args:
+        histories: ticker -> pandas DataFrame with High/Low/Close (and Open) columns
+        entry_window: Bars the entry order stays live
+        max_hold: Bars a filled trade is held at most
+        workers: Worker processes sharing the tickers (defaults to
+            CAPTION_PROCESS_WORKERS; 0 or 1 replays in-process)
+
+    Returns:
+        summarize() report plus tickers, bars and elapsed seconds
+    """
+    started = time.perf_counter()
+    bars = stack_ohlc([hist for hist in histories.values() if hist is not None])
+    shape = bars["close"].shape
+    # Tickers replay independently, so rows can be split across processes
+    results = parallel.map_rows(_replay_rows, bars, {
+        "rsi": (shape, np.float64),
+        "entry": (shape, np.float64),
+        "outcome": (shape, np.int8),
+        "return_pct": (shape, np.float64),
+        "bars_held": (shape, np.int16)
+    }, workers, min_rows=32, entry_window=entry_window, max_hold=max_hold)
+    # results holds both the level arrays and the trade arrays summarize reads
+    report = summarize(results, results)
+    report.update({
+        "tickers": int(bars["close"].shape[0]),
+        "bars": int(np.count_nonzero(~np.isnan(bars["close"]))),
+        "elapsed": round(time.perf_counter() - started, 3)
+    })
+    return report
+
+
+def print_report(report: Dict) -> None:
+    print(f"📈 Backtest: {report['tickers']} tickers, {report['bars']:,} bars in {report['elapsed']:.2f}s\n")
+    print(f"{'motif':<13}{'signals':>10}{'fill %':>8}{'hit %':>8}{'stop %':>8}{'win %':>8}"
+          f"{'avg %':>8}{'median %':>10}{'bars':>7}")
+    rows = [(f"{CaptionComposer.MOTIFS[name]['emoji']} {name}", stats) for name, stats in report["motifs"].items()]
+    for label, stats in rows + [("   Overall", report["overall"])]:
+        print(f"{label:<13}{stats['signals']:>10,}{stats['fill_rate']:>8.1f}{stats['hit_rate']:>8.1f}"
+              f"{stats['stop_rate']:>8.1f}{stats['win_rate']:>8.1f}{stats['avg_return_pct']:>8.2f}"
+              f"{stats['median_return_pct']:>10.2f}{stats['avg_bars_held']:>7.1f}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest the Caption Composer entry/exit/stop rules")
+    parser.add_argument("tickers", nargs="*", help="ticker symbols to replay")
+    parser.add_argument("--period", default="10y", help="history period (default 10y)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="replay N synthetic tickers instead")
+    parser.add_argument("--entry-window", type=int, default=ENTRY_WINDOW,
+                        help=f"bars the entry order stays live (default {ENTRY_WINDOW})")
+    parser.add_argument("--max-hold", type=int, default=MAX_HOLD,
+                        help=f"bars a trade is held at most (default {MAX_HOLD})")
+    parser.add_argument("--processes", type=int, help="worker processes (-1 = one per core, default in-process)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        from market_data import SyntheticProvider
+        provider = SyntheticProvider()
+        tickers = [f"SYN{n:04d}" for n in range(args.synthetic)]
+    elif args.tickers:
+        provider = CaptionComposer.get_provider()
+        tickers = [ticker.upper() for ticker in args.tickers]
+    else:
+        parser.error("give ticker symbols or --synthetic N")
+
+    histories = provider.history_batch(tickers, period=args.period)
+    report = backtest(histories, args.entry_window, args.max_hold, args.processes)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Import-Time Benchmark - Startup guard for Caption Composer
+
+Imports each entry module in a fresh interpreter under ``python -X importtime``
+and reports its cumulative import time, failing (exit status 1) when a
+module exceeds its budget or drags in a heavy data dependency that should
+only load on demand (see caption_composer.warm_up).
+
+Usage:
+    python bench_import_time.py             # 5 runs per module
+    python bench_import_time.py --runs 10
+    python bench_import_time.py --scale 2   # double the budgets on slow machines
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from typing import List, Tuple
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# Median cumulative import time allowed per entry module, in milliseconds
+BUDGETS_MS = {
+    "caption_composer": 150,
+    "app": 600
+}
+
+# Must not be imported as a side effect of importing an entry module
+HEAVY_MODULES = ("numpy", "pandas", "yfinance")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(module: str) -> Tuple[float, List[str]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Args:
+        module: Module name to import
+
+    Returns:
+        Tuple of (cumulative import milliseconds, heavy modules it loaded)
+    """
+    code = (f"import sys, json; import {module}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                               cwd=HERE, capture_output=True, text=True, check=True)
+
+    # Lines look like "import time:  self [us] | cumulative | <indent>name"
+    cumulative = None
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) == 3 and fields[2].strip() == module and not fields[2].startswith("  "):
+            cumulative = int(fields[1])
+    if cumulative is None:
+        raise RuntimeError(f"No import time reported for {module}")
+
+    heavy = json.loads(completed.stdout.strip().splitlines()[-1])
+    return cumulative / 1000.0, heavy
+
+
+def run(runs: int, scale: float) -> bool:
+    """
+    Benchmark every module in BUDGETS_MS and print a report.
+
+    Returns:
+        True if every module met its budget without loading heavy modules
+    """
+    ok = True
+    print(f"{'module':<20}{'median ms':>12}{'min ms':>10}{'budget ms':>12}  heavy imports")
+    for module, budget in BUDGETS_MS.items():
+        samples = []
+        heavy = set()
+        for _ in range(runs):
+            elapsed, loaded = measure(module)
+            samples.append(elapsed)
+            heavy.update(loaded)
+        median = statistics.median(samples)
+        limit = budget * scale
+        passed = median <= limit and not heavy
+        ok = ok and passed
+        print(f"{module:<20}{median:>12.1f}{min(samples):>10.1f}{limit:>12.0f}  "
+              f"{', '.join(sorted(heavy)) or '-'}  {'✅' if passed else '❌'}")
+    return ok
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Guard Caption Composer startup time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module (default 5)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (default 1.0)")
+    args = parser.parse_args(argv)
+
+    print("⏱️  Import-time benchmark\n")
+    ok = run(args.runs, args.scale)
+    print("\n🎉 Startup within budget" if ok else "\n⚠️  Startup budget exceeded")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
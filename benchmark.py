@@ -0,0 +1,276 @@
+"""
+Benchmark - Per-stage timings with offline fixtures and a regression gate
+
+Times every pipeline stage over universes of 1, 100 and 5,000 tickers
+using recorded fixtures (FixtureProvider), so runs never touch the network
+and are comparable between machines and commits:
+
+    calculate_rsi, calculate_entry_exit_points, compute_indicators (batch),
+    analyze_market_outlook, generate_forecast_tone, select_caption, compose,
+    generate_from_ticker (cache warm) and GET /api/caption/<ticker> (Flask)
+
+Each stage runs once per ticker per pass; the fastest of --repeats passes
+is reported as microseconds per call. Fixtures are recorded once from the
+synthetic provider into CAPTION_BENCH_FIXTURES (default
+~/.cache/caption_composer/bench_fixtures), or --fixtures points at any
+directory recorded with FixtureProvider.record (e.g. from yfinance).
+
+Usage:
+    python benchmark.py                                   # report to benchmark_report.json
+    python benchmark.py --sizes 1,100 --repeats 5
+    python benchmark.py --baseline baseline.json          # exit 1 on a slowdown
+    python benchmark.py --baseline baseline.json --tolerance 0.5
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from caption_composer import CaptionComposer, generate_from_ticker
+from market_cache import MarketDataCache
+from market_data import FixtureProvider, SyntheticProvider
+
+
+SIZES = (1, 100, 5000)
+
+STAGES = ("calculate_rsi", "calculate_entry_exit_points", "compute_indicators", "analyze_market_outlook",
+          "generate_forecast_tone", "select_caption", "compose", "generate_from_ticker", "flask_caption")
+
+# Allowed slowdown against the baseline before a stage counts as a regression (0.25 = 25%)
+TOLERANCE = float(os.environ.get("CAPTION_BENCH_TOLERANCE", "0.25"))
+
+# Slowdowns smaller than this many microseconds per call are timer noise, never regressions
+NOISE_FLOOR_US = 2.0
+
+# A pass shorter than this is repeated within one measurement (like timeit's autorange)
+MIN_PASS_SECONDS = 0.05
+
+FIXTURE_DIR = os.environ.get("CAPTION_BENCH_FIXTURES",
+                             os.path.join("~", ".cache", "caption_composer", "bench_fixtures"))
+
+# Provider seed the default fixtures are recorded from
+FIXTURE_SEED = 2024
+
+
+def prepare_fixtures(directory: str, count: int) -> List[str]:
+    """
+    Return count fixture tickers, recording any missing ones from the synthetic provider.
+
+    Args:
+        directory: Fixture directory
+        count: Number of tickers needed
+
+    Returns:
+        Ticker symbols BENCH0000, BENCH0001, ...
+    """
+    tickers = [f"BENCH{n:04d}" for n in range(count)]
+    missing = [ticker for ticker in tickers if not os.path.exists(os.path.join(directory, f"{ticker}.json"))]
+    if missing:
+        print(f"📼 Recording {len(missing)} fixture ticker(s) to {directory}...", file=sys.stderr)
+        FixtureProvider.record(directory, missing, SyntheticProvider(seed=FIXTURE_SEED))
+    return tickers
+
+
+def recorded_tickers(directory: str) -> List[str]:
+    """Tickers with recorded history in a fixture directory, sorted."""
+    return sorted({name.rsplit(".", 1)[0] for name in os.listdir(directory)
+                   if name.endswith((".csv", ".parquet"))})
+
+
+def measure(run: Callable[[], None], repeats: int) -> float:
+    """
+    Time one pass of run.
+
+    Returns:
+        Fastest seconds per pass over repeats measurements
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        passes, started = 0, time.perf_counter()
+        while True:
+            run()
+            passes += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= MIN_PASS_SECONDS:
+                break
+        best = min(best, elapsed / passes)
+    return best
+
+
+def _stage_runs(tickers: List[str]) -> Dict[str, Callable[[], None]]:
+    """Load one universe (warming the cache) and build a pass function per stage."""
+    import indicators
+    from app import app
+
+    histories = {ticker: CaptionComposer.get_provider().history(ticker, period="3mo") for ticker in tickers}
+    stock_data = {ticker: CaptionComposer.fetch_stock_data(ticker) for ticker in tickers}
+    outlooks = {ticker: CaptionComposer.analyze_market_outlook(data, data["rsi"]) for ticker, data in stock_data.items()}
+    tones = {ticker: CaptionComposer.generate_forecast_tone(data["rsi"], ticker, data, outlooks[ticker],
+                                                            rng=random.Random(ticker))
+             for ticker, data in stock_data.items()}
+    motifs = {ticker: CaptionComposer.determine_motif(data["rsi"])[0] for ticker, data in stock_data.items()}
+    stacked = indicators.stack_histories(list(histories.values()))
+    client = app.test_client()
+    rng = random.Random(FIXTURE_SEED)
+
+    def each(call: Callable[[str], object]) -> Callable[[], None]:
+        def run() -> None:
+            for ticker in tickers:
+                call(ticker)
+        return run
+
+    return {
+        "calculate_rsi": each(lambda ticker: CaptionComposer.calculate_rsi(histories[ticker]["Close"], period=14)),
+        "calculate_entry_exit_points": each(lambda ticker: CaptionComposer.calculate_entry_exit_points(
+            histories[ticker], stock_data[ticker]["price"], stock_data[ticker]["rsi"])),
+        "compute_indicators": lambda: indicators.compute_indicators(*stacked),
+        "analyze_market_outlook": each(lambda ticker: CaptionComposer.analyze_market_outlook(
+            stock_data[ticker], stock_data[ticker]["rsi"])),
+        "generate_forecast_tone": each(lambda ticker: CaptionComposer.generate_forecast_tone(
+            stock_data[ticker]["rsi"], ticker, stock_data[ticker], outlooks[ticker], rng=rng)),
+        "select_caption": each(lambda ticker: CaptionComposer.select_caption(motifs[ticker], tones[ticker], ticker, rng=rng)),
+        "compose": each(lambda ticker: CaptionComposer.compose(ticker, stock_data[ticker]["rsi"], tones[ticker], rng=rng)),
+        "generate_from_ticker": each(generate_from_ticker),
+        "flask_caption": each(lambda ticker: client.get(f"/api/caption/{ticker}"))
+    }
+
+
+def run_benchmarks(sizes: List[int], repeats: int, fixtures: str = None, stages: List[str] = STAGES) -> Dict:
+    """
+    Time every stage for every universe size.
+
+    Args:
+        sizes: Universe sizes (number of tickers)
+        repeats: Measurements per stage; the fastest is kept
+        fixtures: Recorded fixture directory (default: synthetic fixtures in FIXTURE_DIR)
+        stages: Stage names to run
+
+    Returns:
+        Report dictionary: "meta" plus "results" stage -> size -> timings
+    """
+    if fixtures:
+        available = recorded_tickers(fixtures)
+    else:
+        fixtures = os.path.expanduser(FIXTURE_DIR)
+        available = prepare_fixtures(fixtures, max(sizes))
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": fixtures,
+            "repeats": repeats
+        },
+        "results": {stage: {} for stage in stages}
+    }
+
+    saved_provider, saved_cache = CaptionComposer.provider, CaptionComposer.cache
+    try:
+        for size in sizes:
+            if size > len(available):
+                print(f"⚠️  Skipping {size} tickers: only {len(available)} recorded", file=sys.stderr)
+                continue
+            # Every universe fits in the cache and nothing expires mid-run, so "warm" stays warm
+            CaptionComposer.cache = MarketDataCache(max_tickers=max(size, 256),
+                                                    ttls={data_class: 1e9 for data_class in MarketDataCache.DEFAULT_TTLS})
+            CaptionComposer.set_provider(FixtureProvider(fixtures))
+            runs = _stage_runs(available[:size])
+            for stage in stages:
+                seconds = measure(runs[stage], repeats)
+                report["results"][stage][str(size)] = {
+                    "calls": size,
+                    "seconds": round(seconds, 6),
+                    "per_call_us": round(seconds / size * 1e6, 3)
+                }
+                print(f"   {stage:<30}{size:>6}{seconds / size * 1e6:>14.1f} µs/call", file=sys.stderr)
+    finally:
+        # Not set_provider: it would invalidate the caller's cache just restored
+        CaptionComposer.cache = saved_cache
+        CaptionComposer.provider = saved_provider
+    return report
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float = TOLERANCE) -> List[Tuple[str, str, float, float]]:
+    """
+    Find stages that got slower than the baseline allows.
+
+    Args:
+        report: Current run_benchmarks report
+        baseline: Earlier report
+        tolerance: Allowed fractional slowdown per call
+
+    Returns:
+        (stage, size, baseline µs/call, current µs/call) for every regression
+    """
+    regressions = []
+    for stage, by_size in report["results"].items():
+        for size, timing in by_size.items():
+            before = baseline.get("results", {}).get(stage, {}).get(size)
+            if before is None:
+                continue
+            now, then = timing["per_call_us"], before["per_call_us"]
+            if now > then * (1 + tolerance) and now - then > NOISE_FLOOR_US:
+                regressions.append((stage, size, then, now))
+    return regressions
+
+
+def print_comparison(report: Dict, baseline: Dict) -> None:
+    print(f"{'stage':<30}{'tickers':>8}{'baseline µs':>14}{'now µs':>12}{'change':>9}")
+    for stage, by_size in report["results"].items():
+        for size, timing in by_size.items():
+            before = baseline.get("results", {}).get(stage, {}).get(size)
+            then = f"{before['per_call_us']:.1f}" if before else "-"
+            change = f"{(timing['per_call_us'] / before['per_call_us'] - 1) * 100:+.0f}%" if before else ""
+            print(f"{stage:<30}{size:>8}{then:>14}{timing['per_call_us']:>12.1f}{change:>9}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every Caption Composer pipeline stage")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help=f"comma-separated universe sizes (default {','.join(map(str, SIZES))})")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages (default all)")
+    parser.add_argument("--repeats", type=int, default=3, help="measurements per stage, fastest kept (default 3)")
+    parser.add_argument("--fixtures", help="recorded fixture directory (default: synthetic fixtures)")
+    parser.add_argument("--output", default="benchmark_report.json", help="report path (default benchmark_report.json)")
+    parser.add_argument("--baseline", help="earlier report to compare against; exit 1 on a slowdown")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help=f"allowed slowdown per call, as a fraction (default {TOLERANCE})")
+    args = parser.parse_args(argv)
+
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    print("⏱️  Pipeline benchmark\n", file=sys.stderr)
+    report = run_benchmarks([int(size) for size in args.sizes.split(",")], args.repeats, args.fixtures, stages)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\n💾 Report written to {args.output}", file=sys.stderr)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    print()
+    print_comparison(report, baseline)
+    regressions = compare(report, baseline, args.tolerance)
+    for stage, size, then, now in regressions:
+        print(f"❌ {stage} ({size} tickers): {then:.1f} → {now:.1f} µs/call")
+    print("\n🎉 No slowdowns beyond tolerance" if not regressions else
+          f"\n⚠️  {len(regressions)} stage(s) slower than {args.tolerance:.0%} over baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
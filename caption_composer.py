@@ -7,9 +7,127 @@ weaving together RSI levels, forecast tones, and archetypal motifs.
 Part of the TradeGPT-Aladdin mythic trading assistant.
 """
 
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+import functools
+import hashlib
+import heapq
+import itertools
+import logging
 import random
+import re
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from bisect import bisect_left
 from datetime import datetime, timedelta
+import importlib
+
+# pandas, numpy and yfinance are imported inside the functions that need them,
+# so the text path (compose, determine_motif, select_caption,
+# analyze_market_outlook) loads without them; servers preload them with warm_up
+import concurrency
+import metrics
+from log_setup import get_logger
+from market_cache import MarketDataCache
+from market_data import MarketDataProvider, provider_from_spec
+
+
+log = get_logger("composer")
+
+# Heavy modules the data path needs, preloaded by warm_up (missing ones are skipped)
+WARMUP_MODULES = ("numpy", "pandas", "indicators", "ohlc_store", "stream_hub", "yfinance")
+
+
+class CaptionIndex:
+    """
+    CaptionComposer.TONE_RESONANCE and CAPTION_TEMPLATES compiled for lookups
+    that cost O(tone length) instead of O(templates x keywords).
+    
+    Every tone key and keyword gets a bit. One regex reports, at each
+    position of a tone, the longest term starting there (any shorter term
+    starting at the same position is a prefix of it, so its bits are added
+    too), which yields the exact substring-match set of the original scans.
+    Each motif keeps a keyword -> template bitset inverted index, and
+    resonance scores come from a precomputed step table.
+    """
+    
+    def __init__(self, tone_resonance: Dict[str, List[str]], caption_templates: Dict[str, List[str]]):
+        keywords = [keyword for words in tone_resonance.values() for keyword in words]
+        terms = list(dict.fromkeys([*tone_resonance, *keywords]))
+        self.bits = {term: 1 << position for position, term in enumerate(terms)}
+        
+        alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+        self._matcher = re.compile(f"(?=({alternation}))")
+        self._closure = {
+            term: sum(self.bits[prefix] for prefix in terms if term.startswith(prefix))
+            for term in terms
+        }
+        
+        # (tone key bit, bits of its keywords) in TONE_RESONANCE order
+        self.tone_keys = [
+            (self.bits[key], sum(self.bits[keyword] for keyword in set(words)))
+            for key, words in tone_resonance.items()
+        ]
+        self.keyword_mask = sum(self.bits[keyword] for keyword in set(keywords))
+        self._tone_key_names = list(tone_resonance)
+        self._motif_keys: Dict[str, int] = {}
+        
+        # Scores reached by adding 0.1 per keyword hit, summed in the same order as before
+        steps = [0.5]
+        for _ in range(len(keywords)):
+            steps.append(steps[-1] + 0.1)
+        self.resonance_steps = tuple(min(step, 1.0) for step in steps)
+        
+        # motif -> [(keyword bit, bitset of template positions containing it)]
+        self.templates = {motif: tuple(templates) for motif, templates in caption_templates.items()}
+        self.captions_by_keyword = {}
+        for motif, templates in self.templates.items():
+            lowered = [template.lower() for template in templates]
+            self.captions_by_keyword[motif] = [
+                (self.bits[keyword], sum(1 << position for position, text in enumerate(lowered) if keyword in text))
+                for keyword in dict.fromkeys(keywords)
+                if any(keyword in text for text in lowered)
+            ]
+        
+        # Tones repeat (they are built from a handful of phrases), so scans and scores are memoized
+        self.scan = functools.lru_cache(maxsize=4096)(self._scan)
+        self.resonance = functools.lru_cache(maxsize=4096)(self._resonance)
+    
+    def _scan(self, tone: str) -> int:
+        """Bitset of every tone key and keyword occurring in tone (case-insensitive)."""
+        found = 0
+        for term in self._matcher.findall(tone.lower()):
+            found |= self._closure[term]
+        return found
+    
+    def motif_keys(self, motif: str) -> int:
+        """Bits of the tone keys contained in the motif name."""
+        keys = self._motif_keys.get(motif)
+        if keys is None:
+            motif_lower = motif.lower()
+            keys = sum(bit for (bit, _), name in zip(self.tone_keys, self._tone_key_names) if name in motif_lower)
+            self._motif_keys[motif] = keys
+        return keys
+    
+    def _resonance(self, forecast_tone: str, motif: str) -> float:
+        """Same score as the keyword scan documented in CaptionComposer.calculate_tone_resonance."""
+        found = self.scan(forecast_tone)
+        active = found | self.motif_keys(motif)
+        hits = sum(bin(found & keyword_bits).count("1")
+                   for key_bit, keyword_bits in self.tone_keys if active & key_bit)
+        return self.resonance_steps[hits]
+    
+    def resonant_captions(self, motif: str, forecast_tone: str) -> List[str]:
+        """Templates for motif that contain a keyword found in the tone, in template order."""
+        found = self.scan(forecast_tone) & self.keyword_mask
+        selected = 0
+        for keyword_bit, positions in self.captions_by_keyword.get(motif, ()):
+            if found & keyword_bit:
+                selected |= positions
+        templates = self.templates.get(motif, ())
+        return [template for position, template in enumerate(templates) if selected >> position & 1]
 
 
 class CaptionComposer:
@@ -69,101 +187,568 @@ class CaptionComposer:
         "reflection": ["whisper", "silence", "stillness", "lesson"]
     }
     
+    # Forecast tones by RSI band (< 30, < 50, < 70, >= 70), keyed by the
+    # outlook signal: bullish sentiment below 70, bearish or conflicting above
+    FORECAST_TONES = {
+        0: {
+            True: [
+                "Deep value emerging from shadows, patience rewarded",
+                "Oversold whispers of reversal, strategic accumulation beckons",
+                "Market fear creates opportunity, silence before the surge",
+                "Contrarian clarity in capitulation, foundation for ascent"
+            ],
+            False: [
+                "Reflective stillness with patient observation",
+                "Deep introspection meets strategic pause",
+                "Caution in oversold territory, await confirmation",
+                "Silence before clarity, patience before action"
+            ]
+        },
+        1: {
+            True: [
+                "Strategic clarity with cinematic rhythm, momentum gathering",
+                "Balanced discipline meets bullish conviction",
+                "Patient alignment with analyst optimism, confluence building",
+                "Consolidation before expansion, spring coiling"
+            ],
+            False: [
+                "Neutral consolidation, strategic patience required",
+                "Balanced discipline with focused observation",
+                "Patient alignment awaiting clearer catalyst",
+                "Measured caution in transitional phase"
+            ]
+        },
+        2: {
+            True: [
+                "Clear signal alignment with precision, trend confirmed",
+                "Strategic clarity meets confident execution, ride the wave",
+                "Vision crystallizing into powerful momentum",
+                "Bullish confluence with technical strength, trust the trend"
+            ],
+            False: [
+                "Momentum strong but mixed signals, trailing stops advised",
+                "Technical strength with fundamental caution",
+                "Rising price meets analyst skepticism, stay nimble",
+                "Clear trend but approach targets, consider scaling"
+            ]
+        },
+        3: {
+            True: [
+                "Overbought euphoria meets reality check, caution warranted",
+                "Extended rally with warning signs, profit-taking zone",
+                "Fire peaks but oxygen thins, strategic exit considered",
+                "Powerful surge approaching exhaustion, lock in gains"
+            ],
+            False: [
+                "Momentum surge with disciplined conviction, strength on strength",
+                "Fire meets focus in perfect timing, let winners run",
+                "Powerful surge with analyst support, managed aggression",
+                "Overbought but supported, tight stops on continued strength"
+            ]
+        }
+    }
+    
+    # Simpler tones by RSI band when no market data is available
+    FALLBACK_TONES = {
+        0: [
+            "Reflective stillness with patient observation",
+            "Deep introspection meets strategic pause",
+            "Silence before clarity, patience before action"
+        ],
+        1: [
+            "Strategic clarity with cinematic rhythm",
+            "Balanced discipline with focused intention",
+            "Patient alignment awaiting confluence"
+        ],
+        2: [
+            "Clear signal alignment with precision",
+            "Strategic clarity meets confident execution",
+            "Vision crystallizing into momentum"
+        ],
+        3: [
+            "Momentum surge with disciplined conviction",
+            "Fire meets focus in perfect timing",
+            "Powerful surge with strategic clarity"
+        ]
+    }
+    
+    # RSI levels analyze_market_outlook branches on
+    OUTLOOK_RSI_EDGES = (30, 35, 40, 50, 60, 65, 70)
+    
+    # One representative input per bucket of the other outlook fields
+    OUTLOOK_SAMPLES = {
+        "consensus_rating": ("buy", "sell", "N/A"),
+        "price_vs_target": (-10.0, 0.0, 12.5, 20.0),
+        "upside_potential": (0.0, 10.0),
+        "days_to_earnings": (None, 3, 10)
+    }
+    
+    # How tones and captions are picked when no per-request generator is given:
+    # "random" (global random module) or "deterministic" (same text for the
+    # same ticker, day and motif, so responses can be cached)
+    SELECTION_MODE = os.environ.get("CAPTION_SELECTION", "random")
+    
+    # Compiled TONE_RESONANCE and CAPTION_TEMPLATES (built on first use, see caption_index)
+    _caption_index = None
+    
+    # Built from _outlook_ladder on first use (see outlook_table)
+    _outlook_table = None
+    
+    # Shared in-process cache for history, analyst info and earnings calendars
+    cache = MarketDataCache()
+    
+    # Active market data backend (resolved lazily, see get_provider)
+    provider = None
+    
+    # Where live price history is persisted between runs
+    DEFAULT_OHLC_STORE = os.path.join("~", ".cache", "caption_composer", "ohlc")
+    
+    # Seconds to wait on each upstream call before degrading
+    FETCH_TIMEOUTS = {"history": 10.0, "info": 5.0, "calendar": 2.0}
+    
+    # Seconds between checks whether a call queued on the I/O pool has started
+    QUEUE_POLL_SECONDS = 0.25
+    
+    # Coalesces simultaneous fetch_stock_data calls for the same ticker
+    fetch_flight = concurrency.SingleFlight()
+    
     @staticmethod
-    def fetch_stock_data(ticker: str) -> Optional[Dict]:
+    def get_provider() -> MarketDataProvider:
+        """
+        Return the active market data provider.
+        
+        Defaults to the spec in the CAPTION_DATA_PROVIDER environment variable
+        (e.g. "synthetic" or "fixture:./fixtures"), or live yfinance.
+        
+        Live yfinance history is kept in an on-disk OHLC store (see
+        ohlc_store.py) at CAPTION_OHLC_STORE (default
+        ~/.cache/caption_composer/ohlc) so only new bars are downloaded.
+        Setting CAPTION_OHLC_STORE puts any provider behind the store;
+        "off" disables it.
+        """
+        if CaptionComposer.provider is None:
+            spec = os.environ.get("CAPTION_DATA_PROVIDER", "yfinance")
+            provider = provider_from_spec(spec)
+            
+            store_dir = os.environ.get("CAPTION_OHLC_STORE")
+            if store_dir is None and provider.name == "yfinance":
+                store_dir = CaptionComposer.DEFAULT_OHLC_STORE
+            if store_dir and store_dir.lower() != "off":
+                from ohlc_store import OHLCStore, StoredProvider
+                provider = StoredProvider(provider, OHLCStore(store_dir))
+            
+            CaptionComposer.provider = provider
+        return CaptionComposer.provider
+    
+    @staticmethod
+    def set_provider(provider: MarketDataProvider) -> None:
+        """
+        Switch the market data backend and drop data cached from the previous one.
+        
+        Args:
+            provider: Any MarketDataProvider (YFinanceProvider, FixtureProvider, SyntheticProvider)
+        """
+        CaptionComposer.provider = provider
+        CaptionComposer.cache.invalidate()
+    
+    @staticmethod
+    def fetch_stock_data(ticker: str, timings: Dict = None) -> Optional[Dict]:
         """
         Fetch comprehensive stock data including price, RSI, analyst ratings,
         price targets, earnings date, and technical levels.
         
-        Uses yfinance library for free, real-time stock data.
+        Reads from the active market data provider (live yfinance by default,
+        see get_provider). History, analyst info and the earnings calendar are
+        served from CaptionComposer.cache while fresh, so repeat requests skip
+        the network.
+        
+        Uncached history, info and calendar calls run concurrently on the shared
+        I/O pool, each bounded by FETCH_TIMEOUTS counted from when the call
+        starts running, so time spent queued behind other requests does not
+        count: a slow info lookup degrades to no analyst data and a slow
+        calendar to earnings_date=None. Concurrent calls for the same ticker
+        share one fetch (see fetch_flight).
         
         Args:
             ticker: Stock ticker symbol
+            timings: Optional dictionary receiving the seconds spent computing
+                indicators under "indicators" (only when this call ran the fetch)
             
         Returns:
             Dictionary with comprehensive trading intelligence
         """
+        stock_data = CaptionComposer.fetch_flight.do(
+            ticker.upper(), lambda: CaptionComposer._fetch_stock_data(ticker, timings)
+        )
+        return dict(stock_data) if stock_data is not None else None
+    
+    @staticmethod
+    def _fetch_stock_data(ticker: str, timings: Dict = None) -> Optional[Dict]:
+        """Uncoalesced body of fetch_stock_data."""
         try:
-            # Try using yfinance
-            import yfinance as yf
-            import pandas as pd
+            # Fetch stock data (cached per ticker and data class), all three calls in flight at once
+            provider = CaptionComposer.get_provider()
+            timeouts = CaptionComposer.FETCH_TIMEOUTS
+            started: Dict[Tuple[str, str], float] = {}
+            hist_call = CaptionComposer._load_async(ticker, "history", lambda: provider.history(ticker, period="3mo"),
+                                                    started)  # 3 months for RSI
+            info_call = CaptionComposer._load_async(ticker, "info", lambda: provider.info(ticker), started)
+            if CaptionComposer.cache.contains(ticker, "calendar"):
+                calendar_call = Future()
+                calendar_call.set_result(CaptionComposer._load_calendar(ticker))
+            else:
+                calendar_call = concurrency.submit(CaptionComposer._started_call, started, (ticker, "calendar"),
+                                                   CaptionComposer._load_calendar, ticker)
             
-            # Fetch stock data
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="3mo")  # Get 3 months of data for RSI calculation
-            info = stock.info
+            hist = CaptionComposer._result_once_started(hist_call, started, (ticker, "history"), timeouts["history"])
+            try:
+                info = CaptionComposer._result_once_started(info_call, started, (ticker, "info"), timeouts["info"])
+            except FuturesTimeoutError:
+                log.warning("Analyst data timed out", extra={"ticker": ticker.upper()})
+                info = {}
             
             if hist.empty:
-                print(f"⚠️  No data found for {ticker}. Using simulated data...")
+                log.warning("No price history, using simulated data", extra={"ticker": ticker.upper()})
                 return CaptionComposer._generate_simulated_data(ticker)
             
-            # Calculate RSI (14-period)
-            rsi = CaptionComposer.calculate_rsi(hist['Close'], period=14)
-            current_price = hist['Close'].iloc[-1]
-            
-            # Get analyst recommendations
-            consensus_rating = info.get('recommendationKey', 'N/A')
-            target_price = info.get('targetMeanPrice', None)
-            num_analysts = info.get('numberOfAnalystOpinions', 0)
-            
-            # Get earnings date
-            earnings_date = None
-            days_to_earnings = None
             try:
-                calendar = stock.calendar
-                if calendar is not None and 'Earnings Date' in calendar:
-                    earnings_dates = calendar.get('Earnings Date')
-                    if earnings_dates is not None and len(earnings_dates) > 0:
-                        next_earnings = earnings_dates[0]
-                        
-                        # Convert to pandas Timestamp for consistent date handling
-                        if hasattr(next_earnings, 'strftime'):
-                            earnings_date = next_earnings.strftime('%Y-%m-%d')
-                            
-                            # Convert both dates to pandas Timestamp for calculation
-                            next_earnings_ts = pd.Timestamp(next_earnings)
-                            now_ts = pd.Timestamp.now()
-                            days_to_earnings = (next_earnings_ts - now_ts).days
-            except Exception as e:
-                print(f"⚠️  Error getting earnings data: {e}")
-                import traceback
-                traceback.print_exc()
+                calendar = CaptionComposer._result_once_started(calendar_call, started, (ticker, "calendar"),
+                                                                timeouts["calendar"])
+            except Exception:
+                calendar = None
             
-            # Calculate support and resistance levels (simple pivot points)
-            entry_exit = CaptionComposer.calculate_entry_exit_points(
-                hist, current_price, rsi
-            )
+            started = time.perf_counter()
+            stock_data = CaptionComposer._build_stock_data(ticker, hist, info, calendar, provider.name)
+            if timings is not None:
+                timings["indicators"] = time.perf_counter() - started
+            return stock_data
             
-            return {
-                "ticker": ticker.upper(),
-                "price": round(current_price, 2),
-                "rsi": round(rsi, 2),
-                "consensus_rating": consensus_rating,
-                "target_price": round(target_price, 2) if target_price else None,
-                "num_analysts": num_analysts,
-                "earnings_date": earnings_date,
-                "days_to_earnings": days_to_earnings,
-                "entry_point": entry_exit["entry"],
-                "exit_point": entry_exit["exit"],
-                "stop_loss": entry_exit["stop_loss"],
-                "upside_potential": entry_exit["upside_potential"],
-                "data_source": "yfinance"
-            }
+        except ImportError as e:
+            # Fallback: yfinance/pandas not installed, use simulated data
+            log.warning("Market data package not installed (pip install yfinance pandas), using simulated data",
+                        extra={"package": e.name or "yfinance", "ticker": ticker.upper()})
+            return CaptionComposer._generate_simulated_data(ticker)
             
-        except ImportError:
-            # Fallback: yfinance not installed, use simulated data
-            print("⚠️  yfinance not installed. Install with: pip install yfinance")
-            print("📊 Using simulated data for demonstration...")
+        except FuturesTimeoutError:
+            log.warning("Price history timed out, using simulated data", extra={"ticker": ticker.upper()})
             return CaptionComposer._generate_simulated_data(ticker)
             
         except Exception as e:
-            print(f"⚠️  Error fetching data for {ticker}: {e}")
-            print("📊 Using simulated data...")
+            log.warning("Error fetching data, using simulated data", extra={"ticker": ticker.upper(), "error": str(e)})
             return CaptionComposer._generate_simulated_data(ticker)
     
+    @staticmethod
+    def fetch_stock_data_batch(tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch comprehensive stock data for many tickers at once.
+        
+        Histories not already cached are pulled in one bulk provider request
+        (yf.download with threads for yfinance); analyst info and earnings
+        calendars are fanned out on the shared I/O pool under the same
+        FETCH_TIMEOUTS as fetch_stock_data, each counted from when its call
+        starts rather than when it is queued. RSI, ATR, pivots and trading
+        levels are then computed for every ticker in one vectorized pass
+        (see indicators.compute_indicators).
+        
+        Args:
+            tickers: Stock ticker symbols
+            
+        Returns:
+            Dictionary mapping each upper-cased ticker to its stock data
+            (simulated data for tickers that could not be fetched)
+        """
+        results = dict(CaptionComposer.iter_stock_data_batch(tickers))
+        return {symbol: results[symbol] for symbol in dict.fromkeys(ticker.upper() for ticker in tickers)}
+    
+    @staticmethod
+    def iter_stock_data_batch(tickers: List[str]):
+        """
+        Streaming form of fetch_stock_data_batch.
+        
+        Yields each ticker as soon as its analyst info and earnings calendar
+        resolve (or time out), so callers can forward results progressively.
+        When analyst info or the calendar timed out, the stock data lists
+        those calls ("info", "calendar") under "timed_out", so callers can
+        tell missing analyst data from a neutral rating.
+        
+        Args:
+            tickers: Stock ticker symbols
+            
+        Yields:
+            Tuples of (upper-cased ticker, stock data) in completion order
+        """
+        symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        if not symbols:
+            return
+        
+        try:
+            cache = CaptionComposer.cache
+            provider = CaptionComposer.get_provider()
+            
+            # One bulk request for every history missing from the cache
+            histories = {symbol: cache.get(symbol, "history") for symbol in symbols}
+            missing = [symbol for symbol, hist in histories.items() if hist is None]
+            if missing:
+                with metrics.UPSTREAM_SECONDS.time(call="history_batch"):
+                    fetched = provider.history_batch(missing, period="3mo")
+                for symbol in missing:
+                    hist = fetched.get(symbol)
+                    if hist is not None:
+                        cache.put(symbol, "history", hist)
+                    histories[symbol] = hist
+            
+            live = [symbol for symbol in symbols
+                    if histories[symbol] is not None and not histories[symbol].empty]
+            
+            # Indicators for every live ticker at once. This stays in-process: even at
+            # 5,000 tickers the pass takes milliseconds, less than shipping it to
+            # worker processes through shared memory would cost.
+            import indicators
+            with metrics.INDICATOR_SECONDS.time(indicator="vectorized"):
+                closes, highs, lows = indicators.stack_histories([histories[symbol] for symbol in live])
+                computed = indicators.compute_indicators(closes, highs, lows)
+            
+        except ImportError as e:
+            log.warning("Market data package not installed (pip install yfinance pandas), using simulated data",
+                        extra={"package": e.name or "yfinance", "tickers": len(symbols)})
+            for symbol in symbols:
+                yield symbol, CaptionComposer._generate_simulated_data(symbol)
+            return
+            
+        except Exception as e:
+            log.warning("Error fetching batch data, using simulated data", extra={"tickers": len(symbols), "error": str(e)})
+            for symbol in symbols:
+                yield symbol, CaptionComposer._generate_simulated_data(symbol)
+            return
+        
+        live_symbols = set(live)
+        for symbol in symbols:
+            if symbol not in live_symbols:
+                log.warning("No price history, using simulated data", extra={"ticker": symbol})
+                yield symbol, CaptionComposer._generate_simulated_data(symbol)
+        
+        # Analyst info and calendars have no bulk endpoint, so fan them out. A call
+        # queued behind other batches on the I/O pool has not started yet, so each
+        # timeout runs from the moment its own call starts, not from submission.
+        # Calls report their start and completion on one queue, and deadlines sit in
+        # a heap, so each wake-up handles only the calls that changed.
+        timeouts = CaptionComposer.FETCH_TIMEOUTS
+        loaders = {"info": CaptionComposer._load_info, "calendar": CaptionComposer._load_calendar}
+        events = queue.SimpleQueue()  # (symbol, data_class, start time), or None as the time once finished
+        
+        def run(symbol: str, data_class: str):
+            events.put((symbol, data_class, time.monotonic()))
+            return loaders[data_class](symbol)
+        
+        calls: Dict[str, Dict[str, Future]] = {}
+        for symbol in live:
+            calls[symbol] = {}
+            for data_class in loaders:
+                call = concurrency.submit(run, symbol, data_class)
+                call.add_done_callback(lambda _, key=(symbol, data_class): events.put((*key, None)))
+                calls[symbol][data_class] = call
+        
+        columns = {symbol: column for column, symbol in enumerate(live)}
+        unresolved = {symbol: set(loaders) for symbol in live}
+        timed_out: Dict[str, List[str]] = {}
+        deadlines: List[Tuple[float, str, str]] = []
+        
+        while unresolved:
+            resolved = []
+            try:
+                wait_for = max(0.0, deadlines[0][0] - time.monotonic()) if deadlines else None
+                symbol, data_class, start = events.get(timeout=wait_for)
+                if start is not None:
+                    heapq.heappush(deadlines, (start + timeouts[data_class], symbol, data_class))
+                else:
+                    resolved.append((symbol, data_class))
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            while deadlines and deadlines[0][0] <= now:
+                _, symbol, data_class = heapq.heappop(deadlines)
+                if data_class in unresolved.get(symbol, ()) and not calls[symbol][data_class].done():
+                    timed_out.setdefault(symbol, []).append(data_class)
+                    resolved.append((symbol, data_class))
+            
+            for symbol, data_class in resolved:
+                waiting = unresolved.get(symbol)
+                if waiting is None or data_class not in waiting:
+                    continue
+                waiting.discard(data_class)
+                if waiting:
+                    continue
+                
+                del unresolved[symbol]
+                missed = sorted(timed_out.pop(symbol, []), key=list(loaders).index)
+                if missed:
+                    log.warning("Analyst data timed out", extra={"ticker": symbol, "calls": ",".join(missed)})
+                info = {} if "info" in missed else concurrency.result_or_default(calls[symbol]["info"], 0, {})
+                calendar = None if "calendar" in missed else concurrency.result_or_default(calls[symbol]["calendar"], 0)
+                del calls[symbol]
+                try:
+                    stock_data = CaptionComposer._build_stock_data(
+                        symbol, histories[symbol], info, calendar, provider.name,
+                        levels=indicators.column_levels(computed, columns[symbol])
+                    )
+                    if missed:
+                        stock_data["timed_out"] = missed
+                except Exception as e:
+                    log.warning("Error computing indicators, using simulated data", extra={"ticker": symbol, "error": str(e)})
+                    stock_data = CaptionComposer._generate_simulated_data(symbol)
+                yield symbol, stock_data
+    
+    @staticmethod
+    def _started_call(started: Dict, key: Tuple[str, str], loader, ticker: str):
+        """Record when a queued call starts running, then run it."""
+        started[key] = time.monotonic()
+        return loader(ticker)
+    
+    @staticmethod
+    def _result_once_started(call: Future, started: Dict, key: Tuple[str, str], timeout: float):
+        """
+        Wait for a call submitted through _started_call, up to timeout seconds after it started.
+        
+        Raises:
+            concurrent.futures.TimeoutError: If the call ran for longer than timeout
+        """
+        while True:
+            start = started.get(key)
+            try:
+                if start is None:
+                    return call.result(timeout=CaptionComposer.QUEUE_POLL_SECONDS)
+                return call.result(timeout=max(0.0, start + timeout - time.monotonic()))
+            except FuturesTimeoutError:
+                if start is not None:
+                    raise
+    
+    @staticmethod
+    def _load_async(ticker: str, data_class: str, loader, started: Dict) -> Future:
+        """
+        Resolve a cached value inline, or schedule loader on the shared I/O pool.
+        
+        The scheduled call records its start time in started under
+        (ticker, data_class) (see _result_once_started).
+        """
+        cache = CaptionComposer.cache
+        if cache.contains(ticker, data_class):
+            future = Future()
+            future.set_result(cache.get_or_load(ticker, data_class, loader))
+            return future
+        load = lambda _: cache.get_or_load(ticker, data_class, lambda: CaptionComposer._timed_call(data_class, loader))
+        return concurrency.submit(CaptionComposer._started_call, started, (ticker, data_class), load, ticker)
+    
+    @staticmethod
+    def _timed_call(call: str, loader):
+        """Run an upstream provider call, recording its latency (see metrics.UPSTREAM_SECONDS)."""
+        with metrics.UPSTREAM_SECONDS.time(call=call):
+            return loader()
+    
+    @staticmethod
+    def _load_info(ticker: str) -> Dict:
+        """Fetch analyst info through the cache, degrading to an empty dict on errors."""
+        provider = CaptionComposer.get_provider()
+        try:
+            return CaptionComposer.cache.get_or_load(
+                ticker, "info", lambda: CaptionComposer._timed_call("info", lambda: provider.info(ticker))
+            ) or {}
+        except Exception as e:
+            log.warning("Error getting analyst data", extra={"ticker": ticker.upper(), "error": str(e)})
+            return {}
+    
+    @staticmethod
+    def _load_calendar(ticker: str) -> Optional[Dict]:
+        """Fetch the earnings calendar through the cache, degrading to None on errors."""
+        provider = CaptionComposer.get_provider()
+        try:
+            return CaptionComposer.cache.get_or_load(
+                ticker, "calendar", lambda: CaptionComposer._timed_call("calendar", lambda: provider.calendar(ticker))
+            )
+        except Exception as e:
+            log.warning("Error getting earnings calendar", extra={"ticker": ticker.upper(), "error": str(e)})
+            return None
+    
+    @staticmethod
+    def _build_stock_data(ticker: str, hist, info: Dict, calendar: Optional[Dict], data_source: str,
+                          levels: Tuple = None) -> Dict:
+        """
+        Compute indicators and assemble the stock data dictionary from raw provider data.
+        
+        Args:
+            ticker: Stock ticker symbol
+            hist: Historical price data (pandas DataFrame, non-empty)
+            info: Analyst info dictionary
+            calendar: Earnings calendar dictionary or None
+            data_source: Name of the provider the data came from
+            levels: Optional precomputed (price, rsi, entry_exit) from indicators.column_levels
+            
+        Returns:
+            Dictionary with comprehensive trading intelligence
+        """
+        import pandas as pd
+        
+        if levels is None:
+            # Calculate RSI (14-period)
+            with metrics.INDICATOR_SECONDS.time(indicator="rsi"):
+                rsi = CaptionComposer.calculate_rsi(hist['Close'], period=14)
+            current_price = hist['Close'].iloc[-1]
+            
+            # Calculate support and resistance levels (simple pivot points)
+            with metrics.INDICATOR_SECONDS.time(indicator="levels"):
+                entry_exit = CaptionComposer.calculate_entry_exit_points(
+                    hist, current_price, rsi
+                )
+        else:
+            current_price, rsi, entry_exit = levels
+        
+        # Get analyst recommendations
+        consensus_rating = info.get('recommendationKey', 'N/A')
+        target_price = info.get('targetMeanPrice', None)
+        num_analysts = info.get('numberOfAnalystOpinions', 0)
+        
+        # Get earnings date
+        earnings_date = None
+        days_to_earnings = None
+        try:
+            if calendar is not None and 'Earnings Date' in calendar:
+                earnings_dates = calendar.get('Earnings Date')
+                if earnings_dates is not None and len(earnings_dates) > 0:
+                    next_earnings = earnings_dates[0]
+                    
+                    # Convert to pandas Timestamp for consistent date handling
+                    if hasattr(next_earnings, 'strftime'):
+                        earnings_date = next_earnings.strftime('%Y-%m-%d')
+                        
+                        # Convert both dates to pandas Timestamp for calculation
+                        next_earnings_ts = pd.Timestamp(next_earnings)
+                        now_ts = pd.Timestamp.now()
+                        days_to_earnings = (next_earnings_ts - now_ts).days
+        except Exception as e:
+            # Tracebacks only when debugging; this runs once per fetched ticker
+            log.warning("Error parsing earnings date", extra={"ticker": ticker.upper(), "error": str(e)},
+                        exc_info=log.isEnabledFor(logging.DEBUG))
+        
+        return {
+            "ticker": ticker.upper(),
+            "price": round(current_price, 2),
+            "rsi": round(rsi, 2),
+            "consensus_rating": consensus_rating,
+            "target_price": round(target_price, 2) if target_price else None,
+            "num_analysts": num_analysts,
+            "earnings_date": earnings_date,
+            "days_to_earnings": days_to_earnings,
+            "entry_point": entry_exit["entry"],
+            "exit_point": entry_exit["exit"],
+            "stop_loss": entry_exit["stop_loss"],
+            "upside_potential": entry_exit["upside_potential"],
+            "data_source": data_source
+        }
+    
     @staticmethod
     def _generate_simulated_data(ticker: str) -> Dict:
         """Generate simulated data when real data is unavailable."""
+        metrics.SIMULATED_FALLBACKS.inc()
+        
         import hashlib
         hash_val = int(hashlib.md5(ticker.encode()).hexdigest(), 16)
         simulated_rsi = 20 + (hash_val % 60)  # RSI between 20-80
@@ -293,6 +878,10 @@ class CaptionComposer:
         """
         Generate comprehensive market outlook with sentiment, trend, and strategic advice.
         
+        Every field except price_vs_target depends only on which band RSI,
+        consensus, price-vs-target, upside and days-to-earnings fall in, so
+        it is read from outlook_table instead of re-running the ladder.
+        
         Args:
             stock_data: Dictionary with comprehensive stock data
             rsi: Current RSI value
@@ -302,6 +891,117 @@ class CaptionComposer:
         """
         current_price = stock_data.get('price', 0)
         target_price = stock_data.get('target_price')
+        
+        try:
+            if target_price and current_price > 0:
+                price_vs_target = ((target_price - current_price) / current_price) * 100
+            else:
+                price_vs_target = 0
+            index = CaptionComposer._outlook_index(
+                rsi, stock_data.get('consensus_rating', 'N/A'), price_vs_target,
+                stock_data.get('upside_potential', 0), stock_data.get('days_to_earnings')
+            )
+        except TypeError:
+            # Missing or non-numeric fields the ladder may never compare
+            return CaptionComposer._outlook_ladder(stock_data, rsi)
+        
+        outlook = (CaptionComposer._outlook_table or CaptionComposer.outlook_table())[index].copy()
+        outlook["price_vs_target"] = round(price_vs_target, 1) if price_vs_target else None
+        return outlook
+    
+    @staticmethod
+    def _outlook_index(rsi: float, consensus: str, price_vs_target: float, upside_potential: float,
+                       days_to_earnings) -> int:
+        """
+        Position in outlook_table of the bucket holding these inputs.
+        
+        RSI buckets are 2 * (edges below it) + (1 if it sits on an edge), so
+        every < / <= / > test in _outlook_ladder falls on a bucket boundary;
+        NaN, which fails every comparison, gets the last bucket.
+        """
+        edges = CaptionComposer.OUTLOOK_RSI_EDGES
+        if rsi != rsi:
+            rsi_bucket = 2 * len(edges) + 1
+        else:
+            below = bisect_left(edges, rsi)
+            rsi_bucket = 2 * below + (below < len(edges) and edges[below] == rsi)
+        
+        if consensus in ('strong_buy', 'buy'):
+            consensus_bucket = 0
+        elif consensus in ('strong_sell', 'sell'):
+            consensus_bucket = 1
+        else:
+            consensus_bucket = 2
+        
+        if price_vs_target > 15:
+            target_bucket = 3
+        elif price_vs_target > 10:
+            target_bucket = 2
+        elif price_vs_target < -5:
+            target_bucket = 0
+        else:
+            target_bucket = 1
+        
+        upside_bucket = 1 if upside_potential > 8 else 0
+        
+        if days_to_earnings is not None and 0 <= days_to_earnings <= 7:
+            earnings_bucket = 1
+        elif days_to_earnings is not None and 8 <= days_to_earnings <= 14:
+            earnings_bucket = 2
+        else:
+            earnings_bucket = 0
+        
+        return (((rsi_bucket * 3 + consensus_bucket) * 4 + target_bucket) * 2 + upside_bucket) * 3 + earnings_bucket
+    
+    @staticmethod
+    def outlook_table(rebuild: bool = False) -> List[Dict]:
+        """
+        Return the outlook lookup table, building it on first use.
+        
+        The ladder is evaluated once at a representative input of every
+        bucket (see OUTLOOK_SAMPLES) and stored at that input's _outlook_index.
+        
+        Args:
+            rebuild: Recompute after changing the ladder or its boundaries
+        """
+        if CaptionComposer._outlook_table is None or rebuild:
+            edges = CaptionComposer.OUTLOOK_RSI_EDGES
+            # One RSI inside each gap between edges, each edge itself, then NaN
+            bounds = [edges[0] - 10, *edges, edges[-1] + 10]
+            rsi_samples = [value for gap in range(len(edges) + 1)
+                           for value in ((bounds[gap] + bounds[gap + 1]) / 2, bounds[gap + 1])][:-1]
+            rsi_samples.append(float("nan"))
+            
+            samples = CaptionComposer.OUTLOOK_SAMPLES
+            table = [None] * (len(rsi_samples) * 3 * 4 * 2 * 3)
+            for rsi, consensus, price_vs_target, upside_potential, days_to_earnings in itertools.product(
+                    rsi_samples, samples["consensus_rating"], samples["price_vs_target"],
+                    samples["upside_potential"], samples["days_to_earnings"]):
+                stock_data = {
+                    "price": 100.0,
+                    "target_price": 100.0 + price_vs_target,
+                    "consensus_rating": consensus,
+                    "upside_potential": upside_potential,
+                    "days_to_earnings": days_to_earnings
+                }
+                row = CaptionComposer._outlook_ladder(stock_data, rsi)
+                row["price_vs_target"] = None
+                table[CaptionComposer._outlook_index(rsi, consensus, price_vs_target,
+                                                     upside_potential, days_to_earnings)] = row
+            assert None not in table, "OUTLOOK_SAMPLES must cover every bucket"
+            CaptionComposer._outlook_table = table
+        return CaptionComposer._outlook_table
+    
+    @staticmethod
+    def _outlook_ladder(stock_data: Dict, rsi: float) -> Dict:
+        """
+        Decision ladder behind analyze_market_outlook.
+        
+        Evaluated once per input bucket to build outlook_table, and directly
+        for inputs the buckets cannot express.
+        """
+        current_price = stock_data.get('price', 0)
+        target_price = stock_data.get('target_price')
         consensus = stock_data.get('consensus_rating', 'N/A')
         days_to_earnings = stock_data.get('days_to_earnings')
         upside_potential = stock_data.get('upside_potential', 0)
@@ -406,7 +1106,8 @@ class CaptionComposer:
         }
     
     @staticmethod
-    def generate_forecast_tone(rsi: float, ticker: str, stock_data: Dict = None) -> str:
+    def generate_forecast_tone(rsi: float, ticker: str, stock_data: Dict = None, outlook_data: Dict = None,
+                               rng: random.Random = None) -> str:
         """
         Generate an enhanced poetic forecast tone based on RSI, market conditions, and outlook.
         
@@ -414,104 +1115,41 @@ class CaptionComposer:
             rsi: Current RSI value
             ticker: Stock ticker symbol
             stock_data: Optional comprehensive stock data for deeper analysis
+            outlook_data: Optional result of analyze_market_outlook for the same
+                stock_data and RSI (computed from stock_data if omitted)
+            rng: Optional seeded random.Random to draw from (see pick)
             
         Returns:
             Poetic forecast tone string with strategic nuance
         """
         # Get market outlook if data available
-        if stock_data:
+        if outlook_data is None and stock_data:
             outlook_data = CaptionComposer.analyze_market_outlook(stock_data, rsi)
-            sentiment = outlook_data['overall_sentiment']
-            
+        
+        # RSI bands: < 30, < 50, < 70, then >= 70 (or NaN)
+        if rsi < 30:
+            band = 0
+        elif rsi < 50:
+            band = 1
+        elif rsi < 70:
+            band = 2
+        else:
+            band = 3
+        
+        if outlook_data:
             # Enhanced tones based on combined signals
-            if rsi < 30:
-                if "Bullish" in sentiment:
-                    tones = [
-                        "Deep value emerging from shadows, patience rewarded",
-                        "Oversold whispers of reversal, strategic accumulation beckons",
-                        "Market fear creates opportunity, silence before the surge",
-                        "Contrarian clarity in capitulation, foundation for ascent"
-                    ]
-                else:
-                    tones = [
-                        "Reflective stillness with patient observation",
-                        "Deep introspection meets strategic pause",
-                        "Caution in oversold territory, await confirmation",
-                        "Silence before clarity, patience before action"
-                    ]
-            elif rsi < 50:
-                if "Bullish" in sentiment:
-                    tones = [
-                        "Strategic clarity with cinematic rhythm, momentum gathering",
-                        "Balanced discipline meets bullish conviction",
-                        "Patient alignment with analyst optimism, confluence building",
-                        "Consolidation before expansion, spring coiling"
-                    ]
-                else:
-                    tones = [
-                        "Neutral consolidation, strategic patience required",
-                        "Balanced discipline with focused observation",
-                        "Patient alignment awaiting clearer catalyst",
-                        "Measured caution in transitional phase"
-                    ]
-            elif rsi < 70:
-                if "Bullish" in sentiment:
-                    tones = [
-                        "Clear signal alignment with precision, trend confirmed",
-                        "Strategic clarity meets confident execution, ride the wave",
-                        "Vision crystallizing into powerful momentum",
-                        "Bullish confluence with technical strength, trust the trend"
-                    ]
-                else:
-                    tones = [
-                        "Momentum strong but mixed signals, trailing stops advised",
-                        "Technical strength with fundamental caution",
-                        "Rising price meets analyst skepticism, stay nimble",
-                        "Clear trend but approach targets, consider scaling"
-                    ]
-            else:  # RSI >= 70
-                if "Bearish" in sentiment or "Conflicting" in sentiment:
-                    tones = [
-                        "Overbought euphoria meets reality check, caution warranted",
-                        "Extended rally with warning signs, profit-taking zone",
-                        "Fire peaks but oxygen thins, strategic exit considered",
-                        "Powerful surge approaching exhaustion, lock in gains"
-                    ]
-                else:
-                    tones = [
-                        "Momentum surge with disciplined conviction, strength on strength",
-                        "Fire meets focus in perfect timing, let winners run",
-                        "Powerful surge with analyst support, managed aggression",
-                        "Overbought but supported, tight stops on continued strength"
-                    ]
+            sentiment = outlook_data['overall_sentiment']
+            if band == 3:
+                signal = "Bearish" in sentiment or "Conflicting" in sentiment
+            else:
+                signal = "Bullish" in sentiment
+            tones = CaptionComposer.FORECAST_TONES[band][signal]
         else:
             # Fallback to simpler tones if no data available
-            if rsi < 30:
-                tones = [
-                    "Reflective stillness with patient observation",
-                    "Deep introspection meets strategic pause",
-                    "Silence before clarity, patience before action"
-                ]
-            elif rsi < 50:
-                tones = [
-                    "Strategic clarity with cinematic rhythm",
-                    "Balanced discipline with focused intention",
-                    "Patient alignment awaiting confluence"
-                ]
-            elif rsi < 70:
-                tones = [
-                    "Clear signal alignment with precision",
-                    "Strategic clarity meets confident execution",
-                    "Vision crystallizing into momentum"
-                ]
-            else:
-                tones = [
-                    "Momentum surge with disciplined conviction",
-                    "Fire meets focus in perfect timing",
-                    "Powerful surge with strategic clarity"
-                ]
+            tones = CaptionComposer.FALLBACK_TONES[band]
         
-        return random.choice(tones)
+        # The RSI bands are the motif bands, so this keys on (ticker, day, motif)
+        return CaptionComposer.pick(tones, rng, ticker.upper(), band, "tone")
     
     @staticmethod
     def determine_motif(rsi: float) -> Tuple[str, str, str]:
@@ -536,6 +1174,19 @@ class CaptionComposer:
         motif_data = CaptionComposer.MOTIFS[motif]
         return motif, motif_data["emoji"], motif_data["archetype"]
     
+    @staticmethod
+    def caption_index(rebuild: bool = False) -> CaptionIndex:
+        """
+        Return the compiled caption index, building it on first use.
+        
+        Args:
+            rebuild: Recompile after editing TONE_RESONANCE or CAPTION_TEMPLATES at runtime
+        """
+        if CaptionComposer._caption_index is None or rebuild:
+            CaptionComposer._caption_index = CaptionIndex(CaptionComposer.TONE_RESONANCE,
+                                                          CaptionComposer.CAPTION_TEMPLATES)
+        return CaptionComposer._caption_index
+    
     @staticmethod
     def calculate_tone_resonance(forecast_tone: str, motif: str) -> float:
         """
@@ -548,23 +1199,13 @@ class CaptionComposer:
         Returns:
             Resonance score (0.0 to 1.0)
         """
-        tone_lower = forecast_tone.lower()
-        motif_lower = motif.lower()
-        
-        # Base resonance if motif appears in tone
-        resonance = 0.5
-        
-        # Check for tone keywords that align with motif
-        for tone_key, keywords in CaptionComposer.TONE_RESONANCE.items():
-            if tone_key in tone_lower or tone_key in motif_lower:
-                for keyword in keywords:
-                    if keyword in tone_lower:
-                        resonance += 0.1
-        
-        return min(resonance, 1.0)
+        # Base 0.5, plus 0.1 for each keyword of every TONE_RESONANCE key named
+        # in the tone or the motif that also appears in the tone
+        return CaptionComposer.caption_index().resonance(forecast_tone, motif)
     
     @staticmethod
-    def select_caption(motif: str, forecast_tone: str, ticker: str = None) -> str:
+    def select_caption(motif: str, forecast_tone: str, ticker: str = None, resonance: float = None,
+                       rng: random.Random = None) -> str:
         """
         Select the most resonant caption echo for the given motif and tone.
         
@@ -572,6 +1213,8 @@ class CaptionComposer:
             motif: The archetypal motif
             forecast_tone: The forecast tone descriptor
             ticker: Optional ticker symbol for context
+            resonance: Optional precomputed calculate_tone_resonance(forecast_tone, motif)
+            rng: Optional seeded random.Random to draw from (see pick)
             
         Returns:
             Poetic caption echo string
@@ -582,24 +1225,47 @@ class CaptionComposer:
             return "I moved with intention, guided by the market's song."
         
         # Calculate resonance for enhanced selection
-        resonance = CaptionComposer.calculate_tone_resonance(forecast_tone, motif)
+        if resonance is None:
+            resonance = CaptionComposer.calculate_tone_resonance(forecast_tone, motif)
         
         # For high resonance, prefer captions that echo the tone
         if resonance > 0.7:
             # Filter for captions that contain tone keywords
-            tone_lower = forecast_tone.lower()
-            resonant_captions = [
-                caption for caption in templates
-                if any(keyword in caption.lower() for tone_keywords in CaptionComposer.TONE_RESONANCE.values() for keyword in tone_keywords if keyword in tone_lower)
-            ]
+            resonant_captions = CaptionComposer.caption_index().resonant_captions(motif, forecast_tone)
             if resonant_captions:
-                return random.choice(resonant_captions)
+                return CaptionComposer.pick(resonant_captions, rng, (ticker or "").upper(), motif, "caption")
         
         # Default: select from all motif templates
-        return random.choice(templates)
+        return CaptionComposer.pick(templates, rng, (ticker or "").upper(), motif, "caption")
     
     @staticmethod
-    def compose(ticker: str, rsi: float, forecast_tone: str) -> Dict[str, str]:
+    def pick(options: List[str], rng: random.Random = None, *key) -> str:
+        """
+        Choose one of several phrasings.
+        
+        Draws from rng when one is given (seeded per request). Otherwise, in
+        "deterministic" SELECTION_MODE, hashes key with today's date so the
+        same inputs give the same text all day (and across processes); in
+        "random" mode it uses the global random module.
+        
+        Args:
+            options: Non-empty list of candidate strings
+            rng: Optional random.Random
+            *key: Values identifying the choice, e.g. (ticker, motif, "caption")
+            
+        Returns:
+            One of options
+        """
+        if rng is not None:
+            return rng.choice(options)
+        if CaptionComposer.SELECTION_MODE == "deterministic":
+            material = "|".join([datetime.now().strftime("%Y-%m-%d"), *(str(part) for part in key)])
+            digest = hashlib.blake2b(material.encode("utf-8"), digest_size=8).digest()
+            return options[int.from_bytes(digest, "big") % len(options)]
+        return random.choice(options)
+    
+    @staticmethod
+    def compose(ticker: str, rsi: float, forecast_tone: str, rng: random.Random = None) -> Dict[str, str]:
         """
         Generate a poetic caption echo based on ticker, RSI, and forecast tone.
         
@@ -610,6 +1276,7 @@ class CaptionComposer:
             ticker: Stock ticker symbol (e.g., "IBIT", "AMZN")
             rsi: Relative Strength Index value (0-100)
             forecast_tone: Forecast tone descriptor (e.g., "Strategic clarity with cinematic rhythm")
+            rng: Optional seeded random.Random for the caption draw (see pick)
             
         Returns:
             Dictionary containing:
@@ -629,12 +1296,12 @@ class CaptionComposer:
         # Determine the archetypal motif
         motif, emoji, archetype = CaptionComposer.determine_motif(rsi)
         
-        # Select the most resonant caption
-        caption_echo = CaptionComposer.select_caption(motif, forecast_tone, ticker)
-        
-        # Calculate resonance for metadata
+        # Calculate resonance once for selection and metadata
         resonance = CaptionComposer.calculate_tone_resonance(forecast_tone, motif)
         
+        # Select the most resonant caption
+        caption_echo = CaptionComposer.select_caption(motif, forecast_tone, ticker, resonance, rng)
+        
         return {
             "motif": motif,
             "emoji": emoji,
@@ -646,6 +1313,175 @@ class CaptionComposer:
         }
 
 
+class CaptionPipeline:
+    """
+    Single pass from ticker to trading intelligence.
+    
+    Runs fetch -> indicators -> outlook -> tone -> motif -> caption once per
+    ticker, handing each stage the results of the earlier ones (the forecast
+    tone reuses the outlook, the caption reuses the motif and resonance), and
+    records how long every stage took.
+    """
+    
+    STAGES = ("fetch", "indicators", "outlook", "tone", "motif", "caption")
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {stage: 0.0 for stage in self.STAGES}
+        self._counts = {stage: 0 for stage in self.STAGES}
+        self.runs = 0
+    
+    def run(self, ticker: str, stock_data: Dict = None, seed=None) -> Dict:
+        """
+        Run every stage for one ticker.
+        
+        Args:
+            ticker: Stock ticker symbol
+            stock_data: Optional data from fetch_stock_data or fetch_stock_data_batch
+                (skips the fetch and indicators stages)
+            seed: Optional int or string; the tone and caption are then drawn
+                from random.Random(str(seed)), so the same seed gives the same text
+            
+        Returns:
+            Dictionary with ticker, stock_data, outlook, forecast_tone, motif,
+            emoji, archetype, resonance, caption_echo and timings (seconds per stage)
+        """
+        timings = {}
+        rng = random.Random(str(seed)) if seed is not None else None
+        
+        if stock_data is None:
+            started = time.perf_counter()
+            stock_data = CaptionComposer.fetch_stock_data(ticker, timings)
+            timings["fetch"] = time.perf_counter() - started - timings.get("indicators", 0.0)
+            if stock_data is None:
+                raise ValueError(f"Could not fetch data for ticker: {ticker}")
+        
+        rsi = stock_data["rsi"]
+        
+        started = time.perf_counter()
+        outlook = CaptionComposer.analyze_market_outlook(stock_data, rsi)
+        timings["outlook"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        forecast_tone = CaptionComposer.generate_forecast_tone(rsi, ticker, stock_data, outlook, rng)
+        timings["tone"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        motif, emoji, archetype = CaptionComposer.determine_motif(rsi)
+        timings["motif"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        resonance = CaptionComposer.calculate_tone_resonance(forecast_tone, motif)
+        caption_echo = CaptionComposer.select_caption(motif, forecast_tone, ticker, resonance, rng)
+        timings["caption"] = time.perf_counter() - started
+        
+        timings = {stage: timings[stage] for stage in self.STAGES if stage in timings}
+        self._record(timings)
+        
+        return {
+            "ticker": ticker.upper(),
+            "stock_data": stock_data,
+            "outlook": outlook,
+            "forecast_tone": forecast_tone,
+            "motif": motif,
+            "emoji": emoji,
+            "archetype": archetype,
+            "resonance": round(resonance, 2),
+            "caption_echo": caption_echo,
+            "timings": timings
+        }
+    
+    def intelligence(self, ticker: str, stock_data: Dict = None, seed=None) -> Dict[str, str]:
+        """
+        Build the comprehensive trading intelligence result served by the API.
+        
+        Args:
+            ticker: Stock ticker symbol
+            stock_data: Optional pre-fetched stock data (see run)
+            seed: Optional selection seed (see run)
+            
+        Returns:
+            Dictionary with complete caption echo data and market intelligence
+        """
+        stages = self.run(ticker, stock_data, seed)
+        stock_data = stages["stock_data"]
+        outlook_data = stages["outlook"]
+        
+        return {
+            # Caption data
+            "motif": stages["motif"],
+            "emoji": stages["emoji"],
+            "archetype": stages["archetype"],
+            "caption_echo": stages["caption_echo"],
+            "ticker": stages["ticker"],
+            "rsi": round(stock_data["rsi"], 2),
+            "resonance": stages["resonance"],
+            
+            # Market data
+            "price": stock_data.get("price"),
+            "data_source": stock_data.get("data_source", "unknown"),
+            
+            # Analyst consensus
+            "consensus_rating": stock_data.get("consensus_rating", "N/A"),
+            "target_price": stock_data.get("target_price"),
+            "num_analysts": stock_data.get("num_analysts", 0),
+            
+            # Earnings calendar
+            "earnings_date": stock_data.get("earnings_date"),
+            "days_to_earnings": stock_data.get("days_to_earnings"),
+            
+            # Strategic levels
+            "entry_point": stock_data.get("entry_point"),
+            "exit_point": stock_data.get("exit_point"),
+            "stop_loss": stock_data.get("stop_loss"),
+            "upside_potential": stock_data.get("upside_potential"),
+            
+            # Market outlook
+            "sentiment": outlook_data.get("overall_sentiment"),
+            "trend": outlook_data.get("trend"),
+            "trend_emoji": outlook_data.get("trend_emoji"),
+            "analyst_view": outlook_data.get("analyst_view"),
+            "rsi_signal": outlook_data.get("rsi_signal"),
+            "recommended_action": outlook_data.get("action"),
+            "outlook_description": outlook_data.get("outlook"),
+            "forecast_tone": stages["forecast_tone"],
+            "earnings_warning": outlook_data.get("earnings_warning"),
+        }
+    
+    def _record(self, timings: Dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            metrics.STAGE_SECONDS.observe(seconds, stage=stage)
+        with self._lock:
+            self.runs += 1
+            for stage, seconds in timings.items():
+                self._totals[stage] += seconds
+                self._counts[stage] += 1
+    
+    def stats(self) -> Dict:
+        """
+        Per-stage timing breakdown across all runs.
+        
+        Returns:
+            Dictionary with runs and, per stage, count, total_ms and mean_ms
+        """
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "stages": {
+                    stage: {
+                        "count": self._counts[stage],
+                        "total_ms": round(self._totals[stage] * 1000, 3),
+                        "mean_ms": round(self._totals[stage] * 1000 / self._counts[stage], 3) if self._counts[stage] else 0.0
+                    }
+                    for stage in self.STAGES
+                }
+            }
+
+
+# Shared pipeline behind generate_from_ticker and the web API
+pipeline = CaptionPipeline()
+
+
 def generate_caption_echo(ticker: str, rsi: float = None, forecast_tone: str = None, stock_data: Dict = None) -> Dict[str, str]:
     """
     Convenience function for generating caption echoes.
@@ -672,7 +1508,7 @@ def generate_caption_echo(ticker: str, rsi: float = None, forecast_tone: str = N
     if rsi is None:
         if stock_data:
             rsi = stock_data["rsi"]
-            print(f"📊 Fetched RSI: {rsi} for {ticker}")
+            log.debug("Fetched RSI", extra={"ticker": ticker.upper(), "rsi": rsi})
         else:
             raise ValueError("RSI not provided and could not be fetched")
     
@@ -683,73 +1519,167 @@ def generate_caption_echo(ticker: str, rsi: float = None, forecast_tone: str = N
     return CaptionComposer.compose(ticker, rsi, forecast_tone)
 
 
-def generate_from_ticker(ticker: str) -> Dict[str, str]:
+# Coalesces simultaneous generate_from_ticker calls for the same ticker
+caption_flight = concurrency.SingleFlight()
+
+
+def coalescing_stats() -> Dict[str, Dict]:
+    """
+    Report how many upstream computations request coalescing has saved.
+    
+    Returns:
+        Dictionary with SingleFlight stats for the caption and fetch layers
+    """
+    return {
+        "caption": caption_flight.stats(),
+        "fetch": CaptionComposer.fetch_flight.stats()
+    }
+
+
+def warm_up(modules: Tuple[str, ...] = WARMUP_MODULES, background: bool = True) -> Optional[threading.Thread]:
+    """
+    Import the heavy data-path modules and resolve the market data provider
+    ahead of the first request.
+    
+    Args:
+        modules: Module names to import; ones that are not installed are skipped
+        background: Run on a daemon thread and return it instead of blocking
+        
+    Returns:
+        The started thread when background is True, else None
+    """
+    def load():
+        started = time.perf_counter()
+        loaded = []
+        for name in modules:
+            try:
+                importlib.import_module(name)
+                loaded.append(name)
+            except ImportError:
+                continue
+        try:
+            CaptionComposer.get_provider()
+        except Exception as e:
+            log.warning("Could not resolve market data provider during warm-up", extra={"error": str(e)})
+        log.info("Warm-up complete", extra={"modules": ",".join(loaded),
+                                            "ms": round((time.perf_counter() - started) * 1000, 1)})
+    
+    if not background:
+        load()
+        return None
+    thread = threading.Thread(target=load, name="caption-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def caption_validator(ticker: str, seed=None) -> Optional[Tuple[str, int]]:
+    """
+    HTTP cache validator for the result generate_from_ticker would return
+    right now, computed from the cache alone (no pipeline run).
+    
+    The ETag hashes the inputs of the result: the last history bar, the
+    analyst fields and earnings date in use, the provider, today's date
+    (days_to_earnings counts from it) and how the text is selected. It is
+    weak in "random" SELECTION_MODE without a seed, where equivalent
+    responses may word the tone and caption differently.
+    
+    Args:
+        ticker: Stock ticker symbol
+        seed: Optional selection seed (see generate_from_ticker)
+        
+    Returns:
+        Tuple of (ETag header value, seconds the cached inputs stay fresh),
+        or None when no price history is cached (cold or simulated data)
+    """
+    cache = CaptionComposer.cache
+    hist, fresh_for = cache.peek(ticker, "history")
+    if hist is None or hist.empty:
+        return None
+    info, info_fresh_for = cache.peek(ticker, "info")
+    calendar, calendar_fresh_for = cache.peek(ticker, "calendar")
+    
+    parts = [ticker.upper(), CaptionComposer.get_provider().name, datetime.now().strftime("%Y-%m-%d"),
+             hist.index[-1].isoformat()]
+    parts += [hist[column].iat[-1] for column in ("Open", "High", "Low", "Close", "Volume") if column in hist]
+    if info is not None:
+        parts += [info.get(key) for key in ("recommendationKey", "targetMeanPrice", "numberOfAnalystOpinions")]
+        fresh_for = min(fresh_for, info_fresh_for)
+    if calendar is not None:
+        parts.append(calendar.get("Earnings Date"))
+        fresh_for = min(fresh_for, calendar_fresh_for)
+    parts.append(f"seed:{seed}" if seed is not None else CaptionComposer.SELECTION_MODE)
+    
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=16).hexdigest()
+    weak = seed is None and CaptionComposer.SELECTION_MODE != "deterministic"
+    return f'{"W/" if weak else ""}"{digest}"', int(fresh_for)
+
+
+def generate_from_ticker(ticker: str, seed=None) -> Dict[str, str]:
     """
     Generate a complete caption echo from just a ticker symbol.
     Automatically fetches RSI and generates forecast tone.
     Returns comprehensive trading intelligence data.
     
+    Concurrent calls for the same ticker (and seed) wait on one in-flight
+    computation and share its result (see caption_flight).
+    
     Args:
         ticker: Stock ticker symbol
+        seed: Optional selection seed; the same seed gives the same tone and caption
         
     Returns:
         Dictionary with complete caption echo data and market intelligence
     """
-    # Fetch comprehensive stock data
-    stock_data = CaptionComposer.fetch_stock_data(ticker)
-    
-    if stock_data is None:
-        raise ValueError(f"Could not fetch data for ticker: {ticker}")
-    
-    # Extract key data
-    rsi = stock_data["rsi"]
-    
-    # Generate forecast tone with enhanced outlook
-    forecast_tone = CaptionComposer.generate_forecast_tone(rsi, ticker, stock_data)
-    
-    # Generate market outlook analysis
-    outlook_data = CaptionComposer.analyze_market_outlook(stock_data, rsi)
-    
-    # Generate the caption echo
-    caption_result = CaptionComposer.compose(ticker, rsi, forecast_tone)
-    
-    # Combine all data into comprehensive result
-    result = {
-        # Caption data
-        **caption_result,
-        
-        # Market data
-        "price": stock_data.get("price"),
-        "data_source": stock_data.get("data_source", "unknown"),
-        
-        # Analyst consensus
-        "consensus_rating": stock_data.get("consensus_rating", "N/A"),
-        "target_price": stock_data.get("target_price"),
-        "num_analysts": stock_data.get("num_analysts", 0),
-        
-        # Earnings calendar
-        "earnings_date": stock_data.get("earnings_date"),
-        "days_to_earnings": stock_data.get("days_to_earnings"),
-        
-        # Strategic levels
-        "entry_point": stock_data.get("entry_point"),
-        "exit_point": stock_data.get("exit_point"),
-        "stop_loss": stock_data.get("stop_loss"),
-        "upside_potential": stock_data.get("upside_potential"),
-        
-        # Market outlook
-        "sentiment": outlook_data.get("overall_sentiment"),
-        "trend": outlook_data.get("trend"),
-        "trend_emoji": outlook_data.get("trend_emoji"),
-        "analyst_view": outlook_data.get("analyst_view"),
-        "rsi_signal": outlook_data.get("rsi_signal"),
-        "recommended_action": outlook_data.get("action"),
-        "outlook_description": outlook_data.get("outlook"),
-        "forecast_tone": forecast_tone,
-        "earnings_warning": outlook_data.get("earnings_warning"),
-    }
+    key = ticker.upper() if seed is None else (ticker.upper(), str(seed))
+    return dict(caption_flight.do(key, lambda: _generate_from_ticker(ticker, seed)))
+
+
+def _generate_from_ticker(ticker: str, seed=None) -> Dict[str, str]:
+    """Uncoalesced body of generate_from_ticker."""
+    return pipeline.intelligence(ticker, seed=seed)
+
+
+def generate_from_tickers(tickers: List[str]) -> Dict[str, Dict]:
+    """
+    Generate complete caption echoes for many tickers at once.
+    Histories are pulled in one bulk request (see fetch_stock_data_batch).
+    
+    Args:
+        tickers: Stock ticker symbols
+        
+    Returns:
+        Dictionary mapping each upper-cased ticker to its complete caption echo data
+    """
+    batch = CaptionComposer.fetch_stock_data_batch(tickers)
+    return {symbol: _compose_intelligence(symbol, stock_data) for symbol, stock_data in batch.items()}
+
+
+def iter_from_tickers(tickers: List[str]):
+    """
+    Streaming form of generate_from_tickers.
+    
+    Args:
+        tickers: Stock ticker symbols
+        
+    Yields:
+        Complete caption echo data for each ticker, in completion order
+    """
+    for symbol, stock_data in CaptionComposer.iter_stock_data_batch(tickers):
+        yield _compose_intelligence(symbol, stock_data)
+
+
+def _compose_intelligence(ticker: str, stock_data: Dict) -> Dict[str, str]:
+    """
+    Build the comprehensive trading intelligence result from fetched stock data.
     
-    return result
+    Args:
+        ticker: Stock ticker symbol
+        stock_data: Dictionary returned by fetch_stock_data
+        
+    Returns:
+        Dictionary with complete caption echo data and market intelligence
+    """
+    return pipeline.intelligence(ticker, stock_data)
 
 
 def interactive_mode():
@@ -764,6 +1694,9 @@ def interactive_mode():
     print("Welcome, Trader. Let us weave your market moment into myth.")
     print()
     
+    # Load pandas and friends while the trader types
+    warm_up()
+    
     try:
         # Get ticker symbol
         ticker = input("🎯 Enter ticker symbol (e.g., IBIT, AMZN, TSLA): ").strip().upper()
@@ -778,12 +1711,9 @@ def interactive_mode():
         print("─" * 80)
         print()
         
-        # Fetch stock data
-        stock_data = CaptionComposer.fetch_stock_data(ticker)
-        
-        if stock_data is None:
-            print(f"⚠️  Could not fetch data for {ticker}. Please check the ticker symbol.")
-            return
+        # Fetch, analyze and compose in one pass
+        result = pipeline.run(ticker)
+        stock_data = result["stock_data"]
         
         # Extract data
         rsi = stock_data["rsi"]
@@ -798,15 +1728,8 @@ def interactive_mode():
         stop_loss = stock_data.get("stop_loss")
         upside = stock_data.get("upside_potential", 0)
         data_source = stock_data.get("data_source", "unknown")
-        
-        # Generate forecast tone with enhanced outlook
-        forecast_tone = CaptionComposer.generate_forecast_tone(rsi, ticker, stock_data)
-        
-        # Generate market outlook analysis
-        outlook_data = CaptionComposer.analyze_market_outlook(stock_data, rsi)
-        
-        # Generate the caption echo
-        result = generate_caption_echo(ticker, rsi, forecast_tone)
+        forecast_tone = result["forecast_tone"]
+        outlook_data = result["outlook"]
         
         # Display comprehensive trading intelligence
         print("╔" + "═" * 78 + "╗")
@@ -990,27 +1913,23 @@ def demo_mode():
     # Example tickers
     tickers = ["AAPL", "NVDA"]
     
+    # Fetch comprehensive data for every ticker in one bulk request
+    batch = CaptionComposer.fetch_stock_data_batch(tickers)
+    
     for ticker in tickers:
         try:
             print(f"🔮 Generating trading intelligence for {ticker}...")
             print()
             
-            # Fetch comprehensive data
-            stock_data = CaptionComposer.fetch_stock_data(ticker)
+            stock_data = batch.get(ticker)
             if not stock_data:
                 print(f"⚠️  Could not fetch data for {ticker}")
                 print()
                 continue
             
-            # Generate caption
-            result = generate_caption_echo(
-                ticker, 
-                stock_data["rsi"],
-                CaptionComposer.generate_forecast_tone(stock_data["rsi"], ticker, stock_data)
-            )
-            
-            # Generate outlook
-            outlook_data = CaptionComposer.analyze_market_outlook(stock_data, stock_data["rsi"])
+            # Generate outlook, tone and caption in one pass
+            result = pipeline.run(ticker, stock_data)
+            outlook_data = result["outlook"]
             
             # Display compact intelligence
             print(f"{'─' * 80}")
@@ -0,0 +1,156 @@
+"""
+Concurrency Helpers - Shared I/O thread pool for Caption Composer
+
+Upstream market data calls are network-bound, so they are issued on one
+bounded, process-wide thread pool instead of ad-hoc threads per request,
+and simultaneous identical requests are coalesced with SingleFlight.
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import os
+import threading
+
+
+# Upper bound on concurrent upstream calls across all requests
+IO_POOL_SIZE = int(os.environ.get("CAPTION_IO_WORKERS", "32"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def io_pool() -> ThreadPoolExecutor:
+    """Return the shared I/O thread pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=IO_POOL_SIZE, thread_name_prefix="caption-io")
+    return _pool
+
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """Schedule fn(*args, **kwargs) on the shared I/O pool."""
+    return io_pool().submit(fn, *args, **kwargs)
+
+
+def result_or_default(future: Future, timeout: float, default: Any = None) -> Any:
+    """
+    Wait for a future, degrading to a default on timeout or error.
+
+    A timed-out call keeps running in the pool; only this caller stops waiting.
+
+    Args:
+        future: Future returned by submit
+        timeout: Seconds to wait
+        default: Value returned if the call is slow or fails
+
+    Returns:
+        The call's result, or default
+    """
+    try:
+        return future.result(timeout=timeout)
+    except Exception:
+        return default
+
+
+def results_or_default(futures: Iterable[Future], timeout: float, default: Any = None) -> List[Any]:
+    """
+    Wait for many futures under one shared deadline.
+
+    Args:
+        futures: Futures returned by submit
+        timeout: Seconds to wait for the whole group
+        default: Value used for calls that are still running or failed
+
+    Returns:
+        Results in the same order as futures
+    """
+    futures = list(futures)
+    wait(futures, timeout=timeout)
+    return [result_or_default(future, 0, default) if future.done() else default for future in futures]
+
+
+class _Call:
+    """One in-flight computation shared by every caller with the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.executions = 0
+        self.saved = 0
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once per concurrent burst of callers sharing key.
+
+        Args:
+            key: Coalescing key (e.g. the upper-cased ticker)
+            fn: Zero-argument callable performing the upstream work
+
+        Returns:
+            fn's result, shared with every concurrent caller
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.saved += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed."""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict:
+        """
+        Snapshot of coalescing effectiveness.
+
+        Returns:
+            Dictionary with calls, executions, saved (upstream calls avoided) and in_flight
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "saved": self.saved,
+                "in_flight": len(self._calls)
+            }
@@ -4,7 +4,7 @@ Example usage of Caption Composer with comprehensive trading intelligence.
 This demonstrates how to integrate Caption Composer into your own trading tools.
 """
 
-from caption_composer import generate_from_ticker, CaptionComposer
+from caption_composer import CaptionComposer, pipeline
 
 def analyze_portfolio(tickers):
     """Analyze a portfolio of stocks and generate trading intelligence."""
@@ -13,24 +13,24 @@ def analyze_portfolio(tickers):
     print("=" * 80)
     print()
     
+    # Fetch comprehensive data for the whole portfolio in one bulk request
+    batch = CaptionComposer.fetch_stock_data_batch(tickers)
+    
     for ticker in tickers:
         print(f"\n{'─' * 80}")
         print(f"Analyzing {ticker}...")
         print('─' * 80)
         
         try:
-            # Fetch comprehensive data
-            stock_data = CaptionComposer.fetch_stock_data(ticker)
+            stock_data = batch.get(ticker.upper())
             
             if not stock_data:
                 print(f"❌ Could not fetch data for {ticker}")
                 continue
             
-            # Generate poetic caption
-            result = generate_from_ticker(ticker)
-            
-            # Get market outlook
-            outlook = CaptionComposer.analyze_market_outlook(stock_data, stock_data['rsi'])
+            # Generate market outlook and poetic caption in one pass
+            result = pipeline.run(ticker, stock_data)
+            outlook = result['outlook']
             
             # Display summary
             print(f"\n🎯 {result['ticker']} - ${stock_data['price']}")
@@ -103,14 +103,17 @@ def find_best_opportunity(tickers):
     best_score = 0
     opportunities = []
     
+    batch = CaptionComposer.fetch_stock_data_batch(tickers)
+    
     for ticker in tickers:
         try:
-            stock_data = CaptionComposer.fetch_stock_data(ticker)
+            stock_data = batch.get(ticker.upper())
             if not stock_data or not stock_data['entry_point']:
                 continue
             
-            # Get market outlook
-            outlook = CaptionComposer.analyze_market_outlook(stock_data, stock_data['rsi'])
+            # Get market outlook (with tone and caption for the report)
+            result = pipeline.run(ticker, stock_data)
+            outlook = result['outlook']
             
             # Score based on multiple factors
             rsi = stock_data['rsi']
@@ -129,7 +132,8 @@ def find_best_opportunity(tickers):
                 'upside': upside,
                 'rsi': rsi,
                 'data': stock_data,
-                'outlook': outlook
+                'outlook': outlook,
+                'result': result
             })
             
         except:
@@ -140,7 +144,7 @@ def find_best_opportunity(tickers):
     
     if opportunities:
         best = opportunities[0]
-        result = generate_from_ticker(best['ticker'])
+        result = best['result']
         
         print(f"🏆 Best Opportunity: {best['ticker']}")
         print(f"{result['emoji']} {result['motif']}: \"{result['caption_echo']}\"")
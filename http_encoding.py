@@ -0,0 +1,178 @@
+"""
+HTTP Encoding - Response compression and compact serialization for Caption Composer
+
+Negotiates Content-Encoding from Accept-Encoding (brotli when the optional
+``brotli`` package is installed, else gzip), both for whole bodies and for
+streamed NDJSON/SSE responses, which are compressed chunk by chunk with a
+sync flush so every event still reaches the client as soon as it is sent.
+
+Machine clients can ask for MessagePack (``Accept: application/msgpack``,
+needs the optional ``msgpack`` package) instead of JSON; batch responses
+are then a stream of concatenated MessagePack objects.
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Tuple
+import json
+import os
+import zlib
+
+
+# Bodies smaller than this are sent uncompressed (headers would eat the savings)
+MIN_COMPRESS_BYTES = int(os.environ.get("CAPTION_COMPRESS_MIN_BYTES", "512"))
+
+GZIP_LEVEL = int(os.environ.get("CAPTION_GZIP_LEVEL", "6"))
+
+# 0-11; mid-range qualities compress JSON well at a fraction of the CPU of 11
+BROTLI_QUALITY = int(os.environ.get("CAPTION_BROTLI_QUALITY", "5"))
+
+MSGPACK_TYPE = "application/msgpack"
+
+# Media types clients use for MessagePack
+MSGPACK_TYPES = (MSGPACK_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+
+@lru_cache(maxsize=None)
+def _optional(name: str):
+    """Import an optional package, or None if it is not installed."""
+    try:
+        return __import__(name)
+    except ImportError:
+        return None
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Content codings this server can produce, most preferred first."""
+    return ("br", "gzip") if _optional("brotli") is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a content coding for a response.
+
+    Args:
+        accept_encoding: The request's Accept-Encoding header
+
+    Returns:
+        "br", "gzip", or None for identity
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a whole body with a negotiated coding."""
+    if encoding == "br":
+        return _optional("brotli").compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(body) + compressor.flush()
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_stream(chunks: Iterable, encoding: str) -> Iterator[bytes]:
+    """
+    Compress a streamed body, flushing after every chunk.
+
+    Args:
+        chunks: Iterable of str or bytes chunks (e.g. NDJSON lines, SSE events)
+        encoding: "br" or "gzip"
+
+    Yields:
+        Compressed bytes, one non-empty piece per input chunk, then the trailer
+    """
+    if encoding == "br":
+        compressor = _optional("brotli").Compressor(quality=BROTLI_QUALITY)
+
+        def flushed(data: bytes) -> bytes:
+            return compressor.process(data) + compressor.flush()
+        finish = compressor.finish
+    elif encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def flushed(data: bytes) -> bytes:
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        def finish() -> bytes:
+            return compressor.flush()
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+
+    try:
+        for chunk in chunks:
+            piece = flushed(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            if piece:
+                yield piece
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True if the client asked for MessagePack and the msgpack package is installed."""
+    if not accept or _optional("msgpack") is None:
+        return False
+    media_types = {item.split(";")[0].strip().lower() for item in accept.split(",")}
+    return any(media_type in media_types for media_type in MSGPACK_TYPES)
+
+
+def pack(payload) -> bytes:
+    """Serialize to MessagePack (values msgpack cannot encode become strings, as with json default=str)."""
+    return _optional("msgpack").packb(payload, default=str, use_bin_type=True)
+
+
+def serialize(payload, accept: Optional[str]) -> Tuple[bytes, str]:
+    """
+    Encode a payload in the representation the client asked for.
+
+    Returns:
+        Tuple of (body, Content-Type)
+    """
+    if wants_msgpack(accept):
+        return pack(payload), MSGPACK_TYPE
+    return json.dumps(payload, default=str).encode("utf-8"), "application/json"
+
+
+def encode_body(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a complete body if the client accepts it and it is large enough.
+
+    Returns:
+        Tuple of (body, Content-Encoding or None when sent as is)
+    """
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding is not None:
+        body = compress(body, encoding)
+    return body, encoding
+
+
+def weaken_etag(etag: Optional[str]) -> Optional[str]:
+    """A compressed representation is no longer byte-identical, so its strong ETag becomes weak."""
+    if etag and not etag.startswith("W/"):
+        return "W/" + etag
+    return etag
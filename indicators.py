@@ -0,0 +1,364 @@
+"""
+Indicator Engine - Vectorized RSI, ATR, pivots and trading levels
+
+Computes the same indicators as CaptionComposer.calculate_rsi and
+CaptionComposer.calculate_entry_exit_points for many tickers at once, plus
+an incremental IndicatorState for live per-bar/per-tick updates.
+Inputs are 2-D NumPy arrays shaped (tickers x bars), right-aligned so the
+last column is every ticker's most recent bar; shorter histories are
+left-padded with NaN (see stack_histories).
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from typing import Dict, List, Tuple
+from collections import deque
+import numpy as np
+
+
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+LOOKBACK = 20  # Bars used for recent high/low and ATR (hist.tail(20))
+
+
+def stack_histories(histories: List, bars: int = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Stack per-ticker history DataFrames into right-aligned 2-D arrays.
+
+    Args:
+        histories: pandas DataFrames with High/Low/Close columns
+        bars: Trailing bars to keep (defaults to the minimum the engine needs)
+
+    Returns:
+        Tuple of (closes, highs, lows), each shaped (tickers x bars)
+    """
+    if bars is None:
+        bars = max(LOOKBACK, RSI_PERIOD + 1, ATR_PERIOD + 1)
+
+    closes = np.full((len(histories), bars), np.nan)
+    highs = np.full((len(histories), bars), np.nan)
+    lows = np.full((len(histories), bars), np.nan)
+
+    for row, hist in enumerate(histories):
+        width = min(len(hist), bars)
+        if width == 0:
+            continue
+        # Slicing the column arrays is several times cheaper than hist.tail() per ticker
+        closes[row, -width:] = hist["Close"].to_numpy(dtype=float)[-width:]
+        highs[row, -width:] = hist["High"].to_numpy(dtype=float)[-width:]
+        lows[row, -width:] = hist["Low"].to_numpy(dtype=float)[-width:]
+
+    return closes, highs, lows
+
+
+def entry_exit_levels(price: np.ndarray, recent_high: np.ndarray, recent_low: np.ndarray,
+                      rsi: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Apply the RSI-band entry/exit/stop rules elementwise.
+
+    Mirrors the ladder in CaptionComposer.calculate_entry_exit_points for
+    arrays of any (matching) shape.
+
+    Args:
+        price: Current prices
+        recent_high: Highest high over the lookback window
+        recent_low: Lowest low over the lookback window
+        rsi: Current RSI values
+
+    Returns:
+        Dictionary of unrounded arrays: pivot, resistance1, support1, entry,
+        exit, stop_loss, upside_potential
+    """
+    # Calculate support/resistance pivot points
+    pivot = (recent_high + recent_low + price) / 3
+    resistance1 = (2 * pivot) - recent_low
+    support1 = (2 * pivot) - recent_high
+
+    # RSI bands (NaN RSI falls through to the overbought branch, like the scalar ladder)
+    with np.errstate(invalid="ignore"):
+        bands = [rsi < 30, rsi < 50, rsi < 70]
+
+    entry = np.select(bands, [price * 0.99, price * 0.97, price * 1.01], price * 0.95)
+    exit_point = np.select(bands, [
+        np.maximum(resistance1, price * 1.08),
+        np.maximum(pivot, price * 1.06),
+        np.maximum(resistance1, price * 1.10)
+    ], price * 1.03)
+    stop_loss = np.select(bands, [
+        np.maximum(support1, price * 0.94),
+        np.maximum(support1, price * 0.93),
+        np.maximum(pivot, price * 0.95)
+    ], price * 0.92)
+
+    # Ensure logical ordering: stop < entry < exit
+    with np.errstate(invalid="ignore"):
+        stop_loss = np.where((stop_loss != 0) & (entry != 0) & (stop_loss >= entry), entry * 0.93, stop_loss)
+        exit_point = np.where((exit_point != 0) & (entry != 0) & (exit_point <= entry), entry * 1.05, exit_point)
+
+    # Calculate upside potential
+    with np.errstate(divide="ignore", invalid="ignore"):
+        upside_potential = np.where((entry != 0) & (exit_point != 0),
+                                    ((exit_point - entry) / entry) * 100, 0.0)
+
+    return {
+        "pivot": pivot,
+        "resistance1": resistance1,
+        "support1": support1,
+        "entry": entry,
+        "exit": exit_point,
+        "stop_loss": stop_loss,
+        "upside_potential": upside_potential
+    }
+
+
+def compute_indicators(closes: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                       rsi_period: int = RSI_PERIOD, atr_period: int = ATR_PERIOD,
+                       lookback: int = LOOKBACK) -> Dict[str, np.ndarray]:
+    """
+    Compute RSI, ATR, pivots and trading levels for every ticker in one pass.
+
+    Args:
+        closes: Closing prices, shape (tickers x bars), right-aligned
+        highs: High prices, same shape
+        lows: Low prices, same shape
+        rsi_period: RSI period (default 14)
+        atr_period: ATR period (default 14)
+        lookback: Bars used for recent high/low and ATR (default 20)
+
+    Returns:
+        Dictionary of 1-D arrays (one value per ticker): price, rsi, atr,
+        recent_high, recent_low plus everything from entry_exit_levels
+    """
+    closes = np.atleast_2d(np.asarray(closes, dtype=float))
+    highs = np.atleast_2d(np.asarray(highs, dtype=float))
+    lows = np.atleast_2d(np.asarray(lows, dtype=float))
+    tickers, bars = closes.shape
+
+    price = closes[:, -1]
+    available = np.count_nonzero(~np.isnan(closes), axis=1)
+
+    # RSI: mean gain / mean loss over the last rsi_period deltas
+    rsi = np.full(tickers, np.nan)
+    if bars >= rsi_period:
+        window = closes[:, -(rsi_period + 1):]
+        delta = np.diff(window, axis=1, prepend=np.nan) if window.shape[1] == rsi_period else np.diff(window, axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # A missing previous close counts as no change, as in Series.where
+            gain = np.where(delta > 0, delta, 0.0).mean(axis=1)
+            loss = -np.where(delta < 0, delta, 0.0).mean(axis=1)
+            rs = gain / loss
+            rsi = 100 - (100 / (1 + rs))
+        rsi[available < rsi_period] = np.nan
+
+    # ATR over the lookback tail: mean of the last atr_period true ranges
+    tail_closes = closes[:, -lookback:]
+    tail_highs = highs[:, -lookback:]
+    tail_lows = lows[:, -lookback:]
+    atr = np.full(tickers, np.nan)
+    if tail_closes.shape[1] >= atr_period:
+        prev_close = np.concatenate((np.full((tickers, 1), np.nan), tail_closes[:, :-1]), axis=1)[:, -atr_period:]
+        high = tail_highs[:, -atr_period:]
+        low = tail_lows[:, -atr_period:]
+        # fmax skips NaN like DataFrame.max(axis=1), so the first bar uses high - low alone
+        true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        atr = true_range.mean(axis=1)
+
+    recent_high = np.fmax.reduce(tail_highs, axis=1)
+    recent_low = np.fmin.reduce(tail_lows, axis=1)
+
+    return {
+        "price": price,
+        "rsi": rsi,
+        "atr": atr,
+        "recent_high": recent_high,
+        "recent_low": recent_low,
+        **entry_exit_levels(price, recent_high, recent_low, rsi)
+    }
+
+
+def column_levels(indicators: Dict[str, np.ndarray], column: int) -> Tuple[float, float, Dict]:
+    """
+    Extract one ticker's results in the shape used by fetch_stock_data.
+
+    Args:
+        indicators: Output of compute_indicators
+        column: Ticker row index
+
+    Returns:
+        Tuple of (price, rsi, entry_exit) where entry_exit matches the
+        dictionary returned by CaptionComposer.calculate_entry_exit_points
+    """
+    entry_point = float(indicators["entry"][column])
+    exit_point = float(indicators["exit"][column])
+    stop_loss = float(indicators["stop_loss"][column])
+    upside_potential = float(indicators["upside_potential"][column])
+
+    entry_exit = {
+        "entry": round(entry_point, 2) if entry_point else None,
+        "exit": round(exit_point, 2) if exit_point else None,
+        "stop_loss": round(stop_loss, 2) if stop_loss else None,
+        "upside_potential": round(upside_potential, 2)
+    }
+    return float(indicators["price"][column]), float(indicators["rsi"][column]), entry_exit
+
+
+class IndicatorState:
+    """
+    Streaming RSI and ATR for one ticker.
+
+    Keeps the rolling gain/loss and true-range windows with running sums so
+    each new bar (update) or intrabar tick (update_tick) costs O(1) instead
+    of recomputing the whole history. Values match calculate_rsi and the ATR
+    in calculate_entry_exit_points for the same bars.
+    """
+
+    def __init__(self, rsi_period: int = RSI_PERIOD, atr_period: int = ATR_PERIOD):
+        self.rsi_period = rsi_period
+        self.atr_period = atr_period
+        self.gains = deque(maxlen=rsi_period)
+        self.losses = deque(maxlen=rsi_period)
+        self.ranges = deque(maxlen=atr_period)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.range_sum = 0.0
+        self.prev_close = None  # Close of the bar before the current one
+        self.close = None
+        self.high = None
+        self.low = None
+        self.updates = 0
+
+    @classmethod
+    def from_history(cls, hist, rsi_period: int = RSI_PERIOD, atr_period: int = ATR_PERIOD) -> "IndicatorState":
+        """
+        Seed a state from a history DataFrame (only the trailing window is read).
+
+        Args:
+            hist: pandas DataFrame with High/Low/Close columns
+            rsi_period: RSI period
+            atr_period: ATR period
+
+        Returns:
+            IndicatorState positioned on the last bar of hist
+        """
+        state = cls(rsi_period, atr_period)
+        window = max(rsi_period, atr_period)
+        closes = hist["Close"].to_numpy(dtype=float)
+        highs = hist["High"].to_numpy(dtype=float)
+        lows = hist["Low"].to_numpy(dtype=float)
+
+        start = max(0, len(closes) - window)
+        if start > 0:
+            # The bar before the window only supplies the previous close
+            state.close = float(closes[start - 1])
+        for index in range(start, len(closes)):
+            state.update(closes[index], highs[index], lows[index])
+        return state
+
+    def update(self, close: float, high: float = None, low: float = None) -> None:
+        """
+        Append a new bar.
+
+        Args:
+            close: Closing (or latest) price of the new bar
+            high: Bar high (defaults to close)
+            low: Bar low (defaults to close)
+        """
+        self.prev_close = self.close
+        self.close = float(close)
+        self.high = float(high) if high is not None else self.close
+        self.low = float(low) if low is not None else self.close
+
+        gain, loss, true_range = self._contributions()
+        self.gain_sum += gain - (self.gains[0] if len(self.gains) == self.rsi_period else 0.0)
+        self.loss_sum += loss - (self.losses[0] if len(self.losses) == self.rsi_period else 0.0)
+        self.range_sum += true_range - (self.ranges[0] if len(self.ranges) == self.atr_period else 0.0)
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.ranges.append(true_range)
+
+        self.updates += 1
+        if self.updates % max(self.rsi_period, self.atr_period) == 0:
+            self._resync()
+
+    def update_tick(self, price: float) -> None:
+        """
+        Revise the current bar with a new intrabar price.
+
+        Args:
+            price: Latest traded price
+        """
+        if self.close is None:
+            self.update(price)
+            return
+
+        price = float(price)
+        self.close = price
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+
+        gain, loss, true_range = self._contributions()
+        self.gain_sum += gain - self.gains[-1]
+        self.loss_sum += loss - self.losses[-1]
+        self.range_sum += true_range - self.ranges[-1]
+        self.gains[-1] = gain
+        self.losses[-1] = loss
+        self.ranges[-1] = true_range
+
+    @property
+    def rsi(self) -> float:
+        """Current RSI, or NaN until rsi_period bars have been seen."""
+        if len(self.gains) < self.rsi_period:
+            return float("nan")
+        gain = self.gain_sum / self.rsi_period
+        loss = self.loss_sum / self.rsi_period
+        if loss == 0:
+            return 100.0 if gain > 0 else float("nan")
+        return 100 - (100 / (1 + gain / loss))
+
+    @property
+    def atr(self) -> float:
+        """Current ATR, or NaN until atr_period bars have been seen."""
+        if len(self.ranges) < self.atr_period:
+            return float("nan")
+        return self.range_sum / self.atr_period
+
+    def to_dict(self) -> Dict:
+        """Serialize to a JSON-friendly dictionary (see from_dict)."""
+        return {
+            "rsi_period": self.rsi_period,
+            "atr_period": self.atr_period,
+            "gains": list(self.gains),
+            "losses": list(self.losses),
+            "ranges": list(self.ranges),
+            "prev_close": self.prev_close,
+            "bar": [self.close, self.high, self.low],
+            "updates": self.updates
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "IndicatorState":
+        """Restore a state serialized with to_dict."""
+        state = cls(data["rsi_period"], data["atr_period"])
+        state.gains.extend(data["gains"])
+        state.losses.extend(data["losses"])
+        state.ranges.extend(data["ranges"])
+        state.prev_close = data["prev_close"]
+        state.close, state.high, state.low = data["bar"]
+        state.updates = data["updates"]
+        state._resync()
+        return state
+
+    def _contributions(self) -> Tuple[float, float, float]:
+        """Gain, loss and true range of the current bar."""
+        if self.prev_close is None:
+            # First bar: no change (as Series.where maps the NaN delta to 0) and high - low range
+            return 0.0, 0.0, self.high - self.low
+        delta = self.close - self.prev_close
+        true_range = max(self.high - self.low, abs(self.high - self.prev_close), abs(self.low - self.prev_close))
+        return max(delta, 0.0), max(-delta, 0.0), true_range
+
+    def _resync(self) -> None:
+        """Recompute the running sums exactly to cancel floating-point drift."""
+        self.gain_sum = sum(self.gains)
+        self.loss_sum = sum(self.losses)
+        self.range_sum = sum(self.ranges)
@@ -0,0 +1,301 @@
+"""
+Load Test - Drive /api/caption with skewed traffic and report tail latency
+
+Closed-loop load generator: each of --concurrency workers sends
+GET /api/caption/<ticker> back to back, picking tickers from a Zipf
+distribution over the universe (a few hot tickers take most requests,
+the long tail keeps missing the cache, like real traffic).
+
+By default the Flask app runs in-process behind a stub upstream
+(market_data.LatencyProvider) with injectable latency, jitter and failure
+rate, so nothing touches Yahoo; the market data cache is cleared before
+each concurrency level. --url points the same traffic at a running
+server instead (start it with CAPTION_DATA_PROVIDER=stub:<ms> to keep it
+offline).
+
+Every level reports throughput, p50/p95/p99/max latency, HTTP error rate
+and the share of 200 responses degraded to simulated data (in-process
+runs also count the calls, and injected failures, reaching the stub
+upstream). Sweeping
+several levels (--concurrency 1,4,16,64) shows where throughput stops
+growing and latency collapses.
+
+Usage:
+    python loadtest.py                                        # 16 workers for 10s, 50ms upstream
+    python loadtest.py --concurrency 1,4,16,64 --duration 20
+    python loadtest.py --latency-ms 200 --jitter-ms 100 --error-rate 0.02
+    python loadtest.py --url http://localhost:5000 --requests 5000 --json report.json
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate, count
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlsplit
+import argparse
+import http.client
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+
+from caption_composer import CaptionComposer
+import log_setup
+from market_data import LatencyProvider, SyntheticProvider
+
+
+# Default Zipf exponent: with 500 tickers the top 10 take about 40% of requests
+ZIPF_EXPONENT = 1.1
+
+# Default universe size and upstream latency of the stub provider
+UNIVERSE = 500
+LATENCY_MS = 50.0
+
+# Seconds each request may take before it counts as a failed (timed out) request
+REQUEST_TIMEOUT = 30.0
+
+
+def zipf_sampler(tickers: List[str], exponent: float = ZIPF_EXPONENT, seed: int = 0) -> Callable[[], str]:
+    """
+    Build a ticker picker where the n-th ticker is drawn with weight 1 / n^exponent.
+
+    Args:
+        tickers: Universe, most popular first
+        exponent: Zipf exponent (0 = uniform, larger = more skewed)
+        seed: Seed for reproducible request sequences
+
+    Returns:
+        Function returning one ticker per call (not shared between threads)
+    """
+    cumulative = list(accumulate(1.0 / rank ** exponent for rank in range(1, len(tickers) + 1)))
+    rng = random.Random(seed)
+    return lambda: rng.choices(tickers, cum_weights=cumulative)[0]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+
+class InProcessClient:
+    """Requests through the Flask test client, one client per worker thread."""
+
+    def __init__(self):
+        from app import app
+        self.app = app
+        self._local = threading.local()
+
+    def get(self, path: str) -> Tuple[int, bytes]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.get(path)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    """Requests to a running server over one keep-alive connection per worker thread."""
+
+    def __init__(self, url: str, timeout: float = REQUEST_TIMEOUT):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port
+        self.secure = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            factory = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+            connection = self._local.connection = factory(self.host, self.port, timeout=self.timeout)
+        return connection
+
+    def get(self, path: str) -> Tuple[int, bytes]:
+        connection = self._connection()
+        try:
+            connection.request("GET", self.prefix + path, headers={"Accept": "application/json"})
+            response = connection.getresponse()
+            return response.status, response.read()
+        except Exception:
+            # Reconnect on the next request
+            connection.close()
+            self._local.connection = None
+            raise
+
+
+def _degraded(status: int, body: bytes) -> bool:
+    """True for a 200 caption built from simulated fallback data."""
+    return status == 200 and b'"data_source":"simulated"' in body.replace(b" ", b"")
+
+
+def run_level(client, tickers: List[str], concurrency: int, duration: float = None, requests: int = None,
+              exponent: float = ZIPF_EXPONENT, seed: int = 0) -> Dict:
+    """
+    Run one closed-loop load level and summarize it.
+
+    Args:
+        client: InProcessClient or HttpClient
+        tickers: Universe, most popular first
+        concurrency: Workers sending requests back to back
+        duration: Seconds to run (used when requests is not given)
+        requests: Total requests to send instead of running for a duration
+        exponent: Zipf exponent of the ticker skew
+        seed: Seed of the request sequences (worker n uses seed + n)
+
+    Returns:
+        Summary dictionary (see summarize)
+    """
+    issued = count()
+    deadline = None if requests else time.perf_counter() + (duration or 10.0)
+    results: List[Tuple[float, int, bool]] = []
+
+    def worker(number: int) -> None:
+        pick = zipf_sampler(tickers, exponent, seed + number)
+        samples = []
+        while True:
+            if requests is not None and next(issued) >= requests:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            ticker = pick()
+            started = time.perf_counter()
+            try:
+                status, body = client.get(f"/api/caption/{ticker}")
+                degraded = _degraded(status, body)
+            except Exception:
+                status, degraded = 0, False
+            samples.append((time.perf_counter() - started, status, degraded))
+        results.extend(samples)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="caption-load") as pool:
+        for future in [pool.submit(worker, number) for number in range(concurrency)]:
+            future.result()
+    return summarize(results, time.perf_counter() - started, concurrency)
+
+
+def summarize(results: List[Tuple[float, int, bool]], elapsed: float, concurrency: int) -> Dict:
+    """
+    Summarize request samples.
+
+    Args:
+        results: (latency seconds, HTTP status or 0 for a failed request, degraded) per request
+        elapsed: Wall-clock seconds of the level
+        concurrency: Workers used
+
+    Returns:
+        Throughput, latency percentiles (ms), error and degraded rates, status counts
+    """
+    latencies = sorted(latency * 1000 for latency, _, _ in results)
+    statuses: Dict[str, int] = {}
+    for _, status, _ in results:
+        key = str(status) if status else "failed"
+        statuses[key] = statuses.get(key, 0) + 1
+    total = len(results)
+    errors = sum(1 for _, status, _ in results if not 200 <= status < 400)
+    degraded = sum(1 for _, _, flag in results if flag)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "degraded": degraded,
+        "degraded_rate": round(degraded / total, 4) if total else 0.0,
+        "statuses": statuses
+    }
+
+
+def print_report(levels: List[Dict]) -> None:
+    print(f"{'workers':>8}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'max ms':>9}{'errors':>9}{'degraded':>10}{'upstream':>10}")
+    for level in levels:
+        print(f"{level['concurrency']:>8}{level['requests']:>10}{level['throughput_rps']:>9.1f}"
+              f"{level['p50_ms']:>9.1f}{level['p95_ms']:>9.1f}{level['p99_ms']:>9.1f}{level['max_ms']:>9.1f}"
+              f"{level['error_rate']:>9.1%}{level['degraded_rate']:>10.1%}{level.get('upstream_calls', '-'):>10}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test /api/caption with Zipf-skewed tickers")
+    parser.add_argument("--url", help="running server to test (default: the Flask app in-process)")
+    parser.add_argument("--concurrency", default="16", help="comma-separated worker counts to sweep (default 16)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level (default 10)")
+    parser.add_argument("--requests", type=int, help="requests per level instead of a duration")
+    parser.add_argument("--universe", type=int, default=UNIVERSE, help=f"generated tickers (default {UNIVERSE})")
+    parser.add_argument("--tickers", help="universe file, most popular first (see screener.load_universe)")
+    parser.add_argument("--zipf", type=float, default=ZIPF_EXPONENT,
+                        help=f"Zipf exponent of the ticker skew, 0 = uniform (default {ZIPF_EXPONENT})")
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS,
+                        help=f"stub upstream latency per call (default {LATENCY_MS:g})")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform stub latency, up to this much")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub upstream calls that fail")
+    parser.add_argument("--seed", type=int, default=0, help="seed for tickers, data and stub draws")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's per-request warnings")
+    args = parser.parse_args(argv)
+
+    if args.tickers:
+        from screener import load_universe
+        tickers = load_universe(args.tickers)
+    else:
+        tickers = [f"LT{n:04d}" for n in range(args.universe)]
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+
+    saved_provider = CaptionComposer.provider
+    logger = logging.getLogger(log_setup.ROOT_LOGGER)
+    saved_level = logger.level
+    if args.url:
+        client = HttpClient(args.url)
+        target = args.url
+    else:
+        client = InProcessClient()
+        target = "in-process"
+        if not args.verbose:
+            # Injected failures would log a warning per upstream call
+            logger.setLevel(logging.ERROR)
+        stub = LatencyProvider(SyntheticProvider(seed=args.seed), latency=args.latency_ms / 1000,
+                               jitter=args.jitter_ms / 1000, error_rate=args.error_rate, seed=args.seed)
+        CaptionComposer.set_provider(stub)
+
+    print(f"🚦 Load testing {target}: {len(tickers)} tickers, Zipf {args.zipf:g}", file=sys.stderr)
+    report = []
+    try:
+        for concurrency in levels:
+            if not args.url:
+                CaptionComposer.cache.clear()
+                calls, failures = stub.calls, stub.failures
+            print(f"⏳ {concurrency} worker(s)...", file=sys.stderr, flush=True)
+            level = run_level(client, tickers, concurrency, args.duration, args.requests, args.zipf, args.seed)
+            if not args.url:
+                # Cache misses reaching the stub upstream, and how many of them failed
+                level["upstream_calls"] = stub.calls - calls
+                level["upstream_failures"] = stub.failures - failures
+            report.append(level)
+    finally:
+        if not args.url:
+            CaptionComposer.set_provider(saved_provider)
+            logger.setLevel(saved_level)
+
+    print()
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump({"target": target, "tickers": len(tickers), "zipf": args.zipf, "levels": report}, handle, indent=2)
+        print(f"\n💾 Report written to {args.json}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Log Setup - Structured, non-blocking logging for Caption Composer
+
+Request threads never write to the terminal themselves: records are put on
+a bounded in-memory queue (dropped, and counted, if it is full) and a single
+background listener formats and writes them to stderr. Each line carries the
+timestamp, level, logger, message and any structured fields passed through
+``extra``, either as key=value text or as one JSON object per line.
+
+Repeated messages are rate-limited per message template, so a per-request
+warning (say, an upstream outage hitting every ticker) emits a few lines per
+window plus a count of what was suppressed instead of one line per request.
+
+Environment:
+    CAPTION_LOG_LEVEL   DEBUG, INFO (default), WARNING, ERROR
+    CAPTION_LOG_FORMAT  text (default) or json
+    CAPTION_LOG_BURST   records allowed per message template per window (default 10)
+    CAPTION_LOG_WINDOW  rate-limit window in seconds (default 60)
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, TextIO
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+
+LOG_LEVEL = os.environ.get("CAPTION_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("CAPTION_LOG_FORMAT", "text").lower()
+LOG_BURST = int(os.environ.get("CAPTION_LOG_BURST", "10"))
+LOG_WINDOW = float(os.environ.get("CAPTION_LOG_WINDOW", "60"))
+
+# Records buffered for the listener before new ones are dropped
+QUEUE_SIZE = 10000
+
+# Parent of every module logger (see get_logger)
+ROOT_LOGGER = "caption"
+
+# LogRecord attributes that are not structured fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "suppressed"}
+
+
+def _fields(record: logging.LogRecord) -> Dict:
+    """Structured fields attached to a record through extra=..."""
+    fields = {key: value for key, value in vars(record).items() if key not in _RESERVED}
+    if getattr(record, "suppressed", 0):
+        fields["suppressed"] = record.suppressed
+    return fields
+
+
+def _timestamp(record: logging.LogRecord) -> str:
+    return datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")
+
+
+class TextFormatter(logging.Formatter):
+    """``<time> <LEVEL> <logger> <message> key=value ...`` lines."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [_timestamp(record), record.levelname, record.name, record.getMessage()]
+        for key, value in _fields(record).items():
+            value = str(value)
+            parts.append(f"{key}={json.dumps(value) if (' ' in value or not value) else value}")
+        line = " ".join(parts)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": _timestamp(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_fields(record)
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most burst records per message template per window.
+
+    Records are keyed on the logger and the unformatted message, so the same
+    warning for different tickers shares one budget. The first record after
+    a suppressed stretch carries the number dropped as suppressed=N.
+    """
+
+    def __init__(self, burst: int = LOG_BURST, window: float = LOG_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._lock = threading.Lock()
+        self._windows: Dict = {}
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            started, count, dropped = self._windows.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            if count >= self.burst:
+                self._windows[key] = (started, count, dropped + 1)
+                self.suppressed += 1
+                return False
+            self._windows[key] = (started, count + 1, 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records without waiting; drops them when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener lives in this process, so formatting is left to its thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_lock = threading.Lock()
+_handler: Optional[_NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_rate_limit: Optional[RateLimitFilter] = None
+
+
+def configure(level: str = None, fmt: str = None, stream: TextIO = None,
+              burst: int = None, window: float = None) -> None:
+    """
+    Route Caption Composer logs through a background queue listener.
+
+    Safe to call again (e.g. from tests): the previous listener is flushed
+    and replaced. Arguments left as None fall back to the environment.
+
+    Args:
+        level: Minimum level name, e.g. "DEBUG" or "WARNING"
+        fmt: "text" or "json"
+        stream: Where the listener writes (defaults to stderr)
+        burst: Records allowed per message template per window (0 disables the limit)
+        window: Rate-limit window in seconds
+    """
+    global _handler, _listener, _rate_limit
+
+    formatter = JSONFormatter() if (fmt or LOG_FORMAT) == "json" else TextFormatter()
+    output = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    output.setFormatter(formatter)
+
+    with _lock:
+        logger = logging.getLogger(ROOT_LOGGER)
+        if _listener is not None:
+            _listener.stop()
+            logger.removeHandler(_handler)
+
+        _rate_limit = RateLimitFilter(LOG_BURST if burst is None else burst,
+                                      LOG_WINDOW if window is None else window)
+        _handler = _NonBlockingQueueHandler(queue.Queue(maxsize=QUEUE_SIZE))
+        _handler.addFilter(_rate_limit)
+        _listener = QueueListener(_handler.queue, output)
+        _listener.start()
+
+        logger.addHandler(_handler)
+        logger.setLevel((level or LOG_LEVEL).upper())
+        logger.propagate = False
+
+
+def flush() -> None:
+    """Block until every queued record has been written."""
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a module logger under the "caption" hierarchy, configuring output on first use.
+
+    Args:
+        name: Short component name, e.g. "composer" or "stream"
+    """
+    if _listener is None:
+        with _lock:
+            needs_setup = _listener is None
+        if needs_setup:
+            configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def stats() -> Dict:
+    """
+    Records lost on the way to the log.
+
+    Returns:
+        Dictionary with dropped (queue full) and suppressed (rate-limited) counts
+    """
+    return {
+        "dropped": _handler.dropped if _handler is not None else 0,
+        "suppressed": _rate_limit.suppressed if _rate_limit is not None else 0
+    }
+
+
+def _shutdown() -> None:
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+
+
+atexit.register(_shutdown)
@@ -0,0 +1,198 @@
+"""
+Market Data Cache - In-process TTL + LRU cache for Caption Composer
+
+Keeps recently fetched price history, analyst info and earnings calendars
+per ticker so repeated requests for the same symbols skip the network.
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+
+_MISSING = object()
+
+
+class MarketDataCache:
+    """Bounded per-ticker cache with a separate TTL for each data class."""
+
+    # Seconds each data class stays fresh
+    DEFAULT_TTLS = {
+        "history": 60,           # Intraday price and 3-month history
+        "info": 6 * 60 * 60,     # Analyst consensus and price targets
+        "calendar": 24 * 60 * 60 # Earnings calendar
+    }
+
+    def __init__(self, max_tickers: int = 256, ttls: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Create an empty cache.
+
+        Args:
+            max_tickers: Maximum number of tickers kept before LRU eviction
+            ttls: Optional per-data-class TTL overrides in seconds
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.max_tickers = max_tickers
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self._clock = clock
+        self._entries = OrderedDict()  # ticker -> {data_class: (expires_at, value)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, ticker: str, data_class: str, default: Any = None) -> Any:
+        """
+        Return a fresh cached value, or default on a miss.
+
+        Args:
+            ticker: Stock ticker symbol
+            data_class: One of the keys in ttls (e.g. "history")
+            default: Value returned when nothing fresh is cached
+
+        Returns:
+            Cached value or default
+        """
+        value = self._lookup(ticker.upper(), data_class)
+        return default if value is _MISSING else value
+
+    def contains(self, ticker: str, data_class: str) -> bool:
+        """Return True if a fresh value is cached, without touching counters or LRU order."""
+        with self._lock:
+            entry = self._entries.get(ticker.upper())
+            cached = entry.get(data_class) if entry else None
+            return cached is not None and self._clock() < cached[0]
+
+    def peek(self, ticker: str, data_class: str) -> Tuple[Any, float]:
+        """
+        Return a fresh cached value and its remaining lifetime, without touching counters or LRU order.
+
+        Returns:
+            Tuple of (value, seconds until it expires), or (None, 0.0) if nothing fresh is cached
+        """
+        with self._lock:
+            entry = self._entries.get(ticker.upper())
+            cached = entry.get(data_class) if entry else None
+            if cached is None:
+                return None, 0.0
+            remaining = cached[0] - self._clock()
+            return (cached[1], remaining) if remaining > 0 else (None, 0.0)
+
+    def put(self, ticker: str, data_class: str, value: Any) -> None:
+        """Store a value for a ticker/data class, evicting the least recently used ticker if full."""
+        if data_class not in self.ttls:
+            raise ValueError(f"Unknown data class: {data_class}")
+
+        key = ticker.upper()
+        expires_at = self._clock() + self.ttls[data_class]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {}
+            entry[data_class] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_tickers:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, ticker: str, data_class: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value, calling loader and caching its result on a miss.
+
+        The loader runs outside the cache lock, so a slow upstream call never
+        blocks lookups for other tickers. Exceptions from loader propagate and
+        nothing is cached.
+
+        Args:
+            ticker: Stock ticker symbol
+            data_class: One of the keys in ttls
+            loader: Zero-argument callable fetching the value from upstream
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = self._lookup(ticker.upper(), data_class)
+        if value is not _MISSING:
+            return value
+
+        value = loader()
+        self.put(ticker, data_class, value)
+        return value
+
+    def invalidate(self, ticker: str = None, data_class: str = None) -> int:
+        """
+        Drop cached entries.
+
+        Args:
+            ticker: Ticker to invalidate (all tickers if omitted)
+            data_class: Data class to invalidate (all classes if omitted)
+
+        Returns:
+            Number of cached values removed
+        """
+        removed = 0
+        with self._lock:
+            keys = [ticker.upper()] if ticker else list(self._entries)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if data_class is None:
+                    removed += len(entry)
+                    del self._entries[key]
+                elif data_class in entry:
+                    removed += 1
+                    del entry[data_class]
+                    if not entry:
+                        del self._entries[key]
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        """
+        Snapshot of cache effectiveness.
+
+        Returns:
+            Dictionary with hits, misses, evictions, hit_ratio and size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_tickers": self.max_tickers
+            }
+
+    def _lookup(self, key: str, data_class: str) -> Any:
+        """Return the fresh value for key/data_class or _MISSING, updating counters and LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            cached = entry.get(data_class) if entry else None
+
+            if cached is not None:
+                expires_at, value = cached
+                if self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                # Expired: drop just this data class
+                del entry[data_class]
+                if not entry:
+                    del self._entries[key]
+
+            self.misses += 1
+            return _MISSING
@@ -0,0 +1,467 @@
+"""
+Market Data Providers - Pluggable data backends for Caption Composer
+
+Every provider exposes the same three calls used by fetch_stock_data:
+price history, analyst info and the earnings calendar, plus a latest-price
+quote for live streams. Ships with a live
+yfinance backend, a local CSV/Parquet fixture backend, a deterministic
+synthetic OHLC generator for offline benchmarks and a latency-injecting
+stub upstream for load tests.
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+
+# Calendar offsets understood by the offline providers (yfinance period strings)
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653
+}
+
+
+def _stable_seed(*parts) -> int:
+    """Derive a process-independent integer seed from the given parts."""
+    key = ":".join(str(part) for part in parts)
+    return int(hashlib.md5(key.encode()).hexdigest(), 16)
+
+
+def _slice_period(hist, period: str):
+    """Keep the trailing period of a history frame, anchored on its last bar."""
+    if hist.empty or period == "max" or period not in PERIOD_DAYS:
+        return hist
+    import pandas as pd
+    cutoff = hist.index[-1] - pd.Timedelta(days=PERIOD_DAYS[period])
+    return hist[hist.index > cutoff]
+
+
+class MarketDataProvider:
+    """Base interface for market data backends."""
+
+    name = "base"
+
+    def history(self, ticker: str, period: str = "3mo"):
+        """
+        Fetch daily OHLCV history.
+
+        Args:
+            ticker: Stock ticker symbol
+            period: yfinance-style period string (e.g. "3mo")
+
+        Returns:
+            pandas DataFrame indexed by date with Open/High/Low/Close/Volume columns
+        """
+        raise NotImplementedError
+
+    def history_batch(self, tickers: List[str], period: str = "3mo") -> Dict:
+        """
+        Fetch daily OHLCV history for many tickers.
+
+        Backends with a bulk endpoint override this; the default loops.
+
+        Args:
+            tickers: Stock ticker symbols
+            period: yfinance-style period string
+
+        Returns:
+            Dictionary mapping each ticker to its history DataFrame
+        """
+        return {ticker: self.history(ticker, period=period) for ticker in tickers}
+
+    def history_since(self, ticker: str, start):
+        """
+        Fetch daily OHLCV bars from start (inclusive) to now.
+
+        Used by StoredProvider to fetch only the bars missing from disk.
+        The default fetches the shortest period covering start and trims it.
+
+        Args:
+            ticker: Stock ticker symbol
+            start: pandas Timestamp of the first bar wanted
+
+        Returns:
+            pandas DataFrame in the same shape as history
+        """
+        import pandas as pd
+
+        days = (pd.Timestamp.now(tz=start.tz) - start).days + 1
+        period = next((name for name, span in sorted(PERIOD_DAYS.items(), key=lambda item: item[1])
+                       if span >= days), "max")
+        hist = self.history(ticker, period=period)
+        return hist[hist.index >= start]
+
+    def history_since_batch(self, tickers: List[str], start) -> Dict:
+        """
+        Fetch bars from start (inclusive) for many tickers.
+
+        Backends with a bulk endpoint override this; the default loops.
+
+        Args:
+            tickers: Stock ticker symbols
+            start: pandas Timestamp of the first bar wanted
+
+        Returns:
+            Dictionary mapping each ticker to its history DataFrame
+        """
+        return {ticker: self.history_since(ticker, start) for ticker in tickers}
+
+    def info(self, ticker: str) -> Dict:
+        """
+        Fetch analyst info (recommendationKey, targetMeanPrice, numberOfAnalystOpinions).
+
+        Args:
+            ticker: Stock ticker symbol
+
+        Returns:
+            Dictionary in the shape of yfinance's Ticker.info
+        """
+        raise NotImplementedError
+
+    def calendar(self, ticker: str) -> Optional[Dict]:
+        """
+        Fetch the earnings calendar.
+
+        Args:
+            ticker: Stock ticker symbol
+
+        Returns:
+            Dictionary with an 'Earnings Date' list of dates, or None
+        """
+        raise NotImplementedError
+
+    def quote(self, ticker: str) -> Optional[float]:
+        """
+        Fetch the latest traded price.
+
+        Backends with a cheaper quote endpoint override this; the default
+        reads the last close of a short history.
+
+        Args:
+            ticker: Stock ticker symbol
+
+        Returns:
+            Latest price, or None if unavailable
+        """
+        hist = self.history(ticker, period="5d")
+        if hist is None or hist.empty:
+            return None
+        return float(hist["Close"].iloc[-1])
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live Yahoo Finance data via yfinance (imported on first use)."""
+
+    name = "yfinance"
+
+    def history(self, ticker: str, period: str = "3mo"):
+        import yfinance as yf
+        return yf.Ticker(ticker).history(period=period)
+
+    def history_batch(self, tickers: List[str], period: str = "3mo") -> Dict:
+        import yfinance as yf
+
+        # One bulk request; auto_adjust matches Ticker.history's default
+        combined = yf.download(tickers, period=period, group_by="ticker", threads=True,
+                               auto_adjust=True, progress=False)
+        return self._split_download(combined, tickers)
+
+    def history_since(self, ticker: str, start):
+        import yfinance as yf
+        hist = yf.Ticker(ticker).history(start=start.strftime("%Y-%m-%d"))
+        return hist[hist.index >= start]
+
+    def history_since_batch(self, tickers: List[str], start) -> Dict:
+        import yfinance as yf
+
+        combined = yf.download(tickers, start=start.strftime("%Y-%m-%d"), group_by="ticker",
+                               threads=True, auto_adjust=True, progress=False)
+        return self._split_download(combined, tickers)
+
+    @staticmethod
+    def _split_download(combined, tickers: List[str]) -> Dict:
+        """Split a group_by="ticker" yf.download frame into per-ticker histories."""
+        histories = {}
+        for ticker in tickers:
+            if combined.empty or ticker not in combined.columns.get_level_values(0):
+                histories[ticker] = combined.iloc[0:0]
+                continue
+            # Rows where this ticker did not trade are all-NaN in the combined frame
+            histories[ticker] = combined[ticker].dropna(how="all")
+        return histories
+
+    def info(self, ticker: str) -> Dict:
+        import yfinance as yf
+        return yf.Ticker(ticker).info
+
+    def calendar(self, ticker: str) -> Optional[Dict]:
+        import yfinance as yf
+        return yf.Ticker(ticker).calendar
+
+    def quote(self, ticker: str) -> Optional[float]:
+        import yfinance as yf
+        price = yf.Ticker(ticker).fast_info.last_price
+        return float(price) if price else None
+
+
+class FixtureProvider(MarketDataProvider):
+    """
+    Recorded market data read from a local directory.
+
+    Layout (one set of files per ticker):
+        <TICKER>.parquet or <TICKER>.csv   Daily OHLCV with a Date index
+        <TICKER>.json                      {"info": {...}, "calendar": {"Earnings Date": ["YYYY-MM-DD", ...]}}
+
+    Periods are sliced relative to the last recorded bar, so results never
+    depend on the wall clock.
+    """
+
+    name = "fixture"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, ticker: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{ticker.upper()}.{extension}")
+
+    def history(self, ticker: str, period: str = "3mo"):
+        import pandas as pd
+
+        parquet_path = self._path(ticker, "parquet")
+        csv_path = self._path(ticker, "csv")
+        if os.path.exists(parquet_path):
+            hist = pd.read_parquet(parquet_path)
+        elif os.path.exists(csv_path):
+            hist = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+        else:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+
+        return _slice_period(hist.sort_index(), period)
+
+    def _metadata(self, ticker: str) -> Dict:
+        path = self._path(ticker, "json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def info(self, ticker: str) -> Dict:
+        return self._metadata(ticker).get("info", {})
+
+    def calendar(self, ticker: str) -> Optional[Dict]:
+        calendar = self._metadata(ticker).get("calendar")
+        if not calendar:
+            return None
+        earnings_dates = [datetime.strptime(value, "%Y-%m-%d").date()
+                          for value in calendar.get("Earnings Date", [])]
+        return {**calendar, "Earnings Date": earnings_dates}
+
+    @staticmethod
+    def record(directory: str, tickers: List[str], source: MarketDataProvider,
+               period: str = "3mo", file_format: str = "csv") -> List[str]:
+        """
+        Record history, info and calendar from another provider as fixtures.
+
+        Args:
+            directory: Output directory (created if missing)
+            tickers: Ticker symbols to record
+            source: Provider to read from (e.g. YFinanceProvider())
+            period: History period to record
+            file_format: "csv" or "parquet"
+
+        Returns:
+            List of tickers that were recorded
+        """
+        os.makedirs(directory, exist_ok=True)
+        recorded = []
+
+        for ticker in tickers:
+            ticker = ticker.upper()
+            hist = source.history(ticker, period=period)
+            if hist is None or hist.empty:
+                continue
+
+            path = os.path.join(directory, f"{ticker}.{file_format}")
+            if file_format == "parquet":
+                hist.to_parquet(path)
+            else:
+                hist.to_csv(path)
+
+            info = source.info(ticker) or {}
+            calendar = source.calendar(ticker) or {}
+            earnings_dates = [value.strftime("%Y-%m-%d") for value in calendar.get("Earnings Date", [])
+                              if hasattr(value, "strftime")]
+            metadata = {
+                "info": {key: info.get(key) for key in
+                         ("recommendationKey", "targetMeanPrice", "numberOfAnalystOpinions")},
+                "calendar": {"Earnings Date": earnings_dates} if earnings_dates else None
+            }
+            with open(os.path.join(directory, f"{ticker}.json"), "w", encoding="utf-8") as handle:
+                json.dump(metadata, handle, indent=2)
+
+            recorded.append(ticker)
+
+        return recorded
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Deterministic synthetic OHLC generator.
+
+    Each ticker gets its own reproducible random walk seeded from the ticker
+    symbol and the provider seed, ending on a fixed date so repeated runs and
+    separate processes see identical bars.
+    """
+
+    name = "synthetic"
+
+    CONSENSUS_RATINGS = ["strong_buy", "buy", "hold", "sell", "strong_sell"]
+
+    def __init__(self, seed: int = 0, end: str = "2025-06-30", bars: int = 2520):
+        """
+        Args:
+            seed: Global seed mixed into every ticker's stream
+            end: Date of the last generated bar (YYYY-MM-DD)
+            bars: Number of business days generated before slicing by period
+        """
+        self.seed = seed
+        self.end = end
+        self.bars = bars
+        self._index = None
+
+    def _base_price(self, ticker: str) -> float:
+        return 20.0 + _stable_seed(self.seed, ticker, "price") % 480
+
+    def history(self, ticker: str, period: str = "3mo"):
+        import numpy as np
+        import pandas as pd
+
+        rng = np.random.default_rng(_stable_seed(self.seed, ticker.upper()) % (2 ** 63))
+        if self._index is None:
+            # Same dates for every ticker; building the range dominates small histories
+            self._index = pd.bdate_range(end=self.end, periods=self.bars, name="Date")
+        index = self._index
+
+        drift = rng.normal(0.0003, 0.0002)
+        volatility = rng.uniform(0.01, 0.035)
+        returns = rng.normal(drift, volatility, self.bars)
+        closes = self._base_price(ticker) * np.exp(np.cumsum(returns))
+        opens = np.concatenate(([closes[0]], closes[:-1])) * (1 + rng.normal(0, volatility / 4, self.bars))
+        spread = np.abs(rng.normal(0, volatility, self.bars)) * closes
+        highs = np.maximum(opens, closes) + spread / 2
+        lows = np.minimum(opens, closes) - spread / 2
+        volume = rng.integers(100_000, 50_000_000, self.bars)
+
+        hist = pd.DataFrame({
+            "Open": opens, "High": highs, "Low": lows, "Close": closes, "Volume": volume
+        }, index=index)
+        return _slice_period(hist, period)
+
+    def info(self, ticker: str) -> Dict:
+        seed = _stable_seed(self.seed, ticker.upper(), "info")
+        close = float(self.history(ticker, period="5d")["Close"].iloc[-1])
+        return {
+            "recommendationKey": self.CONSENSUS_RATINGS[seed % len(self.CONSENSUS_RATINGS)],
+            "targetMeanPrice": round(close * (0.85 + (seed % 45) / 100), 2),
+            "numberOfAnalystOpinions": 3 + seed % 40
+        }
+
+    def calendar(self, ticker: str) -> Optional[Dict]:
+        # Days ahead (not an absolute date) is what must stay reproducible
+        days_ahead = _stable_seed(self.seed, ticker.upper(), "earnings") % 90
+        earnings = (datetime.now() + timedelta(days=days_ahead)).date()
+        return {"Earnings Date": [earnings]}
+
+    def quote(self, ticker: str) -> Optional[float]:
+        # Wanders within ±1.5% of the last close, changing once per second
+        close = float(self.history(ticker, period="5d")["Close"].iloc[-1])
+        offset = _stable_seed(self.seed, ticker.upper(), "quote", int(time.time())) % 3001 - 1500
+        return round(close * (1 + offset / 100_000), 4)
+
+
+class LatencyProvider(MarketDataProvider):
+    """
+    Stub upstream: another provider's data behind injected latency and failures.
+
+    Every history, info, calendar and quote call sleeps for latency seconds
+    (plus uniform jitter) and fails with ConnectionError at error_rate, so
+    load tests see Yahoo-like response times without touching the network.
+    """
+
+    name = "stub"
+
+    def __init__(self, source: MarketDataProvider = None, latency: float = 0.05,
+                 jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            source: Provider serving the data (default SyntheticProvider)
+            latency: Seconds added to every call
+            jitter: Up to this many extra seconds, drawn uniformly per call
+            error_rate: Fraction of calls that raise ConnectionError
+            seed: Seed for the jitter and failure draws
+        """
+        self.source = source or SyntheticProvider()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def _upstream(self, call: str, ticker: str):
+        # Server threads call concurrently: count and draw under the lock, sleep outside it
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = bool(self.error_rate) and self._random.random() < self.error_rate
+            self.failures += fail
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError(f"Injected upstream failure: {call}({ticker})")
+
+    def history(self, ticker: str, period: str = "3mo"):
+        self._upstream("history", ticker)
+        return self.source.history(ticker, period=period)
+
+    def info(self, ticker: str) -> Dict:
+        self._upstream("info", ticker)
+        return self.source.info(ticker)
+
+    def calendar(self, ticker: str) -> Optional[Dict]:
+        self._upstream("calendar", ticker)
+        return self.source.calendar(ticker)
+
+    def quote(self, ticker: str) -> Optional[float]:
+        self._upstream("quote", ticker)
+        return self.source.quote(ticker)
+
+
+def provider_from_spec(spec: str) -> MarketDataProvider:
+    """
+    Build a provider from a short spec string.
+
+    Args:
+        spec: "yfinance", "synthetic", "synthetic:<seed>", "fixture:<directory>"
+            or "stub:<milliseconds>" (synthetic data behind that much latency)
+
+    Returns:
+        Configured MarketDataProvider
+    """
+    name, _, argument = spec.partition(":")
+    if name == "yfinance":
+        return YFinanceProvider()
+    if name == "synthetic":
+        return SyntheticProvider(seed=int(argument) if argument else 0)
+    if name == "fixture" and argument:
+        return FixtureProvider(argument)
+    if name == "stub":
+        return LatencyProvider(latency=float(argument) / 1000 if argument else 0.05)
+    raise ValueError(f"Unknown market data provider: {spec}")
@@ -0,0 +1,288 @@
+"""
+Metrics - Latency histograms and counters for Caption Composer
+
+A small thread-safe metrics registry rendered in the Prometheus text
+exposition format (served at /metrics by app.py), so the server needs no
+extra dependency. Hot paths record into the module-level metrics below;
+values that already live elsewhere (cache counters, in-flight calls) are
+read at scrape time through registered collectors.
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+import math
+import threading
+import time
+
+from log_setup import get_logger
+
+
+log = get_logger("metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans in-process stages (sub-millisecond) up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A family is (name, type, help, [(sample_name, labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric:
+    """Base for labelled metrics: one value slot per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        if not self.labelnames:
+            # Unlabelled metrics are exported (as zero) before their first update
+            self._values[()] = self._initial()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _initial(self):
+        return 0
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> List[Family]:
+        with self._lock:
+            samples = [(self.name, self._labels(key), value) for key, value in sorted(self._values.items())]
+        return [(self.name, self.kind, self.help, samples)]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Count the enclosed block as in progress."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS, registry: "Registry" = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _initial(self):
+        return [[0] * len(self.buckets), 0.0, 0]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._initial()
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock seconds spent in the enclosed block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels) -> Dict:
+        """Count and sum observed for one label combination."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return {"count": state[2], "sum": state[1]} if state else {"count": 0, "sum": 0.0}
+
+    def collect(self) -> List[Family]:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                samples.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, count))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, count))
+        return [(self.name, self.kind, self.help, samples)]
+
+
+class Registry:
+    """Holds metrics and scrape-time collectors and renders them for Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        # Keyed by qualified name: app.py runs as __main__ and is imported again as app
+        # by asgi.py, and both copies register the same collector
+        self._collectors: Dict[str, Callable[[], Iterable[Family]]] = {}
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """
+        Add a function called on every scrape.
+
+        Registering a collector with the same qualified name again replaces
+        the earlier one, so a module imported twice exports its families once.
+
+        Args:
+            collector: Zero-argument callable returning (name, type, help, samples)
+                families, where samples are (name, labels, value) tuples
+        """
+        with self._lock:
+            self._collectors[getattr(collector, "__qualname__", repr(collector))] = collector
+
+    def collect(self) -> List[Family]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.values())
+        families = []
+        for metric in metrics:
+            families.extend(metric.collect())
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception:
+                log.error("Metrics collector failed", extra={"collector": getattr(collector, "__name__", repr(collector))},
+                          exc_info=True)
+        return families
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, kind, help, samples in self.collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def gauge_family(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> Family:
+    """Build a gauge family for a collector."""
+    return (name, "gauge", help, [(name, labels, value) for labels, value in samples])
+
+
+def counter_family(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> Family:
+    """Build a counter family for a collector."""
+    return (name, "counter", help, [(name, labels, value) for labels, value in samples])
+
+
+# Process-wide registry served at /metrics
+REGISTRY = Registry()
+
+# Hot-path timers
+UPSTREAM_SECONDS = Histogram(
+    "caption_upstream_seconds",
+    "Market data provider call latency",
+    ["call"]
+)
+INDICATOR_SECONDS = Histogram(
+    "caption_indicator_seconds",
+    "Indicator computation latency (rsi, levels = ATR/pivots/entry-exit, vectorized = batch engine)",
+    ["indicator"]
+)
+STAGE_SECONDS = Histogram(
+    "caption_pipeline_stage_seconds",
+    "CaptionPipeline stage latency",
+    ["stage"]
+)
+REQUEST_SECONDS = Histogram(
+    "caption_http_request_seconds",
+    "HTTP request latency until the response starts",
+    ["endpoint", "status"]
+)
+
+# Degradations and load
+SIMULATED_FALLBACKS = Counter(
+    "caption_simulated_fallback_total",
+    "Results served from simulated data because real data was unavailable"
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "caption_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    ["endpoint"]
+)
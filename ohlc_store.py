@@ -0,0 +1,369 @@
+"""
+OHLC Store - Persistent on-disk price history for Caption Composer
+
+Daily bars are kept per ticker in a memory-mapped NumPy file, so restarts
+and cache misses read history locally (zero-copy) and only ask the
+upstream provider for the bars after the last stored timestamp.
+
+Layout per ticker (in the store directory):
+    <TICKER>@<version>.npy  float64 array of shape (6, bars): the bar
+                            timestamps (UTC nanoseconds, int64 bits)
+                            followed by Open, High, Low, Close and Volume,
+                            one contiguous row per column
+    <TICKER>.json           {"file": current .npy name, "tz": index
+                            timezone, "since": first timestamp the store
+                            is complete from}
+
+A data file is never modified or replaced once written: each write adds a
+new version and swaps the pointer in the JSON file, then removes versions
+no longer in use. Frames still holding a memory map of an older version
+(in the market data cache, say) stay valid, and on Windows, where a mapped
+file cannot be replaced or deleted, the old version is removed by a later
+write instead.
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from typing import Dict, List, Optional
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from log_setup import get_logger
+from market_data import PERIOD_DAYS, MarketDataProvider, _slice_period
+
+
+log = get_logger("ohlc_store")
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _align_tz(index, tz: Optional[str]):
+    """Express a DatetimeIndex in the store's timezone (or naive if tz is None)."""
+    if tz is None:
+        return index.tz_convert(None) if index.tz is not None else index
+    return index.tz_localize(tz) if index.tz is None else index.tz_convert(tz)
+
+
+class OHLCStore:
+    """Per-ticker daily bars on disk, read through memory maps."""
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Folder holding the .npy/.json files (created on first write)
+        """
+        self.directory = os.path.expanduser(directory)
+        self._lock = threading.Lock()
+
+    def accepts(self, ticker: str) -> bool:
+        """True if ticker can be used as a file name inside the store directory."""
+        name = ticker.upper()
+        if not name or ".." in name or "@" in name or os.sep in name or (os.altsep and os.altsep in name):
+            return False
+        directory = os.path.realpath(self.directory)
+        return os.path.dirname(os.path.realpath(os.path.join(directory, f"{name}.json"))) == directory
+
+    def _name(self, ticker: str) -> str:
+        if not self.accepts(ticker):
+            raise ValueError(f"Ticker cannot be stored: {ticker!r}")
+        return ticker.upper()
+
+    def _path(self, ticker: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{self._name(ticker)}.{extension}")
+
+    def _data_path(self, ticker: str, metadata: Dict) -> str:
+        # Stores written before versioned files keep a plain <TICKER>.npy
+        return os.path.join(self.directory, os.path.basename(metadata.get("file") or f"{self._name(ticker)}.npy"))
+
+    def _versions(self, ticker: str) -> List[str]:
+        """Every data file of a ticker, current or stale."""
+        prefix, legacy = f"{self._name(ticker)}@", f"{self._name(ticker)}.npy"
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name == legacy or (name.startswith(prefix) and name.endswith(".npy"))]
+
+    def _remove_stale(self, ticker: str, current: Optional[str]) -> None:
+        """Delete data files other than current, skipping any still mapped (Windows)."""
+        for path in self._versions(ticker):
+            if path != current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _metadata(self, ticker: str) -> Dict:
+        # Under the write lock: Windows cannot replace a file another thread has open
+        try:
+            with self._lock, open(self._path(ticker, "json"), encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def tickers(self) -> List[str]:
+        """Tickers with stored history."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def read(self, ticker: str):
+        """
+        Load a ticker's stored bars.
+
+        The columns are views into the memory-mapped file; nothing is copied
+        until the frame is modified.
+
+        Args:
+            ticker: Stock ticker symbol
+
+        Returns:
+            pandas DataFrame indexed by Date with OHLCV columns, or None if nothing is stored
+
+        Raises:
+            ValueError: If the ticker is not a plain symbol (see accepts)
+        """
+        import pandas as pd
+
+        # A concurrent write may remove the version named by the metadata just read
+        for _ in range(2):
+            metadata = self._metadata(ticker)
+            try:
+                data = np.load(self._data_path(ticker, metadata), mmap_mode="r")
+                break
+            except (OSError, ValueError):
+                continue
+        else:
+            return None
+
+        tz = metadata.get("tz")
+        index = pd.DatetimeIndex(data[0].view("M8[ns]"), name="Date")
+        if tz is not None:
+            index = index.tz_localize("UTC").tz_convert(tz)
+        return pd.DataFrame(data[1:].T, index=index, columns=COLUMNS, copy=False)
+
+    def since(self, ticker: str):
+        """
+        First timestamp from which the stored history has no gaps.
+
+        Returns:
+            pandas Timestamp, or None if nothing is stored
+        """
+        import pandas as pd
+
+        since = self._metadata(ticker).get("since")
+        return pd.Timestamp(since) if since is not None else None
+
+    def write(self, ticker: str, hist, since=None) -> None:
+        """
+        Replace a ticker's stored bars.
+
+        The bars go to a new versioned file and the metadata pointer is
+        swapped atomically, so readers holding a memory map of the previous
+        version are unaffected.
+
+        Args:
+            ticker: Stock ticker symbol
+            hist: pandas DataFrame with a DatetimeIndex and OHLCV columns
+            since: Timestamp from which hist is complete (defaults to its first bar)
+
+        Raises:
+            ValueError: If the ticker is not a plain symbol (see accepts)
+        """
+        name = self._name(ticker)
+        if hist.empty:
+            return
+
+        hist = hist.sort_index()
+        index = hist.index
+        tz = str(index.tz) if index.tz is not None else None
+        utc = index.tz_convert("UTC").tz_localize(None) if tz is not None else index
+
+        data = np.empty((len(COLUMNS) + 1, len(hist)), dtype=np.float64)
+        data[0] = utc.as_unit("ns").asi8.view(np.float64)
+        for row, column in enumerate(COLUMNS, start=1):
+            data[row] = hist[column].to_numpy(dtype=np.float64) if column in hist else np.nan
+
+        since = index[0] if since is None else since
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, path = tempfile.mkstemp(dir=self.directory, prefix=f"{name}@", suffix=".npy")
+            try:
+                with os.fdopen(descriptor, "wb") as handle:
+                    np.save(handle, data)
+                metadata = {"file": os.path.basename(path), "tz": tz, "since": since.isoformat()}
+                self._replace(self._path(ticker, "json"),
+                              lambda handle: handle.write(json.dumps(metadata).encode("utf-8")))
+            except BaseException:
+                os.remove(path)
+                raise
+            self._remove_stale(ticker, path)
+
+    def merge(self, ticker: str, delta):
+        """
+        Fold freshly fetched bars into a ticker's stored history.
+
+        Stored bars at or after the first new timestamp are replaced (the
+        latest bar is often a revised, still-forming one).
+
+        Args:
+            ticker: Stock ticker symbol
+            delta: pandas DataFrame of new bars
+
+        Returns:
+            The merged history as stored
+        """
+        import pandas as pd
+
+        stored = self.read(ticker)
+        if stored is None:
+            self.write(ticker, delta)
+            return self.read(ticker)
+        if delta.empty:
+            return stored
+
+        delta = delta.sort_index()
+        delta.index = _align_tz(delta.index, None if stored.index.tz is None else str(stored.index.tz))
+        merged = pd.concat([stored[stored.index < delta.index[0]], delta.reindex(columns=COLUMNS)])
+        self.write(ticker, merged, since=self.since(ticker))
+        return self.read(ticker)
+
+    def delete(self, ticker: str) -> None:
+        """Remove a ticker's stored history."""
+        with self._lock:
+            try:
+                os.remove(self._path(ticker, "json"))
+            except FileNotFoundError:
+                pass
+            if os.path.isdir(self.directory):
+                self._remove_stale(ticker, None)
+
+    def _replace(self, path: str, write) -> None:
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                write(handle)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+
+class StoredProvider(MarketDataProvider):
+    """
+    Wraps another provider with an OHLCStore.
+
+    History is served from disk; the upstream is asked only for bars after
+    the last stored timestamp, or for the full period when the store does not
+    reach back far enough. Analyst info, calendars and quotes pass through.
+    """
+
+    def __init__(self, upstream: MarketDataProvider, store: OHLCStore):
+        """
+        Args:
+            upstream: Provider supplying missing bars
+            store: Local bar store
+        """
+        self.upstream = upstream
+        self.store = store
+        self.name = upstream.name
+        self.full_fetches = 0
+        self.delta_fetches = 0
+
+    def _stored(self, ticker: str, period: str):
+        """Stored history if it reaches back over period, else None."""
+        import pandas as pd
+
+        if period not in PERIOD_DAYS:
+            return None
+        stored = self.store.read(ticker)
+        since = self.store.since(ticker)
+        if stored is None or stored.empty or since is None:
+            return None
+        since = _align_tz(pd.DatetimeIndex([since]), None if stored.index.tz is None else str(stored.index.tz))[0]
+        if since > stored.index[-1] - pd.Timedelta(days=PERIOD_DAYS[period]):
+            return None
+        return stored
+
+    def _store_full(self, ticker: str, hist, period: str) -> None:
+        import pandas as pd
+
+        if hist is None or hist.empty or period not in PERIOD_DAYS:
+            return
+        # The upstream has nothing older than the period start, so the store is complete from there
+        since = hist.index[-1] - pd.Timedelta(days=PERIOD_DAYS[period])
+        self.store.write(ticker, hist, since=since)
+
+    def history(self, ticker: str, period: str = "3mo"):
+        if not self.store.accepts(ticker):
+            return self.upstream.history(ticker, period=period)
+        stored = self._stored(ticker, period)
+        if stored is None:
+            self.full_fetches += 1
+            hist = self.upstream.history(ticker, period=period)
+            self._store_full(ticker, hist, period)
+            return hist
+
+        self.delta_fetches += 1
+        try:
+            delta = self.upstream.history_since(ticker, stored.index[-1])
+            stored = self.store.merge(ticker, delta)
+        except Exception as e:
+            log.warning("Could not refresh history, using stored bars", extra={"ticker": ticker.upper(), "error": str(e)})
+        return _slice_period(stored, period)
+
+    def history_batch(self, tickers: List[str], period: str = "3mo") -> Dict:
+        unstorable = [ticker for ticker in tickers if not self.store.accepts(ticker)]
+        stored = {ticker: self._stored(ticker, period) for ticker in tickers if self.store.accepts(ticker)}
+        missing = [ticker for ticker, hist in stored.items() if hist is None]
+        present = [ticker for ticker, hist in stored.items() if hist is not None]
+
+        histories = self.upstream.history_batch(unstorable, period=period) if unstorable else {}
+        if missing:
+            self.full_fetches += len(missing)
+            fetched = self.upstream.history_batch(missing, period=period)
+            for ticker in missing:
+                self._store_full(ticker, fetched.get(ticker), period)
+                histories[ticker] = fetched.get(ticker)
+
+        if present:
+            self.delta_fetches += len(present)
+            try:
+                start = min(stored[ticker].index[-1] for ticker in present)
+                deltas = self.upstream.history_since_batch(present, start)
+            except Exception as e:
+                log.warning("Could not refresh stored history, using stored bars",
+                            extra={"tickers": len(present), "error": str(e)})
+                deltas = {}
+            for ticker in present:
+                hist = stored[ticker]
+                delta = deltas.get(ticker)
+                if delta is not None and not delta.empty:
+                    hist = self.store.merge(ticker, delta)
+                histories[ticker] = _slice_period(hist, period)
+
+        return histories
+
+    def info(self, ticker: str) -> Dict:
+        return self.upstream.info(ticker)
+
+    def calendar(self, ticker: str) -> Optional[Dict]:
+        return self.upstream.calendar(ticker)
+
+    def quote(self, ticker: str) -> Optional[float]:
+        return self.upstream.quote(ticker)
+
+    def stats(self) -> Dict:
+        """
+        Upstream history traffic.
+
+        Returns:
+            Dictionary with full_fetches, delta_fetches and stored tickers
+        """
+        return {
+            "full_fetches": self.full_fetches,
+            "delta_fetches": self.delta_fetches,
+            "stored_tickers": len(self.store.tickers())
+        }
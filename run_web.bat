@@ -26,7 +26,7 @@ python -c "import flask, flask_cors" 2>nul
 if errorlevel 1 (
     echo [!] Flask dependencies not found
     echo [*] Installing Flask and flask-cors...
-    pip install flask flask-cors
+    pip install flask flask-cors uvicorn
     echo.
 )
 
@@ -0,0 +1,276 @@
+"""
+Screener - Rank a whole ticker universe by motif, outlook and upside
+
+Splits the universe into chunks and screens them in parallel: each chunk
+is one bulk history fetch plus one vectorized indicator pass (see
+CaptionComposer.iter_stock_data_batch), after which every ticker gets its
+motif and market outlook. Rows that pass the filters are yielded as soon
+as their chunk delivers them, and rank() sorts the collected rows.
+
+Tickers whose analyst info or earnings calendar timed out are dropped
+(their sentiment and target distance would read as neutral, not unknown)
+unless --include-incomplete keeps them, with the missing calls listed in
+the timed_out column.
+
+Usage:
+    python screener.py universe.txt                           # rank by upside potential
+    python screener.py universe.txt --motif Reflection --sentiment bullish --min-upside 8
+    python screener.py universe.txt --sort price_vs_target --top 25 --output ranked.csv
+    python screener.py universe.txt --stream                  # NDJSON rows as they arrive
+
+A universe file lists one ticker per line (or a CSV whose first column is
+the ticker); blank lines, "#" comments and a "ticker"/"symbol" header are
+skipped.
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from caption_composer import CaptionComposer
+import log_setup
+
+
+log = log_setup.get_logger("screener")
+
+# Tickers per bulk fetch / vectorized indicator pass
+CHUNK_SIZE = int(os.environ.get("CAPTION_SCREEN_CHUNK", "250"))
+
+# Chunks screened concurrently
+WORKERS = int(os.environ.get("CAPTION_SCREEN_WORKERS", str(os.cpu_count() or 4)))
+
+# Columns of the ranked table, in order
+COLUMNS = ["rank", "ticker", "price", "rsi", "motif", "sentiment", "price_vs_target", "upside_potential",
+           "consensus_rating", "target_price", "entry_point", "exit_point", "stop_loss", "action", "data_source", "timed_out"]
+
+# Numeric columns rank() can sort by
+SORT_KEYS = ("upside_potential", "price_vs_target", "rsi", "price")
+
+
+def load_universe(path: str) -> List[str]:
+    """
+    Read a ticker universe file.
+
+    Args:
+        path: Text file with one ticker per line, or a CSV with tickers in the first column
+
+    Returns:
+        Upper-cased tickers in file order, without duplicates
+    """
+    tickers = []
+    with open(path, newline="") as handle:
+        for line in handle:
+            symbol = line.split("#", 1)[0].split(",", 1)[0].strip().strip('"').upper()
+            if symbol and symbol not in ("TICKER", "SYMBOL"):
+                tickers.append(symbol)
+    return list(dict.fromkeys(tickers))
+
+
+def screen_row(stock_data: Dict) -> Dict:
+    """Build one screener row from fetch_stock_data output."""
+    rsi = stock_data["rsi"]
+    motif, _, _ = CaptionComposer.determine_motif(rsi)
+    outlook = CaptionComposer.analyze_market_outlook(stock_data, rsi)
+    return {
+        "ticker": stock_data["ticker"],
+        "price": stock_data.get("price"),
+        "rsi": rsi,
+        "motif": motif,
+        "sentiment": outlook["overall_sentiment"],
+        "price_vs_target": outlook["price_vs_target"],
+        "upside_potential": stock_data.get("upside_potential"),
+        "consensus_rating": stock_data.get("consensus_rating"),
+        "target_price": stock_data.get("target_price"),
+        "entry_point": stock_data.get("entry_point"),
+        "exit_point": stock_data.get("exit_point"),
+        "stop_loss": stock_data.get("stop_loss"),
+        "action": outlook["action"],
+        "data_source": stock_data.get("data_source"),
+        "timed_out": ",".join(stock_data.get("timed_out", []))
+    }
+
+
+def matches(row: Dict, motifs: Iterable[str] = None, sentiments: Iterable[str] = None,
+            min_price_vs_target: float = None, min_upside: float = None,
+            include_simulated: bool = False, include_incomplete: bool = False) -> bool:
+    """
+    Apply the screen filters to one row.
+
+    Args:
+        row: Output of screen_row
+        motifs: Allowed motif names (RSI bands), e.g. ["Reflection", "Patience"]
+        sentiments: Words matched case-insensitively against the overall
+            sentiment, e.g. ["bullish"] or ["bullish", "neutral"]
+        min_price_vs_target: Minimum % distance to the analyst target
+        min_upside: Minimum % upside from entry to exit
+        include_simulated: Keep rows built from simulated fallback data
+        include_incomplete: Keep rows whose analyst info or calendar call timed out
+
+    Returns:
+        True if the row passes every filter given
+    """
+    if not include_simulated and row["data_source"] == "simulated":
+        return False
+    if not include_incomplete and row.get("timed_out"):
+        return False
+    if motifs and row["motif"].lower() not in {motif.lower() for motif in motifs}:
+        return False
+    if sentiments and not any(word.lower() in row["sentiment"].lower() for word in sentiments):
+        return False
+    if min_price_vs_target is not None and (row["price_vs_target"] or 0.0) < min_price_vs_target:
+        return False
+    if min_upside is not None and (row["upside_potential"] or 0.0) < min_upside:
+        return False
+    return True
+
+
+def _screen_chunk(tickers: List[str], filters: Dict) -> List[Dict]:
+    rows, incomplete = [], 0
+    for _, stock_data in CaptionComposer.iter_stock_data_batch(tickers):
+        row = screen_row(stock_data)
+        incomplete += bool(row["timed_out"])
+        if matches(row, **filters):
+            rows.append(row)
+    if incomplete and not filters.get("include_incomplete"):
+        log.warning("Tickers dropped, analyst data timed out", extra={"tickers": incomplete, "chunk": len(tickers)})
+    return rows
+
+
+def screen(tickers: List[str], chunk_size: int = CHUNK_SIZE, workers: int = WORKERS,
+           progress=None, **filters) -> Iterator[Dict]:
+    """
+    Screen a universe, yielding matching rows as each chunk completes.
+
+    Args:
+        tickers: Ticker symbols
+        chunk_size: Tickers per bulk fetch and vectorized indicator pass
+        workers: Chunks screened concurrently
+        progress: Optional callback(screened, total, matched) after each chunk
+        **filters: Keyword filters accepted by matches()
+
+    Yields:
+        Matching screen_row dictionaries, unranked, in completion order
+    """
+    symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    chunks = [symbols[start:start + chunk_size] for start in range(0, len(symbols), chunk_size)]
+    screened = matched = 0
+
+    # A dedicated pool: chunks fan their info/calendar calls out on the shared I/O pool
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="caption-screen") as pool:
+        pending = {pool.submit(_screen_chunk, chunk, filters): len(chunk) for chunk in chunks}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    screened += pending.pop(future)
+                    rows = future.result()
+                    matched += len(rows)
+                    if progress is not None:
+                        progress(screened, len(symbols), matched)
+                    yield from rows
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def rank(rows: Iterable[Dict], sort_by: str = "upside_potential", descending: bool = True,
+         top: Optional[int] = None) -> List[Dict]:
+    """
+    Sort screened rows and number them.
+
+    Args:
+        rows: screen_row dictionaries
+        sort_by: One of SORT_KEYS
+        descending: Largest first (default)
+        top: Keep only the first N rows
+
+    Returns:
+        Rows with a "rank" field, missing values last (ties broken by ticker)
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Cannot sort by {sort_by}; choose from {', '.join(SORT_KEYS)}")
+    sign = -1 if descending else 1
+    ordered = sorted(rows, key=lambda row: (row[sort_by] is None, sign * (row[sort_by] or 0.0), row["ticker"]))
+    return [dict(row, rank=position) for position, row in enumerate(ordered[:top], 1)]
+
+
+def write_table(rows: List[Dict], path: str) -> None:
+    """Write ranked rows as CSV, or as a JSON array when path ends in .json."""
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        if path.lower().endswith(".json"):
+            json.dump([{column: row[column] for column in COLUMNS} for row in rows], handle, indent=2, default=str)
+        else:
+            writer = csv.DictWriter(handle, fieldnames=COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def print_table(rows: List[Dict]) -> None:
+    print(f"{'#':>4}  {'ticker':<8}{'price':>10}{'rsi':>7}  {'motif':<11}{'sentiment':<24}"
+          f"{'vs target %':>12}{'upside %':>10}  action")
+    for row in rows:
+        vs_target = row["price_vs_target"]
+        print(f"{row['rank']:>4}  {row['ticker']:<8}{row['price']:>10.2f}{row['rsi']:>7.1f}  {row['motif']:<11}"
+              f"{row['sentiment']:<24}{vs_target if vs_target is not None else '-':>12}"
+              f"{row['upside_potential']:>10.2f}  {row['action']}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Screen and rank a ticker universe")
+    parser.add_argument("universe", help="file with one ticker per line (or CSV, ticker first)")
+    parser.add_argument("--motif", help="comma-separated motifs to keep (Reflection,Patience,Clarity,Momentum)")
+    parser.add_argument("--sentiment", help="comma-separated sentiment words to keep (bullish,bearish,conflicting,neutral)")
+    parser.add_argument("--min-price-vs-target", type=float, help="minimum %% to the analyst target")
+    parser.add_argument("--min-upside", type=float, help="minimum %% upside from entry to exit")
+    parser.add_argument("--include-simulated", action="store_true", help="keep tickers served from simulated data")
+    parser.add_argument("--include-incomplete", action="store_true",
+                        help="keep tickers whose analyst info or calendar timed out (see the timed_out column)")
+    parser.add_argument("--sort", default="upside_potential", choices=SORT_KEYS, help="ranking column")
+    parser.add_argument("--ascending", action="store_true", help="smallest first")
+    parser.add_argument("--top", type=int, help="keep the first N rows")
+    parser.add_argument("--output", help="write the ranked table to a .csv or .json file")
+    parser.add_argument("--stream", action="store_true", help="print each match as an NDJSON line as it arrives")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"tickers per bulk fetch (default {CHUNK_SIZE})")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"chunks screened concurrently (default {WORKERS})")
+    args = parser.parse_args(argv)
+
+    tickers = load_universe(args.universe)
+    filters = {
+        "motifs": args.motif.split(",") if args.motif else None,
+        "sentiments": args.sentiment.split(",") if args.sentiment else None,
+        "min_price_vs_target": args.min_price_vs_target,
+        "min_upside": args.min_upside,
+        "include_simulated": args.include_simulated,
+        "include_incomplete": args.include_incomplete
+    }
+
+    def progress(screened, total, matched):
+        print(f"⏳ {screened}/{total} screened, {matched} match(es)", file=sys.stderr, flush=True)
+
+    print(f"🔭 Screening {len(tickers)} tickers...", file=sys.stderr)
+    started = time.perf_counter()
+    rows = []
+    for row in screen(tickers, args.chunk_size, args.workers, progress, **filters):
+        rows.append(row)
+        if args.stream:
+            print(json.dumps(row, default=str), flush=True)
+
+    ranked = rank(rows, args.sort, not args.ascending, args.top)
+    print(f"✅ {len(rows)} match(es) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    if args.output:
+        write_table(ranked, args.output)
+        print(f"💾 Ranked table written to {args.output}", file=sys.stderr)
+    elif not args.stream:
+        print_table(ranked)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
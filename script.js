@@ -7,6 +7,14 @@ const loading = document.getElementById('loading');
 const error = document.getElementById('error');
 const errorMessage = document.getElementById('errorMessage');
 const results = document.getElementById('results');
+const batchResults = document.getElementById('batchResults');
+const batchRows = document.getElementById('batchRows');
+const batchProgress = document.getElementById('batchProgress');
+
+// Live updates (Server-Sent Events) for the tickers on screen
+let liveStream = null;
+let liveData = {};
+let currentTicker = null;
 
 // Add event listeners
 analyzeBtn.addEventListener('click', analyzeTicker);
@@ -18,7 +26,15 @@ tickerInput.addEventListener('keypress', (e) => {
 
 // Main function to analyze ticker
 async function analyzeTicker() {
-    const ticker = tickerInput.value.trim().toUpperCase();
+    const tickers = tickerInput.value.toUpperCase().split(/[\s,]+/).filter(Boolean);
+    
+    // Several tickers go through the streaming batch endpoint
+    if (tickers.length > 1) {
+        analyzeTickers(tickers);
+        return;
+    }
+    
+    const ticker = tickers[0] || '';
     
     // Validate input
     if (!ticker) {
@@ -32,9 +48,11 @@ async function analyzeTicker() {
     }
     
     // Show loading, hide error and results
+    stopLiveStream();
     loading.classList.remove('hidden');
     error.classList.add('hidden');
     results.classList.add('hidden');
+    batchResults.classList.add('hidden');
     
     try {
         // Fetch data from API
@@ -51,7 +69,84 @@ async function analyzeTicker() {
         }
         
         // Display results
+        liveData = { [data.ticker]: data };
         displayResults(data);
+        startLiveStream([data.ticker]);
+        
+    } catch (err) {
+        loading.classList.add('hidden');
+        showError('Network error. Please check your connection and try again.');
+        console.error('Error:', err);
+    }
+}
+
+// Analyze several tickers in one round trip, rendering rows as they stream in
+async function analyzeTickers(tickers) {
+    const tooLong = tickers.find(ticker => ticker.length > 10);
+    if (tooLong) {
+        showError(`Ticker symbol too long (max 10 characters): ${tooLong}`);
+        return;
+    }
+    
+    const expected = new Set(tickers).size;
+    let received = 0;
+    
+    // Show loading and an empty table, hide error and results
+    stopLiveStream();
+    liveData = {};
+    loading.classList.remove('hidden');
+    error.classList.add('hidden');
+    results.classList.add('hidden');
+    batchRows.innerHTML = '';
+    batchProgress.textContent = `(0 / ${expected})`;
+    batchResults.classList.remove('hidden');
+    
+    try {
+        const response = await fetch('/api/captions', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ tickers })
+        });
+        
+        if (!response.ok) {
+            const data = await response.json();
+            loading.classList.add('hidden');
+            batchResults.classList.add('hidden');
+            showError(data.message || 'Failed to fetch data');
+            return;
+        }
+        
+        // One JSON object per line; a chunk may end mid-line
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const data = JSON.parse(line);
+                
+                if (data.error) {
+                    showError(data.message || 'Failed to fetch data');
+                    continue;
+                }
+                
+                liveData[data.ticker] = data;
+                renderBatchRow(data);
+                received += 1;
+                batchProgress.textContent = `(${received} / ${expected})`;
+            }
+        }
+        
+        loading.classList.add('hidden');
+        startLiveStream(Object.keys(liveData));
         
     } catch (err) {
         loading.classList.add('hidden');
@@ -60,8 +155,70 @@ async function analyzeTicker() {
     }
 }
 
+// Subscribe to live updates; the server sends only the fields that changed
+function startLiveStream(tickers) {
+    stopLiveStream();
+    if (!tickers.length || !window.EventSource) return;
+    
+    liveStream = new EventSource(`/api/stream?tickers=${encodeURIComponent(tickers.join(','))}`);
+    liveStream.addEventListener('update', (event) => {
+        const changes = JSON.parse(event.data);
+        const data = liveData[changes.ticker];
+        if (!data) return;
+        
+        Object.assign(data, changes);
+        if (batchRows.querySelector(`tr[data-ticker="${changes.ticker}"]`)) {
+            renderBatchRow(data);
+        }
+        if (currentTicker === changes.ticker && !results.classList.contains('hidden')) {
+            displayResults(data, false);
+        }
+    });
+}
+
+function stopLiveStream() {
+    if (liveStream) {
+        liveStream.close();
+        liveStream = null;
+    }
+}
+
+// Add (or refresh) one ticker's row in the batch table
+function renderBatchRow(data) {
+    const existing = batchRows.querySelector(`tr[data-ticker="${data.ticker}"]`);
+    const row = document.createElement('tr');
+    row.dataset.ticker = data.ticker;
+    const cells = [
+        data.ticker || 'N/A',
+        formatPrice(data.price),
+        formatNumber(data.rsi),
+        formatRating(data.consensus_rating),
+        formatPercent(data.upside_potential),
+        data.sentiment || 'N/A',
+        `${data.emoji} ${data.motif}`
+    ];
+    
+    cells.forEach((text, index) => {
+        const cell = document.createElement('td');
+        cell.textContent = text;
+        if (index === 3) {
+            cell.className = 'rating ' + (data.consensus_rating || 'hold').toLowerCase().replace(' ', '_');
+        }
+        row.appendChild(cell);
+    });
+    
+    row.addEventListener('click', () => displayResults(data));
+    if (existing) {
+        batchRows.replaceChild(row, existing);
+    } else {
+        batchRows.appendChild(row);
+    }
+}
+
 // Display results
-function displayResults(data) {
+function displayResults(data, scroll = true) {
+    currentTicker = data.ticker;
+    
     // Market Data
     document.getElementById('ticker').textContent = data.ticker || 'N/A';
     document.getElementById('price').textContent = formatPrice(data.price);
@@ -104,7 +261,9 @@ function displayResults(data) {
     results.classList.remove('hidden');
     
     // Scroll to results
-    results.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+    if (scroll) {
+        results.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+    }
 }
 
 // Show error message
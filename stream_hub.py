@@ -0,0 +1,338 @@
+"""
+Stream Hub - Live caption updates for Caption Composer
+
+Clients subscribe to a set of tickers and receive a full snapshot followed
+by only the fields that changed. One background poller fetches a quote per
+ticker per interval no matter how many clients are watching it, advances
+an IndicatorState in O(1) and re-derives the motif, levels and outlook.
+The forecast tone and poetic caption are only re-drawn when the motif or
+sentiment actually changes, so a quiet tape does not reshuffle the prose.
+
+Part of the TradeGPT-Aladdin mythic trading assistant.
+"""
+
+from collections import deque
+from datetime import date, datetime
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+import os
+import queue
+import threading
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+import concurrency
+import indicators
+from caption_composer import CaptionComposer, _compose_intelligence
+from log_setup import get_logger
+
+
+log = get_logger("stream")
+
+# Seconds between quote polls
+STREAM_INTERVAL = float(os.environ.get("CAPTION_STREAM_INTERVAL", "5"))
+
+# Exchange timezone for quote days when the history index carries none
+EXCHANGE_TZ = os.environ.get("CAPTION_EXCHANGE_TZ", "America/New_York")
+
+# Events buffered per subscriber before it is dropped as too slow
+SUBSCRIBER_BUFFER = 256
+
+# Queued by close() to wake a subscriber blocked waiting for events
+_CLOSED = ("closed", None)
+
+# Fields re-drawn at random on every compose; kept until the motif or sentiment moves
+NARRATIVE_FIELDS = ("forecast_tone", "caption_echo", "resonance")
+
+
+class _TickerFeed:
+    """Live indicator state and last published result for one ticker."""
+
+    def __init__(self, ticker: str, stock_data: Dict, hist=None):
+        self.ticker = ticker
+        self.stock_data = stock_data
+        self.result = _compose_intelligence(ticker, stock_data)
+        self.tz = ZoneInfo(EXCHANGE_TZ)
+        self.session = None
+        self.state = None
+
+        # Simulated fallbacks have no history to stream from
+        if hist is not None and not hist.empty:
+            # The trading day of the last bar, in exchange time: the first quote of a later day opens a new bar
+            last_bar = hist.index[-1]
+            if last_bar.tzinfo is not None:
+                self.tz = last_bar.tzinfo
+            self.session = last_bar.date()
+            recent = hist.tail(indicators.LOOKBACK)
+            self.price = float(hist["Close"].iloc[-1])
+            self.state = indicators.IndicatorState.from_history(hist)
+            self.highs = deque(recent["High"].astype(float), maxlen=indicators.LOOKBACK)
+            self.lows = deque(recent["Low"].astype(float), maxlen=indicators.LOOKBACK)
+
+    @property
+    def live(self) -> bool:
+        return self.state is not None
+
+    def tick(self, price: float, today: date = None) -> Dict:
+        """
+        Apply a new quote.
+
+        The first quote of a new day opens a new bar; later quotes revise it.
+        A repeated price on the same day leaves the bar as it was, so nothing
+        is recomputed.
+
+        Args:
+            price: Latest traded price
+            today: Trading day of the quote (defaults to today in exchange time)
+
+        Returns:
+            Dictionary of result fields whose values changed
+        """
+        today = today or datetime.now(self.tz).date()
+        price = float(price)
+        if today == self.session and price == self.price:
+            return {}
+        self.price = price
+        if today != self.session:
+            self.session = today
+            self.state.update(price)
+            self.highs.append(price)
+            self.lows.append(price)
+        else:
+            self.state.update_tick(price)
+            self.highs[-1] = max(self.highs[-1], price)
+            self.lows[-1] = min(self.lows[-1], price)
+
+        rsi = self.state.rsi
+        if math.isnan(rsi):
+            return {}
+
+        levels = indicators.entry_exit_levels(np.array([price]), np.array([max(self.highs)]),
+                                              np.array([min(self.lows)]), np.array([rsi]))
+        price, rsi, entry_exit = indicators.column_levels({"price": [price], "rsi": [rsi], **levels}, 0)
+
+        self.stock_data = {
+            **self.stock_data,
+            "price": round(price, 2),
+            "rsi": round(rsi, 2),
+            "entry_point": entry_exit["entry"],
+            "exit_point": entry_exit["exit"],
+            "stop_loss": entry_exit["stop_loss"],
+            "upside_potential": entry_exit["upside_potential"]
+        }
+
+        result = _compose_intelligence(self.ticker, self.stock_data)
+        if result["motif"] == self.result["motif"] and result["sentiment"] == self.result["sentiment"]:
+            for field in NARRATIVE_FIELDS:
+                result[field] = self.result[field]
+
+        changes = {key: value for key, value in result.items() if self.result.get(key) != value}
+        self.result = result
+        return changes
+
+
+class Subscription:
+    """
+    One client's view of the hub.
+
+    Iterate events() to receive (event, payload) pairs: a "snapshot" per
+    ticker first, then "update" payloads holding the ticker and its changed
+    fields. Always close() when the client goes away.
+    """
+
+    def __init__(self, hub: "StreamHub", tickers: List[str]):
+        self.hub = hub
+        self.tickers = tickers
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self.closed = False
+
+    def push(self, event: str, payload: Dict) -> bool:
+        """Queue an event; returns False if the subscriber has fallen too far behind."""
+        try:
+            self.queue.put_nowait((event, payload))
+            return True
+        except queue.Full:
+            return False
+
+    def events(self, heartbeat: float = 15.0) -> Iterable[Tuple[str, Optional[Dict]]]:
+        """
+        Yield queued events, or ("heartbeat", None) after heartbeat idle seconds.
+
+        Stops once the subscription is closed (including by the hub when the
+        subscriber overflows its buffer).
+        """
+        while not self.closed:
+            try:
+                item = self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield "heartbeat", None
+                continue
+            if item is not _CLOSED:
+                yield item
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.hub.unsubscribe(self)
+            try:
+                self.queue.put_nowait(_CLOSED)
+            except queue.Full:
+                pass
+
+
+class StreamHub:
+    """Shares one quote poll per ticker among every subscriber watching it."""
+
+    def __init__(self, interval: float = STREAM_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._feeds: Dict[str, _TickerFeed] = {}
+        self._subscribers: Dict[str, set] = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self.polls = 0
+        self.quotes = 0
+        self.pushes = 0
+        self.dropped = 0
+
+    def subscribe(self, tickers: List[str]) -> Subscription:
+        """
+        Subscribe to live updates.
+
+        Args:
+            tickers: Stock ticker symbols
+
+        Returns:
+            Subscription already holding a snapshot event for each ticker
+        """
+        symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+
+        subscription = Subscription(self, symbols)
+        seeded = {}
+        while True:
+            with self._lock:
+                missing = [symbol for symbol in symbols
+                           if symbol not in self._feeds and symbol not in seeded]
+                if not missing:
+                    for symbol in symbols:
+                        # Another client may have seeded the same ticker meanwhile
+                        feed = self._feeds.setdefault(symbol, seeded.get(symbol))
+                        self._subscribers.setdefault(symbol, set()).add(subscription)
+                        subscription.push("snapshot", dict(feed.result))
+                    self._ensure_poller()
+                    return subscription
+
+            # New tickers are seeded through the bulk path outside the lock
+            batch = CaptionComposer.fetch_stock_data_batch(missing)
+            for symbol in missing:
+                hist = CaptionComposer.cache.get(symbol, "history")
+                seeded[symbol] = _TickerFeed(symbol, batch[symbol], hist)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Detach a subscription, retiring feeds nobody watches any more."""
+        with self._lock:
+            for symbol in subscription.tickers:
+                watchers = self._subscribers.get(symbol)
+                if watchers is None:
+                    continue
+                watchers.discard(subscription)
+                if not watchers:
+                    del self._subscribers[symbol]
+                    self._feeds.pop(symbol, None)
+
+    def poll(self) -> int:
+        """
+        Fetch one quote per watched ticker and publish the changes.
+
+        Returns:
+            Number of update events pushed
+        """
+        with self._lock:
+            feeds = [feed for feed in self._feeds.values() if feed.live]
+        if not feeds:
+            return 0
+
+        provider = CaptionComposer.get_provider()
+        quotes = concurrency.results_or_default(
+            [concurrency.submit(CaptionComposer._timed_call, "quote", partial(provider.quote, feed.ticker))
+             for feed in feeds],
+            timeout=self.interval
+        )
+
+        # Only this thread ticks feeds, so recompute outside the lock and publish under it
+        quoted = 0
+        updates = []
+        for feed, price in zip(feeds, quotes):
+            if price is None or self._feeds.get(feed.ticker) is not feed:
+                continue
+            quoted += 1
+            try:
+                changes = feed.tick(price)
+            except Exception as e:
+                log.warning("Error updating stream", extra={"ticker": feed.ticker, "error": str(e)})
+                continue
+            if changes:
+                updates.append((feed, changes))
+
+        pushed = 0
+        overflowed = []
+        with self._lock:
+            self.polls += 1
+            self.quotes += quoted
+            for feed, changes in updates:
+                if self._feeds.get(feed.ticker) is not feed:
+                    continue
+                payload = {"ticker": feed.ticker, **changes}
+                for subscription in self._subscribers.get(feed.ticker, ()):
+                    if subscription.push("update", payload):
+                        pushed += 1
+                    else:
+                        overflowed.append(subscription)
+            self.pushes += pushed
+            self.dropped += len(set(overflowed))
+
+        for subscription in set(overflowed):
+            subscription.close()
+        return pushed
+
+    def _ensure_poller(self) -> None:
+        """Start the background poller on first subscription (caller holds the lock)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="caption-stream", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                log.error("Stream poll failed", exc_info=True)
+
+    def stop(self) -> None:
+        """Stop the background poller."""
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        """
+        Snapshot of stream activity.
+
+        Returns:
+            Dictionary with tickers, subscribers, polls, quotes, pushes and dropped
+        """
+        with self._lock:
+            subscribers = set().union(*self._subscribers.values()) if self._subscribers else set()
+            return {
+                "tickers": len(self._feeds),
+                "subscribers": len(subscribers),
+                "polls": self.polls,
+                "quotes": self.quotes,
+                "pushes": self.pushes,
+                "dropped": self.dropped
+            }
+
+
+# Process-wide hub used by the web server
+hub = StreamHub()
@@ -0,0 +1,86 @@
+"""Quick test to verify the vectorized backtester replays the live entry/exit/stop rules"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+import backtest
+from caption_composer import CaptionComposer
+from market_data import SyntheticProvider
+
+print("🧪 Testing Backtest Engine...\n")
+
+provider = SyntheticProvider(seed=9, bars=300)
+histories = {f"T{i:02d}": provider.history(f"T{i:02d}", period="max") for i in range(12)}
+histories["SHORT"] = provider.history("SHORT", period="max").tail(40)
+
+# Test 1: Levels at every bar match calculate_rsi / calculate_entry_exit_points on the history so far
+print("1️⃣  Per-bar levels...")
+bars = backtest.stack_ohlc(list(histories.values()))
+levels = backtest.rolling_levels(bars)
+offset = bars["close"].shape[1]
+checked = 0
+for row, hist in enumerate(histories.values()):
+    for end in (10, 14, 15, 20, 21, 39, len(hist)):
+        if end > len(hist):
+            continue
+        window = hist.iloc[:end]
+        rsi = CaptionComposer.calculate_rsi(window["Close"], period=14)
+        column = offset - len(hist) + end - 1
+        price = window["Close"].iloc[-1]
+        expected = CaptionComposer.calculate_entry_exit_points(window, price, rsi)
+        if math.isnan(rsi):
+            assert math.isnan(levels["rsi"][row, column]), (row, end)
+            continue
+        assert math.isclose(levels["rsi"][row, column], rsi, rel_tol=1e-9), (row, end)
+        for key in ("entry", "exit", "stop_loss"):
+            assert round(float(levels[key][row, column]), 2) == expected[key], (row, end, key)
+        checked += 1
+print(f"   ✅ {checked} bars match the live calculation")
+
+# Test 2: Hand-built bars exercise every outcome
+print("\n2️⃣  Fill and exit rules...")
+def one_bar_levels(entry, target, stop, length):
+    def filled(value):
+        array = np.full((1, length), np.nan)
+        array[0, 0] = value
+        return array
+    return {"rsi": filled(40.0), "entry": filled(entry), "exit": filled(target), "stop_loss": filled(stop)}
+
+def run(rows, entry=97.0, target=106.0, stop=93.0, max_hold=3):
+    frame = pd.DataFrame(rows, columns=["Open", "High", "Low", "Close"], dtype=float)
+    trades = backtest.simulate(backtest.stack_ohlc([frame]), one_bar_levels(entry, target, stop, len(frame)),
+                               entry_window=2, max_hold=max_hold)
+    return {key: trades[key][0, 0] for key in trades}
+
+signal_bar = [100, 101, 99, 100]
+trade = run([signal_bar, [99, 99, 96, 98], [99, 107, 98, 105]])
+assert trade["outcome"] == backtest.TARGET and trade["fill_price"] == 97 and trade["exit_price"] == 106
+assert trade["bars_held"] == 1 and math.isclose(trade["return_pct"], (106 / 97 - 1) * 100)
+trade = run([signal_bar, [95, 96, 92, 94]])
+assert trade["outcome"] == backtest.STOP and trade["fill_price"] == 95 and trade["exit_price"] == 93
+trade = run([signal_bar, [99, 100, 98, 99], [99, 100, 96, 98], [98, 99, 97, 98], [98, 99, 97, 98],
+             [98, 99, 97, 99.5], [99, 120, 99, 119]])
+assert trade["outcome"] == backtest.TIMEOUT and trade["exit_price"] == 99.5 and trade["bars_held"] == 3
+assert run([signal_bar, [99, 100, 98, 99], [99, 100, 98, 99], [96, 97, 95, 96]])["outcome"] == backtest.UNFILLED
+assert run([signal_bar, [99, 99, 96, 98], [98, 99, 97, 98]])["outcome"] == backtest.OPEN
+trade = run([signal_bar, [99, 99, 96, 98], [99, 108, 90, 100]])
+assert trade["outcome"] == backtest.STOP and trade["exit_price"] == 93
+trade = run([signal_bar, [100, 103, 100, 102], [102, 112, 101, 111]], entry=101.0, target=110.0, stop=95.0)
+assert trade["outcome"] == backtest.TARGET and trade["fill_price"] == 101 and trade["exit_price"] == 110
+print("   ✅ Target, stop, timeout, unfilled, still open, same-bar stop and buy stop")
+
+# Test 3: The report covers every motif and adds up
+print("\n3️⃣  Report...")
+report = backtest.backtest(histories)
+assert list(report["motifs"]) == list(CaptionComposer.MOTIFS)
+assert report["tickers"] == len(histories) and report["bars"] == sum(len(hist) for hist in histories.values())
+overall = report["overall"]
+assert overall["signals"] == sum(stats["signals"] for stats in report["motifs"].values())
+assert overall["filled"] == overall["targets"] + overall["stops"] + overall["timeouts"] + overall["open"]
+assert 0 <= overall["hit_rate"] <= 100 and overall["targets"] > 0 and overall["stops"] > 0
+print(f"   ✅ {overall['signals']:,} signals, hit rate {overall['hit_rate']}%, "
+      f"avg return {overall['avg_return_pct']}% in {report['elapsed']}s")
+
+print("\n🎉 All backtest tests passed!")
@@ -0,0 +1,64 @@
+"""Quick test to verify the pipeline benchmark and its baseline regression gate"""
+
+import json
+import os
+import tempfile
+
+import benchmark
+from caption_composer import CaptionComposer
+
+print("🧪 Testing Pipeline Benchmark...\n")
+
+directory = tempfile.mkdtemp()
+benchmark.FIXTURE_DIR = os.path.join(directory, "fixtures")
+benchmark.MIN_PASS_SECONDS = 0.001
+provider, cache = CaptionComposer.provider, CaptionComposer.cache
+
+# Test 1: Fixtures are recorded once and smaller universes reuse them
+print("1️⃣  Fixtures...")
+tickers = benchmark.prepare_fixtures(benchmark.FIXTURE_DIR, 4)
+assert tickers == ["BENCH0000", "BENCH0001", "BENCH0002", "BENCH0003"]
+assert benchmark.recorded_tickers(benchmark.FIXTURE_DIR) == tickers
+stamp = os.path.getmtime(os.path.join(benchmark.FIXTURE_DIR, "BENCH0000.csv"))
+assert benchmark.prepare_fixtures(benchmark.FIXTURE_DIR, 2) == tickers[:2]
+assert os.path.getmtime(os.path.join(benchmark.FIXTURE_DIR, "BENCH0000.csv")) == stamp
+print("   ✅ 4 tickers recorded, reused without re-recording")
+
+# Test 2: Every stage is timed for every size, and the composer state is restored
+print("\n2️⃣  Stage timings...")
+cache.put("KEEP", "info", {"recommendationKey": "hold"})
+report = benchmark.run_benchmarks([1, 4, 50], repeats=1, fixtures=benchmark.FIXTURE_DIR)
+assert set(report["results"]) == set(benchmark.STAGES) and report["meta"]["repeats"] == 1
+for stage, by_size in report["results"].items():
+    assert list(by_size) == ["1", "4"], f"{stage}: {list(by_size)}"
+    assert by_size["4"]["calls"] == 4 and by_size["4"]["per_call_us"] > 0
+assert CaptionComposer.provider is provider and CaptionComposer.cache is cache
+assert cache.get("KEEP", "info") == {"recommendationKey": "hold"}
+print(f"   ✅ {len(benchmark.STAGES)} stages x 2 sizes (50 skipped: not recorded)")
+
+# Test 3: Only slowdowns beyond the tolerance and the noise floor count
+print("\n3️⃣  Baseline comparison...")
+current = {"results": {"compose": {"100": {"per_call_us": 13.0}}, "calculate_rsi": {"100": {"per_call_us": 1300.0}},
+                       "select_caption": {"100": {"per_call_us": 2.5}}, "flask_caption": {"100": {"per_call_us": 9e3}}}}
+baseline = {"results": {"compose": {"100": {"per_call_us": 10.0}}, "calculate_rsi": {"100": {"per_call_us": 1000.0}},
+                        "select_caption": {"100": {"per_call_us": 1.0}}}}
+assert benchmark.compare(current, baseline) == [("compose", "100", 10.0, 13.0), ("calculate_rsi", "100", 1000.0, 1300.0)]
+assert benchmark.compare(current, baseline, tolerance=0.5) == []
+print("   ✅ +30% flagged, +150% below the noise floor and new stages ignored")
+
+# Test 4: The CLI writes the report and fails against a faster baseline
+print("\n4️⃣  CLI...")
+output = os.path.join(directory, "report.json")
+arguments = ["--sizes", "2", "--stages", "compose,select_caption", "--repeats", "1", "--output", output]
+assert benchmark.main(arguments) == 0
+written = json.load(open(output))
+assert set(written["results"]) == {"compose", "select_caption"}
+faster = os.path.join(directory, "faster.json")
+for timing in written["results"]["compose"].values():
+    timing["per_call_us"] /= 100
+json.dump(written, open(faster, "w"))
+assert benchmark.main(arguments + ["--baseline", output, "--tolerance", "10"]) == 0
+assert benchmark.main(arguments + ["--baseline", faster]) == 1
+print("   ✅ Report written, exit 0 within tolerance, exit 1 on a slowdown")
+
+print("\n🎉 All benchmark tests passed!")
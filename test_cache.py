@@ -0,0 +1,51 @@
+"""Quick test to verify the market data cache (TTL, LRU eviction, invalidation)"""
+
+from market_cache import MarketDataCache
+
+print("🧪 Testing Market Data Cache...\n")
+
+now = [0.0]
+cache = MarketDataCache(max_tickers=2, ttls={"history": 60, "info": 600}, clock=lambda: now[0])
+calls = []
+
+def loader(value):
+    def load():
+        calls.append(value)
+        return value
+    return load
+
+# Test 1: Repeat lookups skip the loader
+print("1️⃣  Testing hit/miss accounting...")
+assert cache.get_or_load("aapl", "history", loader("hist-1")) == "hist-1"
+assert cache.get_or_load("AAPL", "history", loader("hist-2")) == "hist-1"
+assert calls == ["hist-1"]
+assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+print(f"   ✅ {cache.stats()}")
+
+# Test 2: Each data class expires on its own TTL
+print("\n2️⃣  Testing per-class TTL...")
+cache.put("AAPL", "info", "info-1")
+now[0] = 61
+assert cache.get("AAPL", "history") is None
+assert cache.get("AAPL", "info") == "info-1"
+print("   ✅ History expired after 60s, info still fresh")
+
+# Test 3: LRU eviction
+print("\n3️⃣  Testing LRU eviction...")
+cache.put("NVDA", "history", "nvda")
+cache.get("AAPL", "info")  # Touch AAPL so NVDA is least recently used
+cache.put("TSLA", "history", "tsla")
+assert cache.get("NVDA", "history") is None
+assert cache.get("AAPL", "info") == "info-1"
+assert cache.stats()["evictions"] == 1
+print(f"   ✅ Evicted NVDA, evictions: {cache.stats()['evictions']}")
+
+# Test 4: Explicit invalidation
+print("\n4️⃣  Testing invalidate...")
+assert cache.invalidate("AAPL", "info") == 1
+assert cache.get("AAPL", "info") is None
+assert cache.invalidate() == 1
+assert cache.stats()["size"] == 0
+print("   ✅ Invalidated single class and whole cache")
+
+print("\n🎉 All cache tests passed!")
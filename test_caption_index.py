@@ -0,0 +1,81 @@
+"""Quick test to verify the compiled caption index matches the original keyword scans"""
+
+import random
+
+from caption_composer import CaptionComposer
+
+print("🧪 Testing Caption Index...\n")
+
+def reference_resonance(forecast_tone, motif):
+    """calculate_tone_resonance before the index."""
+    tone_lower = forecast_tone.lower()
+    motif_lower = motif.lower()
+    resonance = 0.5
+    for tone_key, keywords in CaptionComposer.TONE_RESONANCE.items():
+        if tone_key in tone_lower or tone_key in motif_lower:
+            for keyword in keywords:
+                if keyword in tone_lower:
+                    resonance += 0.1
+    return min(resonance, 1.0)
+
+def reference_resonant_captions(motif, forecast_tone):
+    """select_caption's high-resonance filter before the index."""
+    tone_lower = forecast_tone.lower()
+    return [
+        caption for caption in CaptionComposer.CAPTION_TEMPLATES.get(motif, [])
+        if any(keyword in caption.lower() for tone_keywords in CaptionComposer.TONE_RESONANCE.values()
+               for keyword in tone_keywords if keyword in tone_lower)
+    ]
+
+# Tones the composer actually produces, plus overlapping and mixed-case edge cases
+tones = {"", "Strategic clarity with cinematic rhythm", "MOMENTUM with fire and surge",
+         "momentum", "moment", "signalignment", "empowered conviction", "stillness stillness",
+         "Discipline: ground, process, anchor, stillness", "reflection whisper silence lesson truth"}
+for rsi in range(0, 101, 5):
+    for rating in ("strong_buy", "buy", "hold", "sell", "N/A"):
+        for upside in (-10.0, 2.0, 15.0):
+            stock_data = {"price": 100.0, "rsi": float(rsi), "consensus_rating": rating, "target_price": 110.0,
+                          "num_analysts": 12, "days_to_earnings": 9, "upside_potential": upside}
+            tones.add(CaptionComposer.generate_forecast_tone(float(rsi), "TEST", stock_data))
+motifs = list(CaptionComposer.MOTIFS) + ["Unknown", "Strategic Momentum"]
+
+# Test 1: Resonance scores are identical
+print("1️⃣  Resonance scores...")
+for tone in tones:
+    for motif in motifs:
+        assert CaptionComposer.calculate_tone_resonance(tone, motif) == reference_resonance(tone, motif), (tone, motif)
+print(f"   ✅ {len(tones) * len(motifs)} tone/motif pairs match exactly")
+
+# Test 2: The inverted index returns the same captions in the same order
+print("\n2️⃣  Resonant captions...")
+index = CaptionComposer.caption_index()
+for tone in tones:
+    for motif in motifs:
+        assert index.resonant_captions(motif, tone) == reference_resonant_captions(motif, tone), (tone, motif)
+print("   ✅ Keyword -> caption lookups match the template scan")
+
+# Test 3: Seeded selection is unchanged
+print("\n3️⃣  Seeded select_caption...")
+for seed, tone in enumerate(sorted(tones)):
+    for motif in CaptionComposer.MOTIFS:
+        random.seed(seed)
+        chosen = CaptionComposer.select_caption(motif, tone)
+        random.seed(seed)
+        resonant = reference_resonant_captions(motif, tone)
+        expected = random.choice(resonant if reference_resonance(tone, motif) > 0.7 and resonant
+                                 else CaptionComposer.CAPTION_TEMPLATES[motif])
+        assert chosen == expected, (tone, motif)
+print("   ✅ Same caption drawn for the same random state")
+
+# Test 4: Runtime table edits take effect after a rebuild
+print("\n4️⃣  Rebuilding...")
+CaptionComposer.TONE_RESONANCE["cinematic"].append("horizon")
+try:
+    assert CaptionComposer.caption_index(rebuild=True).resonance("cinematic horizon", "Clarity") == \
+        reference_resonance("cinematic horizon", "Clarity")
+finally:
+    CaptionComposer.TONE_RESONANCE["cinematic"].remove("horizon")
+    CaptionComposer.caption_index(rebuild=True)
+print("   ✅ New keywords picked up by caption_index(rebuild=True)")
+
+print("\n🎉 All caption index tests passed!")
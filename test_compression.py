@@ -0,0 +1,98 @@
+"""Quick test to verify negotiated compression and the MessagePack option"""
+
+import asyncio
+import gzip
+import io
+import json
+import zlib
+
+from caption_composer import CaptionComposer
+from market_data import SyntheticProvider
+from app import app
+import asgi
+import http_encoding
+
+print("🧪 Testing Response Compression...\n")
+
+CaptionComposer.set_provider(SyntheticProvider(seed=5))
+client = app.test_client()
+
+# Test 1: Accept-Encoding negotiation
+print("1️⃣  Negotiation...")
+assert http_encoding.negotiate_encoding("gzip, deflate") == "gzip"
+assert http_encoding.negotiate_encoding("GZIP;q=0.5") == "gzip"
+assert http_encoding.negotiate_encoding("*") == http_encoding.supported_encodings()[0]
+for header in [None, "", "identity", "deflate", "gzip;q=0", "*;q=0", "gzip;q=nope"]:
+    assert http_encoding.negotiate_encoding(header) is None, header
+if "br" not in http_encoding.supported_encodings():
+    assert http_encoding.negotiate_encoding("br, gzip") == "gzip"
+print(f"   ✅ Supported: {', '.join(http_encoding.supported_encodings())}")
+
+# Test 2: /api/caption is gzipped on request, byte-identical once decoded
+print("\n2️⃣  Whole-body gzip...")
+plain = client.get("/api/caption/AAPL?seed=7")
+packed = client.get("/api/caption/AAPL?seed=7", headers={"Accept-Encoding": "gzip"})
+assert "Content-Encoding" not in plain.headers and "Accept-Encoding" in plain.headers["Vary"]
+assert packed.headers["Content-Encoding"] == "gzip"
+assert gzip.decompress(packed.data) == plain.data
+assert plain.headers["ETag"].startswith('"') and packed.headers["ETag"] == "W/" + plain.headers["ETag"]
+assert client.get("/api/caption/AAPL?seed=7", headers={"If-None-Match": packed.headers["ETag"]}).status_code == 304
+print(f"   ✅ {len(plain.data)} → {len(packed.data)} bytes, ETag weakened and still revalidates")
+
+# Test 3: Small bodies stay uncompressed
+print("\n3️⃣  Minimum size...")
+health = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+assert len(health.data) < http_encoding.MIN_COMPRESS_BYTES and "Content-Encoding" not in health.headers
+print(f"   ✅ {len(health.data)}-byte health check sent as is")
+
+# Test 4: Streams are flushed per chunk, so every piece decodes to whole records
+print("\n4️⃣  Streaming gzip...")
+lines = [json.dumps({"ticker": f"T{n}", "caption": "steady as the tide"}) + "\n" for n in range(5)]
+decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+pieces = list(http_encoding.compress_stream(iter(lines), "gzip"))
+assert [decoder.decompress(piece).decode() for piece in pieces[:-1]] == lines
+assert decoder.decompress(pieces[-1]) == b"" and decoder.eof
+batch = client.post("/api/captions", json={"tickers": ["AAPL", "NVDA", "MSFT"]},
+                    headers={"Accept-Encoding": "gzip"})
+assert batch.headers["Content-Encoding"] == "gzip" and "Content-Length" not in batch.headers
+results = [json.loads(line) for line in gzip.decompress(batch.data).decode().splitlines()]
+assert sorted(result["ticker"] for result in results) == ["AAPL", "MSFT", "NVDA"]
+print(f"   ✅ {len(pieces) - 1} chunks decoded as they arrived; batch of {len(results)} decoded")
+
+# Test 5: The native ASGI handler negotiates the same way
+print("\n5️⃣  ASGI handler...")
+async def asgi_get(path, headers=()):
+    sent = []
+    async def send(message):
+        sent.append(message)
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": list(headers)}
+    await asgi.app(scope, None, send)
+    return dict(sent[0]["headers"]), sent[1]["body"]
+
+headers, body = asyncio.run(asgi_get("/api/caption/NVDA", [(b"accept-encoding", b"gzip, br;q=0")]))
+assert headers[b"content-encoding"] == b"gzip" and int(headers[b"content-length"]) == len(body)
+assert json.loads(gzip.decompress(body))["ticker"] == "NVDA" and b"Accept-Encoding" in headers[b"vary"]
+headers, body = asyncio.run(asgi_get("/api/caption/NVDA"))
+assert b"content-encoding" not in headers and json.loads(body)["ticker"] == "NVDA"
+print("   ✅ gzip when accepted, identity otherwise")
+
+# Test 6: MessagePack for machine clients (JSON when msgpack is not installed)
+print("\n6️⃣  MessagePack...")
+accept = {"Accept": "application/msgpack"}
+response = client.get("/api/caption/AAPL?seed=7", headers=accept)
+assert "Accept" in response.headers["Vary"]
+if http_encoding._optional("msgpack") is not None:
+    import msgpack
+    assert response.mimetype == http_encoding.MSGPACK_TYPE
+    assert msgpack.unpackb(response.data) == json.loads(plain.data)
+    batch = client.post("/api/captions", json={"tickers": ["AAPL", "NVDA"]}, headers=accept)
+    assert len(list(msgpack.Unpacker(io.BytesIO(batch.data)))) == 2
+    print("   ✅ MessagePack body and stream decode to the JSON payload")
+else:
+    assert not http_encoding.wants_msgpack(accept["Accept"])
+    assert response.mimetype == "application/json" and response.data == plain.data
+    print("   ✅ msgpack not installed: JSON served instead")
+
+CaptionComposer.set_provider(None)
+
+print("\n🎉 All compression tests passed!")
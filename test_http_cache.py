@@ -0,0 +1,81 @@
+"""Quick test to verify ETag, Cache-Control and 304 responses on /api/caption"""
+
+import asyncio
+
+from caption_composer import CaptionComposer, pipeline
+from market_data import SyntheticProvider
+from app import app
+import asgi
+
+print("🧪 Testing HTTP Caching...\n")
+
+class BrokenProvider(SyntheticProvider):
+    def history(self, ticker, period="3mo"):
+        raise ConnectionError("upstream down")
+
+CaptionComposer.set_provider(SyntheticProvider(seed=4))
+client = app.test_client()
+
+# Test 1: Fresh responses carry an input-derived ETag and the history TTL
+print("1️⃣  First request...")
+response = client.get("/api/caption/AAPL")
+etag = response.headers["ETag"]
+max_age = int(response.headers["Cache-Control"].split("max-age=")[1])
+assert response.status_code == 200 and etag.startswith('W/"')
+assert 0 < max_age <= CaptionComposer.cache.ttls["history"]
+print(f"   ✅ ETag {etag}, Cache-Control: {response.headers['Cache-Control']}")
+
+# Test 2: A matching If-None-Match gets 304 without running the pipeline
+print("\n2️⃣  Conditional request...")
+runs = pipeline.runs
+response = client.get("/api/caption/AAPL", headers={"If-None-Match": f'"other", {etag}'})
+assert response.status_code == 304 and response.data == b"" and response.headers["ETag"] == etag
+assert pipeline.runs == runs
+assert client.get("/api/caption/AAPL", headers={"If-None-Match": '"stale"'}).status_code == 200
+print("   ✅ 304 Not Modified, pipeline untouched")
+
+# Test 3: New bars, a seed or deterministic selection change the validator
+print("\n3️⃣  Changing inputs...")
+hist = CaptionComposer.cache.get("AAPL", "history").copy()
+hist.iloc[-1, hist.columns.get_loc("Close")] *= 1.01
+CaptionComposer.cache.put("AAPL", "history", hist)
+response = client.get("/api/caption/AAPL", headers={"If-None-Match": etag})
+assert response.status_code == 200 and response.headers["ETag"] != etag
+seeded = client.get("/api/caption/AAPL?seed=1").headers["ETag"]
+assert seeded.startswith('"') and seeded != response.headers["ETag"]
+CaptionComposer.SELECTION_MODE = "deterministic"
+try:
+    strong = client.get("/api/caption/AAPL").headers["ETag"]
+    assert strong.startswith('"') and strong != seeded
+finally:
+    CaptionComposer.SELECTION_MODE = "random"
+print("   ✅ Revised bar, seed and selection mode each produce a new ETag (strong when reproducible)")
+
+# Test 4: The native ASGI handler honours the same validators
+print("\n4️⃣  ASGI handler...")
+async def asgi_get(path, headers=()):
+    sent = []
+    async def send(message):
+        sent.append(message)
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": list(headers)}
+    await asgi.app(scope, None, send)
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+status, headers = asyncio.run(asgi_get("/api/caption/NVDA"))
+assert status == 200 and b"etag" in headers
+runs = pipeline.runs
+status, _ = asyncio.run(asgi_get("/api/caption/NVDA", [(b"if-none-match", headers[b"etag"])]))
+assert status == 304 and pipeline.runs == runs
+print("   ✅ 200 with ETag, then 304")
+
+# Test 5: Simulated fallbacks are never cached
+print("\n5️⃣  Simulated data...")
+CaptionComposer.set_provider(BrokenProvider(seed=4))
+response = client.get("/api/caption/TSLA")
+assert response.status_code == 200 and "ETag" not in response.headers
+assert response.headers["Cache-Control"] == "no-cache"
+print("   ✅ Cache-Control: no-cache")
+
+CaptionComposer.set_provider(None)
+
+print("\n🎉 All HTTP caching tests passed!")
@@ -0,0 +1,74 @@
+"""Quick test to verify the vectorized indicator engine matches the per-ticker pandas path"""
+
+import math
+
+import pandas as pd
+
+import indicators
+from caption_composer import CaptionComposer
+from market_data import SyntheticProvider
+
+print("🧪 Testing Vectorized Indicator Engine...\n")
+
+def same(a, b):
+    if a is None or b is None:
+        return a is b
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+provider = SyntheticProvider(seed=3)
+
+# Ragged histories: full 3-month windows plus short ones around the 14/20-bar edges
+histories = [provider.history(f"T{i:03d}", period="3mo") for i in range(200)]
+for length in (5, 13, 14, 15, 19, 20, 21, 35):
+    histories.append(provider.history(f"S{length}", period="3mo").tail(length))
+
+# Flat prices (no losses) and a steady decline (no gains)
+flat_index = pd.bdate_range(end="2025-06-30", periods=30)
+histories.append(pd.DataFrame({"High": 10.5, "Low": 9.5, "Close": 10.0}, index=flat_index))
+histories.append(pd.DataFrame({"Close": [100.0 - i for i in range(30)],
+                               "High": [101.0 - i for i in range(30)],
+                               "Low": [99.0 - i for i in range(30)]}, index=flat_index))
+
+# Test 1: Raw values agree with calculate_rsi / calculate_entry_exit_points
+print("1️⃣  Comparing engine against per-ticker pandas results...")
+closes, highs, lows = indicators.stack_histories(histories)
+result = indicators.compute_indicators(closes, highs, lows)
+assert closes.shape == (len(histories), 20)
+
+for column, hist in enumerate(histories):
+    rsi = CaptionComposer.calculate_rsi(hist["Close"], period=14) if len(hist) > 1 else float("nan")
+    price = hist["Close"].iloc[-1]
+    expected = CaptionComposer.calculate_entry_exit_points(hist, price, rsi)
+    engine_price, engine_rsi, engine_levels = indicators.column_levels(result, column)
+
+    assert same(engine_price, price), column
+    assert same(engine_rsi, rsi), (column, engine_rsi, rsi)
+    assert round(engine_rsi, 2) == round(rsi, 2) or math.isnan(rsi), column
+    for key in ("entry", "exit", "stop_loss", "upside_potential"):
+        assert same(engine_levels[key], expected[key]), (column, key, engine_levels[key], expected[key])
+
+print(f"   ✅ {len(histories)} tickers match (including 5-35 bar histories)")
+
+# Test 2: ATR matches the pandas rolling true range
+print("\n2️⃣  Comparing ATR...")
+for column, hist in enumerate(histories):
+    recent = hist.tail(20)
+    ranges = pd.concat([recent["High"] - recent["Low"],
+                        abs(recent["High"] - recent["Close"].shift()),
+                        abs(recent["Low"] - recent["Close"].shift())], axis=1)
+    atr = ranges.max(axis=1).rolling(14).mean().iloc[-1]
+    assert same(float(result["atr"][column]), float(atr)), column
+print("   ✅ ATR matches for every ticker")
+
+# Test 3: Full-length input gives the same answer as the trimmed stack
+print("\n3️⃣  Testing untrimmed input...")
+full = indicators.stack_histories(histories[:50], bars=70)
+wide = indicators.compute_indicators(*full)
+for key in ("rsi", "atr", "entry", "exit", "stop_loss"):
+    for column in range(50):
+        assert same(float(wide[key][column]), float(result[key][column])), (key, column)
+print("   ✅ 70-bar input matches 20-bar input")
+
+print("\n🎉 All indicator engine tests passed!")
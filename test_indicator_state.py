@@ -0,0 +1,68 @@
+"""Quick test to verify streaming RSI/ATR state against full recomputation"""
+
+import json
+import math
+
+from caption_composer import CaptionComposer
+from indicators import IndicatorState, compute_indicators, stack_histories
+from market_data import SyntheticProvider
+
+print("🧪 Testing Incremental Indicator State...\n")
+
+def close_enough(a, b):
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+def full_atr(hist):
+    return float(compute_indicators(*stack_histories([hist]))["atr"][0])
+
+hist = SyntheticProvider(seed=11).history("AAPL", period="1y")
+
+# Test 1: Bar-by-bar updates track calculate_rsi on the growing history
+print("1️⃣  Streaming new bars...")
+state = IndicatorState.from_history(hist.iloc[:40])
+for end in range(41, len(hist) + 1):
+    bar = hist.iloc[end - 1]
+    state.update(bar["Close"], bar["High"], bar["Low"])
+    prefix = hist.iloc[:end]
+    assert close_enough(state.rsi, CaptionComposer.calculate_rsi(prefix["Close"])), end
+    assert close_enough(state.atr, full_atr(prefix)), end
+print(f"   ✅ {len(hist) - 40} bars streamed, RSI {state.rsi:.2f} | ATR {state.atr:.2f}")
+
+# Test 2: Short histories stay NaN until the window fills, then match
+print("\n2️⃣  Warm-up from the first bar...")
+state = IndicatorState()
+for end in range(1, 25):
+    bar = hist.iloc[end - 1]
+    state.update(bar["Close"], bar["High"], bar["Low"])
+    prefix = hist.iloc[:end]
+    expected_rsi = CaptionComposer.calculate_rsi(prefix["Close"]) if end > 1 else float("nan")
+    assert close_enough(state.rsi, expected_rsi), end
+    assert close_enough(state.atr, full_atr(prefix)), end
+print("   ✅ Matches from the very first bar")
+
+# Test 3: Intrabar ticks revise the current bar in place
+print("\n3️⃣  Streaming ticks...")
+state = IndicatorState.from_history(hist)
+last = hist.iloc[-1]
+revised = hist.copy()
+for price in (last["Close"] * 1.01, last["Close"] * 0.97, last["Close"] * 1.02):
+    state.update_tick(price)
+    revised.iloc[-1, revised.columns.get_loc("Close")] = price
+    revised.iloc[-1, revised.columns.get_loc("High")] = max(revised["High"].iloc[-1], price)
+    revised.iloc[-1, revised.columns.get_loc("Low")] = min(revised["Low"].iloc[-1], price)
+    assert close_enough(state.rsi, CaptionComposer.calculate_rsi(revised["Close"]))
+    assert close_enough(state.atr, full_atr(revised))
+print(f"   ✅ RSI after ticks: {state.rsi:.2f}")
+
+# Test 4: Serialize and restore
+print("\n4️⃣  Serialization round trip...")
+restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+assert close_enough(restored.rsi, state.rsi) and close_enough(restored.atr, state.atr)
+restored.update(last["Close"] * 1.03, last["Close"] * 1.04, last["Close"] * 1.0)
+state.update(last["Close"] * 1.03, last["Close"] * 1.04, last["Close"] * 1.0)
+assert close_enough(restored.rsi, state.rsi)
+print("   ✅ Restored state continues identically")
+
+print("\n🎉 All indicator state tests passed!")
@@ -0,0 +1,48 @@
+"""Quick test to verify the text path loads without pandas/numpy and warm_up preloads them"""
+
+import json
+import subprocess
+import sys
+
+print("🧪 Testing Lazy Imports...\n")
+
+def run(code):
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+# Test 1: Composing captions from known values never imports the data stack
+print("1️⃣  Text path...")
+loaded = run("""
+import json, sys
+from caption_composer import CaptionComposer
+stock_data = {"price": 182.5, "rsi": 62.0, "consensus_rating": "buy", "target_price": 205.0,
+              "num_analysts": 30, "days_to_earnings": 12, "upside_potential": 6.5}
+outlook = CaptionComposer.analyze_market_outlook(stock_data, 62.0)
+tone = CaptionComposer.generate_forecast_tone(62.0, "AAPL", stock_data, outlook)
+motif, emoji, archetype = CaptionComposer.determine_motif(62.0)
+caption = CaptionComposer.select_caption(motif, tone, "AAPL")
+result = CaptionComposer.compose("AAPL", 62.0, tone)
+assert caption and result["caption_echo"]
+print(json.dumps([m for m in ("numpy", "pandas", "yfinance") if m in sys.modules]))
+""")
+assert loaded == [], f"text path imported {loaded}"
+print("   ✅ compose, determine_motif, select_caption and analyze_market_outlook ran without pandas/numpy")
+
+# Test 2: The web app imports without the data stack too
+print("\n2️⃣  Web app import...")
+loaded = run("import json, sys, app; print(json.dumps([m for m in ('numpy', 'pandas', 'stream_hub') if m in sys.modules]))")
+assert loaded == [], f"app imported {loaded}"
+print("   ✅ app.py defers numpy, pandas and the stream hub")
+
+# Test 3: warm_up preloads them
+print("\n3️⃣  Warm-up...")
+loaded = run("""
+import json, sys
+from caption_composer import warm_up
+warm_up().join(timeout=60)
+print(json.dumps([m for m in ("numpy", "pandas", "indicators", "stream_hub") if m in sys.modules]))
+""")
+assert loaded == ["numpy", "pandas", "indicators", "stream_hub"], loaded
+print(f"   ✅ Preloaded {', '.join(loaded)} in the background")
+
+print("\n🎉 All lazy import tests passed!")
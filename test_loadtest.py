@@ -0,0 +1,124 @@
+"""Quick test to verify the load-testing harness and its stub upstream"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+import loadtest
+from app import app
+from caption_composer import CaptionComposer
+from market_data import LatencyProvider, SyntheticProvider, provider_from_spec
+
+print("🧪 Testing Load-Testing Harness...\n")
+
+# Test 1: Ticker picks follow the Zipf skew
+print("1️⃣  Zipf ticker skew...")
+tickers = [f"Z{n:03d}" for n in range(100)]
+pick = loadtest.zipf_sampler(tickers, exponent=1.1, seed=3)
+draws = [pick() for _ in range(20000)]
+share = {ticker: draws.count(ticker) / len(draws) for ticker in tickers[:3] + tickers[-1:]}
+assert share["Z000"] > share["Z001"] > share["Z002"] > 10 * share["Z099"]
+again = loadtest.zipf_sampler(tickers, exponent=1.1, seed=3)
+assert [again() for _ in range(50)] == draws[:50]
+uniform = loadtest.zipf_sampler(tickers, exponent=0, seed=3)
+assert 0.6 < sum(uniform() in tickers[:50] for _ in range(2000)) / 1000 < 1.4
+print(f"   ✅ Top ticker {share['Z000']:.0%}, last {share['Z099']:.2%}; exponent 0 is uniform")
+
+# Test 2: Nearest-rank percentiles and the summary
+print("\n2️⃣  Percentiles and summary...")
+values = [float(n) for n in range(1, 101)]
+assert (loadtest.percentile(values, 50), loadtest.percentile(values, 95), loadtest.percentile(values, 99)) == (50, 95, 99)
+assert loadtest.percentile([7.0], 99) == 7.0 and loadtest.percentile([], 50) == 0.0
+samples = [(0.010, 200, False)] * 90 + [(0.100, 200, True)] * 6 + [(0.500, 500, False)] * 3 + [(1.0, 0, False)]
+summary = loadtest.summarize(samples, elapsed=2.0, concurrency=4)
+assert summary["requests"] == 100 and summary["throughput_rps"] == 50.0
+assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["max_ms"]) == (10.0, 100.0, 500.0, 1000.0)
+assert summary["errors"] == 4 and summary["error_rate"] == 0.04 and summary["degraded_rate"] == 0.06
+assert summary["statuses"] == {"200": 96, "500": 3, "failed": 1}
+print("   ✅ p50/p95/p99 = 10/100/500 ms, 4% errors, 6% degraded")
+
+# Test 3: The stub upstream adds latency and injects failures
+print("\n3️⃣  Stub provider...")
+stub = LatencyProvider(SyntheticProvider(seed=5), latency=0.02, jitter=0.01)
+started = time.perf_counter()
+history = stub.history("AAPL")
+assert 0.02 <= time.perf_counter() - started and history.equals(SyntheticProvider(seed=5).history("AAPL"))
+failing = LatencyProvider(latency=0, error_rate=1.0)
+try:
+    failing.info("AAPL")
+    assert False, "expected ConnectionError"
+except ConnectionError:
+    pass
+spec = provider_from_spec("stub:25")
+assert isinstance(spec, LatencyProvider) and spec.latency == 0.025 and stub.calls == 1
+counted = LatencyProvider(latency=0, error_rate=0.25, seed=1)
+
+
+def hammer():
+    for _ in range(200):
+        try:
+            counted.calendar("AAPL")
+        except ConnectionError:
+            pass
+
+
+threads = [threading.Thread(target=hammer) for _ in range(16)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+assert counted.calls == 3200 and 600 < counted.failures < 1000
+print("   ✅ 20-30 ms per call, failures on demand, stub:25 spec, exact counts from 16 threads")
+
+# Test 4: In-process load levels run against the stub
+print("\n4️⃣  In-process level...")
+saved = CaptionComposer.provider
+CaptionComposer.set_provider(LatencyProvider(SyntheticProvider(seed=5), latency=0.005))
+try:
+    level = loadtest.run_level(loadtest.InProcessClient(), tickers[:20], concurrency=4, requests=40)
+    assert level["requests"] == 40 and level["errors"] == 0 and level["statuses"] == {"200": 40}
+    assert 0 < level["p50_ms"] <= level["p95_ms"] <= level["p99_ms"] <= level["max_ms"]
+    timed = loadtest.run_level(loadtest.InProcessClient(), tickers[:20], concurrency=2, duration=0.3)
+    assert timed["requests"] > 0 and 0.3 <= timed["seconds"] < 5
+finally:
+    CaptionComposer.set_provider(saved)
+print(f"   ✅ 40 requests, {level['throughput_rps']:.0f} req/s, p99 {level['p99_ms']:.1f} ms")
+
+# Test 5: The same traffic against a running server, over HTTP
+print("\n5️⃣  HTTP target...")
+CaptionComposer.set_provider(SyntheticProvider(seed=5))
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+server = make_server("127.0.0.1", 0, app, threaded=True)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+try:
+    client = loadtest.HttpClient(f"http://127.0.0.1:{server.server_port}")
+    level = loadtest.run_level(client, tickers[:20], concurrency=3, requests=30)
+    assert level["requests"] == 30 and level["statuses"] == {"200": 30}
+    refused = loadtest.run_level(loadtest.HttpClient("http://127.0.0.1:9", timeout=1), tickers, 1, requests=2)
+    assert refused["statuses"] == {"failed": 2} and refused["error_rate"] == 1.0
+finally:
+    server.shutdown()
+    CaptionComposer.set_provider(saved)
+print("   ✅ 30 requests over keep-alive connections; refused connections count as failures")
+
+# Test 6: CLI sweeps concurrency levels and writes the report
+print("\n6️⃣  CLI...")
+output = os.path.join(tempfile.mkdtemp(), "load.json")
+level = logging.getLogger("caption").level
+assert loadtest.main(["--concurrency", "1,4", "--requests", "12", "--universe", "30", "--latency-ms", "2",
+                      "--error-rate", "0.5", "--json", output]) == 0
+report = json.load(open(output))
+assert [level["concurrency"] for level in report["levels"]] == [1, 4] and report["tickers"] == 30
+assert all(level["requests"] == 12 and level["errors"] == 0 for level in report["levels"])
+assert any(level["degraded"] for level in report["levels"])
+assert all(level["upstream_calls"] > 0 and level["upstream_failures"] <= level["upstream_calls"]
+           for level in report["levels"])
+assert CaptionComposer.provider is saved and logging.getLogger("caption").level == level
+print("   ✅ 2 levels, upstream failures degrade to simulated data instead of HTTP errors")
+
+print("\n🎉 All load test tests passed!")
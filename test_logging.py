@@ -0,0 +1,86 @@
+"""Quick test to verify structured, queue-backed, rate-limited logging"""
+
+import io
+import json
+import threading
+
+import log_setup
+from caption_composer import CaptionComposer, generate_caption_echo
+from market_data import SyntheticProvider
+
+print("🧪 Testing Structured Logging...\n")
+
+class SlowStream(io.StringIO):
+    """Captures log output, optionally holding every write until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.release.set()
+
+    def write(self, text):
+        self.release.wait()
+        return super().write(text)
+
+def lines(stream):
+    log_setup.flush()
+    return [line for line in stream.getvalue().splitlines() if line]
+
+# Test 1: JSON lines carry level, logger, message and extra fields
+print("1️⃣  JSON format...")
+stream = SlowStream()
+log_setup.configure(level="INFO", fmt="json", stream=stream, burst=0)
+log = log_setup.get_logger("test")
+log.info("Caption served", extra={"ticker": "AAPL", "rsi": 41.5})
+log.debug("Hidden at INFO")
+entries = [json.loads(line) for line in lines(stream)]
+assert len(entries) == 1
+entry = entries[0]
+assert (entry["level"], entry["logger"], entry["msg"]) == ("INFO", "caption.test", "Caption served")
+assert entry["ticker"] == "AAPL" and entry["rsi"] == 41.5 and entry["ts"].endswith("+00:00")
+print(f"   ✅ {lines(stream)[0]}")
+
+# Test 2: A stalled output never blocks the logging thread
+print("\n2️⃣  Non-blocking handler...")
+stream = SlowStream()
+log_setup.configure(level="INFO", fmt="text", stream=stream, burst=0)
+stream.release.clear()
+done = threading.Event()
+threading.Thread(target=lambda: ([log.info("Tick", extra={"n": n}) for n in range(200)], done.set()),
+                 daemon=True).start()
+assert done.wait(2), "logging blocked on a stalled stream"
+stream.release.set()
+text = lines(stream)
+assert len(text) == 200 and text[0].split()[1:4] == ["INFO", "caption.test", "Tick"] and text[0].endswith("n=0")
+print("   ✅ 200 records queued while the writer was stalled")
+
+# Test 3: Repeated messages are rate-limited per template
+print("\n3️⃣  Rate limiting...")
+stream = SlowStream()
+log_setup.configure(level="INFO", fmt="json", stream=stream, burst=3, window=3600)
+for ticker in ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]:
+    log.warning("No price history, using simulated data", extra={"ticker": ticker})
+log.warning("Another message")
+entries = [json.loads(line) for line in lines(stream)]
+assert [entry.get("ticker") for entry in entries] == ["AAPL", "MSFT", "NVDA", None]
+assert log_setup.stats()["suppressed"] == 2
+limiter = log_setup._rate_limit
+limiter.window = 0
+log.warning("No price history, using simulated data", extra={"ticker": "META"})
+assert json.loads(lines(stream)[-1])["suppressed"] == 2
+print("   ✅ 3 of 5 identical warnings logged, the next window reports suppressed=2")
+
+# Test 4: The composer logs at debug level instead of printing
+print("\n4️⃣  Composer hot path...")
+stream = SlowStream()
+log_setup.configure(level="DEBUG", fmt="json", stream=stream, burst=0)
+CaptionComposer.set_provider(SyntheticProvider(seed=3))
+generate_caption_echo("AAPL")
+entries = [json.loads(line) for line in lines(stream)]
+assert any(entry["msg"] == "Fetched RSI" and entry["ticker"] == "AAPL" for entry in entries)
+CaptionComposer.set_provider(None)
+print(f"   ✅ {len(entries)} structured record(s) from generate_caption_echo")
+
+log_setup.configure()
+
+print("\n🎉 All logging tests passed!")
@@ -0,0 +1,78 @@
+"""Quick test to verify latency histograms and the Prometheus /metrics endpoint"""
+
+import metrics
+from caption_composer import CaptionComposer
+from market_data import SyntheticProvider
+
+print("🧪 Testing Metrics...\n")
+
+# Test 1: Histogram buckets are cumulative and rendered in Prometheus text format
+print("1️⃣  Rendering a private registry...")
+registry = metrics.Registry()
+latency = metrics.Histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1.0), registry=registry)
+errors = metrics.Counter("demo_errors_total", "Demo errors", registry=registry)
+for value in (0.05, 0.5, 0.5, 3.0):
+    latency.observe(value, stage="fetch")
+text = registry.render()
+assert '# TYPE demo_seconds histogram' in text
+assert 'demo_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+assert 'demo_seconds_bucket{stage="fetch",le="1"} 3' in text
+assert 'demo_seconds_bucket{stage="fetch",le="+Inf"} 4' in text
+assert 'demo_seconds_sum{stage="fetch"} 4.05' in text
+assert 'demo_errors_total 0' in text
+try:
+    latency.observe(1.0)
+    raise AssertionError("missing label accepted")
+except ValueError:
+    pass
+print("   ✅ Buckets, sums and zero-valued counters render correctly")
+
+# Test 2: Hot-path timers and the simulated fallback counter
+print("\n2️⃣  Instrumenting a caption request...")
+
+class BrokenProvider(SyntheticProvider):
+    def history(self, ticker, period="3mo"):
+        raise ConnectionError("upstream down")
+
+from app import app
+client = app.test_client()
+
+CaptionComposer.set_provider(SyntheticProvider(seed=4))
+before = metrics.STAGE_SECONDS.snapshot(stage="outlook")["count"]
+assert client.get("/api/caption/AAPL").status_code == 200
+assert metrics.STAGE_SECONDS.snapshot(stage="outlook")["count"] == before + 1
+assert metrics.UPSTREAM_SECONDS.snapshot(call="history")["count"] >= 1
+assert metrics.INDICATOR_SECONDS.snapshot(indicator="rsi")["count"] >= 1
+
+fallbacks = metrics.SIMULATED_FALLBACKS.value()
+CaptionComposer.set_provider(BrokenProvider())
+assert client.get("/api/caption/MSFT").get_json()["data_source"] == "simulated"
+assert metrics.SIMULATED_FALLBACKS.value() == fallbacks + 1
+print("   ✅ Stage, upstream and indicator timers recorded; fallback counted")
+
+# Test 3: /metrics exposes histograms, cache ratio and in-flight gauges
+print("\n3️⃣  Scraping /metrics...")
+response = client.get("/metrics")
+body = response.get_data(as_text=True)
+assert response.status_code == 200 and response.content_type.startswith("text/plain")
+for name in ("caption_pipeline_stage_seconds_bucket", "caption_upstream_seconds_count",
+             "caption_http_request_seconds_bucket", "caption_cache_hit_ratio",
+             "caption_simulated_fallback_total", "caption_http_requests_in_flight"):
+    assert name in body, name
+assert 'caption_http_requests_in_flight{endpoint="get_caption"} 0' in body
+assert 'caption_http_request_seconds_count{endpoint="get_caption",status="200"}' in body
+print(f"   ✅ {len(body.splitlines())} metric lines exported")
+
+# Test 4: app.py loaded twice (python app.py, then asgi imports app) exports each family once
+print("\n4️⃣  Loading app.py a second time...")
+import importlib.util
+spec = importlib.util.spec_from_file_location("__main__app", "app.py")
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+body = client.get("/metrics").get_data(as_text=True)
+assert body.count("# TYPE caption_cache_hits_total counter") == 1
+assert body.count("# TYPE caption_stream_subscribers gauge") == 1
+print("   ✅ Runtime collector registered once")
+
+CaptionComposer.set_provider(None)
+
+print("\n🎉 All metrics tests passed!")
@@ -0,0 +1,143 @@
+"""Quick test to verify the on-disk OHLC store and incremental history fetching"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ohlc_store import COLUMNS, OHLCStore, StoredProvider
+from market_data import SyntheticProvider, _slice_period
+
+print("🧪 Testing OHLC Store...\n")
+
+class MovingProvider(SyntheticProvider):
+    """One synthetic tape in exchange time, visible up to a movable last day, counting requests."""
+
+    def __init__(self, until):
+        super().__init__(seed=9)
+        self.until = pd.Timestamp(until, tz="America/New_York")
+        self.requests = []
+        self.fail = False
+
+    def _tape(self, ticker):
+        hist = super().history(ticker, "max")
+        hist.index = hist.index.tz_localize("America/New_York")
+        return hist[hist.index <= self.until]
+
+    def history(self, ticker, period="3mo"):
+        return _slice_period(self._tape(ticker), period)
+
+    def history_since(self, ticker, start):
+        if self.fail:
+            raise ConnectionError("upstream down")
+        self.requests.append(("since", ticker, start))
+        hist = self._tape(ticker)
+        return hist[hist.index >= start]
+
+def same_bars(a, b):
+    return a.index.equals(b.index) and np.allclose(a[COLUMNS].to_numpy(), b[COLUMNS].to_numpy())
+
+directory = tempfile.mkdtemp()
+try:
+    # Test 1: Round trip through a memory map, keeping the timezone
+    print("1️⃣  Writing and reading bars...")
+    store = OHLCStore(directory)
+    upstream = MovingProvider(until="2025-06-20")
+    hist = upstream.history("AAPL", "3mo")
+    store.write("AAPL", hist)
+    loaded = store.read("AAPL")
+    assert same_bars(loaded, hist) and str(loaded.index.tz) == "America/New_York"
+    base = loaded["Close"].to_numpy()
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+    assert store.tickers() == ["AAPL"] and store.read("MSFT") is None
+    print(f"   ✅ {len(loaded)} bars read zero-copy from disk")
+    store.delete("AAPL")
+
+    # Test 2: Cold start fetches the full period once
+    print("\n2️⃣  Cold start...")
+    provider = StoredProvider(upstream, store)
+    first = provider.history("AAPL", "3mo")
+    assert provider.stats() == {"full_fetches": 1, "delta_fetches": 0, "stored_tickers": 1}
+    assert same_bars(first, hist)
+    print("   ✅ Full history fetched and stored")
+
+    # Test 3: A restarted process only asks for bars after the last stored one
+    print("\n3️⃣  Restart after five more trading days...")
+    upstream = MovingProvider(until="2025-06-27")
+    provider = StoredProvider(upstream, OHLCStore(directory))
+    refreshed = provider.history("AAPL", "3mo")
+    assert provider.full_fetches == 0 and provider.delta_fetches == 1
+    assert upstream.requests == [("since", "AAPL", hist.index[-1])]
+    assert same_bars(refreshed, upstream.history("AAPL", "3mo"))
+    print(f"   ✅ Only bars since {hist.index[-1].date()} requested; result matches a full download")
+
+    # Test 4: Batch path mixes full fetches and deltas
+    print("\n4️⃣  Batch fetch...")
+    batch = provider.history_batch(["AAPL", "NVDA"], "3mo")
+    assert provider.full_fetches == 1 and provider.delta_fetches == 2
+    assert same_bars(batch["NVDA"], upstream.history("NVDA", "3mo"))
+    assert same_bars(batch["AAPL"], refreshed)
+    print("   ✅ NVDA fetched in full, AAPL refreshed incrementally")
+
+    # Test 5: Longer periods than stored trigger a full fetch; outages fall back to disk
+    print("\n5️⃣  Coverage and outages...")
+    provider.history("AAPL", "1y")
+    assert provider.full_fetches == 2
+    upstream.fail = True
+    offline = provider.history("AAPL", "3mo")
+    assert same_bars(offline, refreshed)
+    print("   ✅ Stored bars served while upstream is down")
+
+    # Test 6: A mapped file is never replaced; writes add a version and retire the old one
+    print("\n6️⃣  Versioned files...")
+    upstream.fail = False
+    mapped = store.read("AAPL")
+    snapshot = mapped.copy()
+    before = sorted(name for name in os.listdir(directory) if name.endswith(".npy"))
+    merged = store.merge("AAPL", upstream.history("AAPL", "5d").assign(Close=1.0))
+    after = sorted(name for name in os.listdir(directory) if name.endswith(".npy"))
+    assert len(before) == len(after) == 2 and set(before) != set(after)
+    assert same_bars(mapped, snapshot) and merged["Close"].iloc[-1] == 1.0
+    legacy = os.path.join(directory, "MSFT.npy")
+    shutil.copy(os.path.join(directory, json.load(open(os.path.join(directory, "NVDA.json")))["file"]), legacy)
+    with open(os.path.join(directory, "MSFT.json"), "w") as handle:
+        json.dump({key: value for key, value in json.load(open(os.path.join(directory, "NVDA.json"))).items()
+                   if key != "file"}, handle)
+    assert same_bars(store.read("MSFT"), batch["NVDA"])
+    store.write("MSFT", batch["NVDA"])
+    assert not os.path.exists(legacy) and same_bars(store.read("MSFT"), batch["NVDA"])
+    store.delete("MSFT")
+    assert store.tickers() == ["AAPL", "NVDA"] and not any(name.startswith("MSFT") for name in os.listdir(directory))
+    print("   ✅ Old map still readable after a merge; plain <TICKER>.npy stores migrate on write")
+
+    # Test 7: Tickers that would escape the store directory
+    print("\n7️⃣  Path-like tickers...")
+    from app import invalid_ticker_error
+    inner = os.path.join(directory, "inner")
+    store = OHLCStore(inner)
+    provider = StoredProvider(MovingProvider(until="2025-06-20"), store)
+    for ticker in ("../../x", "..", "a/b", "x@1"):
+        assert not store.accepts(ticker) and invalid_ticker_error(ticker) is not None
+        try:
+            store.write(ticker, hist)
+            assert False, ticker
+        except ValueError:
+            pass
+        assert not provider.history(ticker).empty
+    assert not provider.history_batch(["../x", "AAPL"])["../x"].empty
+    assert store.tickers() == ["AAPL"]
+    assert all(name.startswith(("AAPL", "NVDA")) or name == "inner" for name in os.listdir(directory))
+    for ticker in ("BRK.B", "^GSPC", "EURUSD=X", "brk-b"):
+        assert store.accepts(ticker) and invalid_ticker_error(ticker) is None
+    assert invalid_ticker_error("AAPL\n") is not None
+    print("   ✅ Rejected by the API and the store; upstream still serves them uncached")
+
+finally:
+    shutil.rmtree(directory)
+
+print("\n🎉 All OHLC store tests passed!")
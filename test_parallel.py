@@ -0,0 +1,60 @@
+"""Quick test to verify the process-pool mode and its shared memory transport"""
+
+import numpy as np
+
+import backtest
+import parallel
+from market_data import SyntheticProvider
+
+
+def double_rows(inputs, outputs, offset):
+    outputs["doubled"][...] = inputs["values"] * 2 + offset
+    outputs["total"][...] = inputs["values"].sum(axis=1)
+
+
+# Worker processes re-import this script, so the checks only run in the parent
+if __name__ == "__main__":
+    print("🧪 Testing Process-Pool Mode...\n")
+
+    # Test 1: Arrays round-trip through one shared memory block
+    print("1️⃣  Shared arrays...")
+    values = np.arange(12, dtype=float).reshape(4, 3)
+    flags = np.array([1, 0, 1, 1], dtype=np.int8)
+    with parallel.SharedArrays({"values": values, "flags": flags}, empty={"out": ((4,), np.int16)}) as shared:
+        view = parallel.SharedArrays.attach(shared.spec)
+        assert np.array_equal(view.arrays["values"], values) and np.array_equal(view.arrays["flags"], flags)
+        view.arrays["out"][:] = [5, 6, 7, 8]
+        view.close()
+        copies = shared.copy()
+    assert copies["out"].dtype == np.int16 and list(copies["out"]) == [5, 6, 7, 8]
+    print("   ✅ float64, int8 and int16 arrays written by one mapping, read by another")
+
+    # Test 2: Rows are split into contiguous slices no smaller than min_rows
+    print("\n2️⃣  Row slices...")
+    assert parallel.row_slices(1000, 4, 100) == [slice(0, 250), slice(250, 500), slice(500, 750), slice(750, 1000)]
+    assert parallel.row_slices(250, 4, 100) == [slice(0, 125), slice(125, 250)]
+    assert parallel.row_slices(50, 4, 100) == [slice(0, 50)] and parallel.row_slices(10, 0, 1) == [slice(0, 10)]
+    print("   ✅ 4 / 2 / 1 slices")
+
+    # Test 3: map_rows gives the same arrays in-process and across workers
+    print("\n3️⃣  map_rows...")
+    data = np.random.default_rng(1).normal(size=(101, 7))
+    outputs = {"doubled": ((101, 7), np.float64), "total": ((101,), np.float64)}
+    inline = parallel.map_rows(double_rows, {"values": data}, outputs, workers=0, offset=1.0)
+    pooled = parallel.map_rows(double_rows, {"values": data}, outputs, workers=3, min_rows=10, offset=1.0)
+    assert np.array_equal(inline["doubled"], data * 2 + 1) and np.allclose(inline["total"], data.sum(axis=1))
+    assert all(np.array_equal(inline[name], pooled[name]) for name in outputs)
+    print("   ✅ 3 worker processes reproduce the in-process result")
+
+    # Test 4: Backtests are identical in the process-pool mode
+    print("\n4️⃣  Backtest...")
+    provider = SyntheticProvider(seed=13, bars=400)
+    histories = {f"P{i:03d}": provider.history(f"P{i:03d}", period="max") for i in range(300)}
+    parallel.MIN_ROWS_PER_WORKER = 50
+    serial, pooled = backtest.backtest(histories, workers=0), backtest.backtest(histories, workers=2)
+    assert serial["motifs"] == pooled["motifs"] and serial["overall"] == pooled["overall"]
+    assert parallel._pool is not None
+    parallel.shutdown()
+    print(f"   ✅ {len(histories)} tickers, {serial['overall']['signals']:,} backtest signals match")
+
+    print("\n🎉 All process-pool tests passed!")
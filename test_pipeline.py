@@ -0,0 +1,78 @@
+"""Quick test to verify the caption pipeline runs every stage exactly once"""
+
+from caption_composer import CaptionComposer, CaptionPipeline, generate_from_ticker
+from market_data import SyntheticProvider
+
+print("🧪 Testing Caption Pipeline...\n")
+
+class CountingProvider(SyntheticProvider):
+    def __init__(self):
+        super().__init__(seed=2)
+        self.history_calls = 0
+
+    def history(self, ticker, period="3mo"):
+        if period == "3mo":
+            self.history_calls += 1
+        return super().history(ticker, period)
+
+provider = CountingProvider()
+CaptionComposer.set_provider(provider)
+
+calls = {"outlook": 0, "tone": 0, "resonance": 0}
+original_outlook = CaptionComposer.analyze_market_outlook
+original_tone = CaptionComposer.generate_forecast_tone
+original_resonance = CaptionComposer.calculate_tone_resonance
+
+def counted(name, fn):
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        return fn(*args, **kwargs)
+    return staticmethod(wrapper)
+
+CaptionComposer.analyze_market_outlook = counted("outlook", original_outlook)
+CaptionComposer.generate_forecast_tone = counted("tone", original_tone)
+CaptionComposer.calculate_tone_resonance = counted("resonance", original_resonance)
+
+try:
+    # Test 1: One run computes each stage once
+    print("1️⃣  Running the pipeline for AAPL...")
+    pipeline = CaptionPipeline()
+    stages = pipeline.run("aapl")
+    assert provider.history_calls == 1
+    assert calls == {"outlook": 1, "tone": 1, "resonance": 1}, calls
+    assert list(stages["timings"]) == ["fetch", "indicators", "outlook", "tone", "motif", "caption"]
+    assert stages["ticker"] == "AAPL" and stages["stock_data"]["ticker"] == "AAPL"
+    assert stages["motif"] == CaptionComposer.determine_motif(stages["stock_data"]["rsi"])[0]
+    assert stages["caption_echo"] in CaptionComposer.CAPTION_TEMPLATES[stages["motif"]]
+    breakdown = ", ".join(f"{stage} {seconds * 1000:.2f}ms" for stage, seconds in stages["timings"].items())
+    print(f"   ✅ {breakdown}")
+
+    # Test 2: The API result keeps its shape and reuses the single outlook
+    print("\n2️⃣  Building the API result...")
+    for name in calls:
+        calls[name] = 0
+    result = generate_from_ticker("NVDA")
+    assert calls == {"outlook": 1, "tone": 1, "resonance": 1}, calls
+    outlook = original_outlook(CaptionComposer.fetch_stock_data("NVDA"), result["rsi"])
+    assert result["sentiment"] == outlook["overall_sentiment"]
+    assert result["recommended_action"] == outlook["action"]
+    assert list(result)[:7] == ["motif", "emoji", "archetype", "caption_echo", "ticker", "rsi", "resonance"]
+    print(f"   ✅ {result['ticker']}: {result['sentiment']} | {result['emoji']} {result['motif']}")
+
+    # Test 3: Pre-fetched data skips the fetch and indicator stages
+    print("\n3️⃣  Running on batch data...")
+    batch = CaptionComposer.fetch_stock_data_batch(["MSFT"])
+    stages = pipeline.run("MSFT", batch["MSFT"])
+    assert list(stages["timings"]) == ["outlook", "tone", "motif", "caption"]
+    stats = pipeline.stats()
+    assert stats["runs"] == 2
+    assert stats["stages"]["fetch"]["count"] == 1 and stats["stages"]["caption"]["count"] == 2
+    print(f"   ✅ Stage stats: {stats['stages']['outlook']}")
+
+finally:
+    CaptionComposer.analyze_market_outlook = staticmethod(original_outlook)
+    CaptionComposer.generate_forecast_tone = staticmethod(original_tone)
+    CaptionComposer.calculate_tone_resonance = staticmethod(original_resonance)
+    CaptionComposer.set_provider(None)
+
+print("\n🎉 All pipeline tests passed!")
@@ -0,0 +1,139 @@
+"""Quick test to verify the offline market data providers"""
+
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from caption_composer import CaptionComposer, generate_from_ticker, generate_from_tickers
+from market_data import FixtureProvider, SyntheticProvider
+
+print("🧪 Testing Market Data Providers...\n")
+
+# Test 1: Synthetic history is deterministic
+print("1️⃣  Testing synthetic determinism...")
+synthetic = SyntheticProvider(seed=7)
+first = synthetic.history("AAPL", period="3mo")
+second = SyntheticProvider(seed=7).history("AAPL", period="3mo")
+assert not first.empty
+assert first.equals(second)
+assert not first.equals(synthetic.history("NVDA", period="3mo"))
+assert (first["High"] >= first["Low"]).all()
+print(f"   ✅ {len(first)} identical bars across instances, last close {first['Close'].iloc[-1]:.2f}")
+
+# Test 2: Pipeline runs fully offline on the synthetic backend
+print("\n2️⃣  Testing pipeline on synthetic provider...")
+CaptionComposer.set_provider(synthetic)
+data = CaptionComposer.fetch_stock_data("AAPL")
+assert data["data_source"] == "synthetic"
+assert data["days_to_earnings"] is not None
+result = generate_from_ticker("AAPL")
+assert result["rsi"] == data["rsi"]
+print(f"   ✅ {result['emoji']} {result['motif']} | RSI {data['rsi']} | {data['consensus_rating']}")
+
+# Test 3: Recorded fixtures replay the same indicators
+print("\n3️⃣  Testing fixture record/replay...")
+with tempfile.TemporaryDirectory() as directory:
+    assert FixtureProvider.record(directory, ["AAPL", "MSFT"], synthetic) == ["AAPL", "MSFT"]
+    CaptionComposer.set_provider(FixtureProvider(directory))
+    replayed = CaptionComposer.fetch_stock_data("AAPL")
+    assert replayed["data_source"] == "fixture"
+    for key in ("price", "rsi", "entry_point", "exit_point", "stop_loss", "consensus_rating", "target_price"):
+        assert replayed[key] == data[key], key
+    print(f"   ✅ Fixture replay matches: ${replayed['price']} | RSI {replayed['rsi']}")
+
+# Test 4: Batch fetch matches single-ticker fetch
+print("\n4️⃣  Testing batch fetch...")
+CaptionComposer.set_provider(synthetic)
+batch = CaptionComposer.fetch_stock_data_batch(["aapl", "MSFT", "NVDA", "AAPL"])
+assert list(batch) == ["AAPL", "MSFT", "NVDA"]
+CaptionComposer.cache.invalidate()
+for ticker, batch_data in batch.items():
+    assert batch_data == CaptionComposer.fetch_stock_data(ticker), ticker
+results = generate_from_tickers(["MSFT", "NVDA"])
+assert results["NVDA"]["rsi"] == batch["NVDA"]["rsi"]
+print(f"   ✅ Batch of {len(batch)} matches per-ticker fetches")
+
+# Test 5: A slow calendar degrades to no earnings date instead of blocking
+print("\n5️⃣  Testing slow calendar timeout...")
+
+class SlowCalendarProvider(SyntheticProvider):
+    def calendar(self, ticker):
+        time.sleep(1.0)
+        return super().calendar(ticker)
+
+CaptionComposer.set_provider(SlowCalendarProvider(seed=7))
+original_timeouts = CaptionComposer.FETCH_TIMEOUTS
+CaptionComposer.FETCH_TIMEOUTS = {**original_timeouts, "calendar": 0.1}
+started = time.perf_counter()
+slow = CaptionComposer.fetch_stock_data("AAPL")
+elapsed = time.perf_counter() - started
+CaptionComposer.FETCH_TIMEOUTS = original_timeouts
+assert slow["data_source"] == "synthetic"
+assert slow["earnings_date"] is None and slow["days_to_earnings"] is None
+assert slow["rsi"] == data["rsi"]
+assert elapsed < 0.9
+print(f"   ✅ Responded in {elapsed:.2f}s with earnings_date=None")
+
+# Test 6: Streaming batches yield fast tickers before slow ones
+print("\n6️⃣  Testing streaming batch order...")
+
+class SlowTickerProvider(SyntheticProvider):
+    def info(self, ticker):
+        if ticker == "SLOW":
+            time.sleep(0.5)
+        return super().info(ticker)
+
+CaptionComposer.set_provider(SlowTickerProvider(seed=7))
+order = [symbol for symbol, _ in CaptionComposer.iter_stock_data_batch(["slow", "AAPL", "MSFT", "AAPL"])]
+assert order[-1] == "SLOW" and sorted(order) == ["AAPL", "MSFT", "SLOW"]
+streamed = CaptionComposer.fetch_stock_data_batch(["SLOW", "AAPL"])
+assert list(streamed) == ["SLOW", "AAPL"]
+CaptionComposer.set_provider(SlowCalendarProvider(seed=7))
+CaptionComposer.FETCH_TIMEOUTS = {**original_timeouts, "calendar": 0.1}
+try:
+    late = CaptionComposer.fetch_stock_data_batch(["AAPL", "MSFT"])
+finally:
+    CaptionComposer.FETCH_TIMEOUTS = original_timeouts
+assert all(stock["timed_out"] == ["calendar"] and stock["earnings_date"] is None for stock in late.values())
+assert all(stock["consensus_rating"] != "N/A" for stock in late.values())
+print(f"   ✅ Streamed in completion order: {', '.join(order)}; slow calendars reported as timed out")
+
+# Test 7: Single-ticker timeouts run from when each call starts, not from when it queues
+print("\n7️⃣  Testing queued single-ticker calls...")
+
+class SlowUpstream(SyntheticProvider):
+    """Sleeps 0.1s per call on top of precomputed data, so calls cost queue time, not CPU."""
+
+    def __init__(self, tickers):
+        super().__init__(seed=7)
+        source = SyntheticProvider(seed=7)
+        self.data = {ticker: (source.history(ticker), source.info(ticker), source.calendar(ticker)) for ticker in tickers}
+
+    def history(self, ticker, period="3mo"):
+        time.sleep(0.1)
+        return self.data[ticker][0]
+
+    def info(self, ticker):
+        time.sleep(0.1)
+        return self.data[ticker][1]
+
+    def calendar(self, ticker):
+        time.sleep(0.1)
+        return self.data[ticker][2]
+
+queued = [f"Q{n:03d}" for n in range(96)]
+CaptionComposer.set_provider(SlowUpstream(queued))
+CaptionComposer.FETCH_TIMEOUTS = {"history": 0.5, "info": 0.5, "calendar": 0.5}
+try:
+    # 96 tickers x 3 calls queue for about 0.9s on the 32-thread I/O pool
+    with ThreadPoolExecutor(max_workers=96) as callers:
+        fetched = list(callers.map(CaptionComposer.fetch_stock_data, queued))
+finally:
+    CaptionComposer.FETCH_TIMEOUTS = original_timeouts
+assert all(stock["data_source"] == "synthetic" for stock in fetched)
+assert all(stock["earnings_date"] is not None and stock["consensus_rating"] != "N/A" for stock in fetched)
+print(f"   ✅ {len(fetched)} concurrent fetches, none degraded while queued")
+
+CaptionComposer.set_provider(None)
+
+print("\n🎉 All provider tests passed!")
@@ -0,0 +1,117 @@
+"""Quick test to verify the universe screener filters, ranks and streams"""
+
+import csv
+import json
+import os
+import tempfile
+import time
+
+import screener
+from caption_composer import CaptionComposer
+from market_data import SyntheticProvider
+
+print("🧪 Testing Universe Screener...\n")
+
+CaptionComposer.set_provider(SyntheticProvider(seed=11))
+directory = tempfile.mkdtemp()
+
+# Test 1: Universe files accept plain lists, CSVs, comments and headers
+print("1️⃣  Universe file...")
+path = os.path.join(directory, "universe.csv")
+with open(path, "w") as handle:
+    handle.write('ticker,name\n# watchlist\naapl,Apple\n\n"NVDA",Nvidia\nmsft  # software\nAAPL,again\n')
+assert screener.load_universe(path) == ["AAPL", "NVDA", "MSFT"]
+print("   ✅ AAPL, NVDA, MSFT")
+
+# Test 2: Filters
+print("\n2️⃣  Filters...")
+row = {"motif": "Reflection", "sentiment": "🟢 Bullish Alignment", "price_vs_target": 12.0,
+       "upside_potential": 9.5, "data_source": "synthetic"}
+assert screener.matches(row)
+assert screener.matches(row, motifs=["reflection", "Patience"], sentiments=["neutral", "BULLISH"])
+assert not screener.matches(row, motifs=["Momentum"])
+assert not screener.matches(row, sentiments=["bearish"])
+assert screener.matches(row, min_price_vs_target=12.0) and not screener.matches(row, min_price_vs_target=12.1)
+assert not screener.matches(row, min_upside=10)
+assert not screener.matches(dict(row, price_vs_target=None), min_price_vs_target=0.5)
+assert not screener.matches(dict(row, data_source="simulated"))
+assert screener.matches(dict(row, data_source="simulated"), include_simulated=True)
+assert not screener.matches(dict(row, timed_out="info"))
+assert screener.matches(dict(row, timed_out="info,calendar"), include_incomplete=True)
+print("   ✅ Motif, sentiment, target, upside, simulated and timed-out filters")
+
+# Test 3: Ranking puts missing values last and breaks ties by ticker
+print("\n3️⃣  Ranking...")
+rows = [{"ticker": "C", "price_vs_target": None}, {"ticker": "B", "price_vs_target": 5.0},
+        {"ticker": "A", "price_vs_target": 5.0}, {"ticker": "D", "price_vs_target": 20.0}]
+assert [row["ticker"] for row in screener.rank(rows, "price_vs_target")] == ["D", "A", "B", "C"]
+assert [row["ticker"] for row in screener.rank(rows, "price_vs_target", descending=False)] == ["A", "B", "D", "C"]
+assert [(row["rank"], row["ticker"]) for row in screener.rank(rows, "price_vs_target", top=2)] == [(1, "D"), (2, "A")]
+try:
+    screener.rank(rows, "caption_echo")
+    assert False, "expected ValueError"
+except ValueError:
+    pass
+print("   ✅ D, A, B, C")
+
+# Test 4: Chunks stream in parallel and agree with a single-worker run
+print("\n4️⃣  Parallel screening...")
+universe = [f"U{n:03d}" for n in range(120)]
+updates = []
+streamed = list(screener.screen(universe, chunk_size=25, workers=4,
+                                progress=lambda *update: updates.append(update), sentiments=["bullish"]))
+serial = list(screener.screen(universe, chunk_size=120, workers=1, sentiments=["bullish"]))
+assert len(updates) == 5 and updates[-1] == (120, 120, len(streamed)) and updates[0][0] == 25
+assert 0 < len(streamed) < 120 and all("Bullish" in row["sentiment"] for row in streamed)
+assert screener.rank(streamed) == screener.rank(serial)
+expected = CaptionComposer.analyze_market_outlook(CaptionComposer.fetch_stock_data(streamed[0]["ticker"]),
+                                                  streamed[0]["rsi"])
+assert streamed[0]["action"] == expected["action"] and streamed[0]["price_vs_target"] == expected["price_vs_target"]
+print(f"   ✅ {len(streamed)} of {len(universe)} bullish, 5 progress updates, same ranking as serial")
+
+# Test 5: Analyst timeouts run from when each call starts, not from when the chunk queues it
+print("\n5️⃣  Queued analyst calls...")
+
+
+class SlowAnalysts(SyntheticProvider):
+    def info(self, ticker):
+        time.sleep(0.05)
+        return super().info(ticker)
+
+    def calendar(self, ticker):
+        time.sleep(0.05)
+        return super().calendar(ticker)
+
+
+timeouts = dict(CaptionComposer.FETCH_TIMEOUTS)
+CaptionComposer.FETCH_TIMEOUTS.update(info=0.25, calendar=0.25)
+CaptionComposer.set_provider(SlowAnalysts(seed=11))
+try:
+    # 4 chunks x 60 tickers x 2 calls queue for about 0.75s on the 32-thread I/O pool
+    rows = list(screener.screen([f"Q{n:03d}" for n in range(240)], chunk_size=60, workers=4, include_incomplete=True))
+finally:
+    CaptionComposer.FETCH_TIMEOUTS.update(timeouts)
+    CaptionComposer.set_provider(SyntheticProvider(seed=11))
+assert len(rows) == 240 and not any(row["timed_out"] for row in rows)
+assert all(row["consensus_rating"] != "N/A" for row in rows)
+print("   ✅ 240 tickers, no analyst call timed out while queued")
+
+# Test 6: CLI writes the ranked table
+print("\n6️⃣  CLI...")
+with open(path, "w") as handle:
+    handle.write("\n".join(universe[:40]))
+output = os.path.join(directory, "ranked.csv")
+assert screener.main([path, "--sort", "price_vs_target", "--top", "10", "--output", output, "--workers", "2"]) == 0
+with open(output, newline="") as handle:
+    table = list(csv.DictReader(handle))
+assert [row["rank"] for row in table] == [str(n) for n in range(1, 11)] and list(table[0]) == screener.COLUMNS
+values = [float(row["price_vs_target"] or "-inf") for row in table]
+assert values == sorted(values, reverse=True)
+output = os.path.join(directory, "ranked.json")
+screener.main([path, "--motif", "Clarity,Momentum", "--output", output])
+assert all(row["motif"] in ("Clarity", "Momentum") for row in json.load(open(output)))
+print("   ✅ Top 10 by price vs target as CSV, Clarity/Momentum rows as JSON")
+
+CaptionComposer.set_provider(None)
+
+print("\n🎉 All screener tests passed!")
@@ -0,0 +1,75 @@
+"""Quick test to verify request coalescing for simultaneous identical tickers"""
+
+import threading
+import time
+
+from caption_composer import CaptionComposer, coalescing_stats, generate_from_ticker
+from concurrency import SingleFlight
+from market_data import SyntheticProvider
+
+print("🧪 Testing Request Coalescing...\n")
+
+# Test 1: Concurrent callers share one execution
+print("1️⃣  Testing SingleFlight...")
+flight = SingleFlight()
+executions = []
+gate = threading.Event()
+
+def slow_work():
+    executions.append(1)
+    gate.wait()
+    return {"value": 42}
+
+results = []
+threads = [threading.Thread(target=lambda: results.append(flight.do("NVDA", slow_work))) for _ in range(20)]
+for thread in threads:
+    thread.start()
+while flight.stats()["calls"] < 20:
+    time.sleep(0.01)
+gate.set()
+for thread in threads:
+    thread.join()
+assert len(executions) == 1
+assert all(result == {"value": 42} for result in results)
+assert flight.stats()["saved"] == 19 and flight.stats()["in_flight"] == 0
+print(f"   ✅ {flight.stats()}")
+
+# Test 2: Errors propagate to every waiter and are not cached
+print("\n2️⃣  Testing error propagation...")
+try:
+    flight.do("BAD", lambda: 1 / 0)
+    raise AssertionError("expected ZeroDivisionError")
+except ZeroDivisionError:
+    pass
+assert flight.do("BAD", lambda: "recovered") == "recovered"
+print("   ✅ Failed call raised, next call ran fresh")
+
+# Test 3: Simultaneous generate_from_ticker calls hit upstream once
+print("\n3️⃣  Testing generate_from_ticker coalescing...")
+
+class CountingProvider(SyntheticProvider):
+    history_calls = 0
+
+    def history(self, ticker, period="3mo"):
+        if period == "3mo":
+            CountingProvider.history_calls += 1
+            time.sleep(0.3)
+        return super().history(ticker, period)
+
+CaptionComposer.set_provider(CountingProvider())
+before = coalescing_stats()["caption"]["saved"]
+captions = []
+threads = [threading.Thread(target=lambda: captions.append(generate_from_ticker("nvda"))) for _ in range(25)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+assert CountingProvider.history_calls == 1
+assert len({caption["caption_echo"] for caption in captions}) == 1
+saved = coalescing_stats()["caption"]["saved"] - before
+assert saved >= 20
+print(f"   ✅ 25 requests, 1 upstream fetch, {saved} saved")
+
+CaptionComposer.set_provider(None)
+
+print("\n🎉 All coalescing tests passed!")
@@ -0,0 +1,174 @@
+"""Quick test to verify live stream subscribers share quotes and receive only changed fields"""
+
+from datetime import date
+import json
+
+import pandas as pd
+
+from caption_composer import CaptionComposer, pipeline
+from market_data import SyntheticProvider
+from stream_hub import StreamHub, _TickerFeed
+
+print("🧪 Testing Live Stream Hub...\n")
+
+class ScriptedQuoteProvider(SyntheticProvider):
+    """Synthetic bars with quotes set by the test."""
+
+    def __init__(self):
+        super().__init__(seed=5)
+        self.prices = {}
+        self.quote_calls = 0
+
+    def quote(self, ticker):
+        self.quote_calls += 1
+        return self.prices.get(ticker)
+
+provider = ScriptedQuoteProvider()
+CaptionComposer.set_provider(provider)
+hub = StreamHub(interval=3600)  # poll() is driven by hand below
+
+# Test 1: Every subscriber gets a snapshot; one quote per ticker per poll
+print("1️⃣  Subscribing two clients...")
+first = hub.subscribe(["aapl", "NVDA"])
+second = hub.subscribe(["AAPL"])
+snapshots = [first.queue.get_nowait() for _ in range(2)]
+assert [event for event, _ in snapshots] == ["snapshot", "snapshot"]
+assert [payload["ticker"] for _, payload in snapshots] == ["AAPL", "NVDA"]
+event, snapshot = second.queue.get_nowait()
+assert event == "snapshot" and snapshot["caption_echo"]
+assert hub.stats()["tickers"] == 2 and hub.stats()["subscribers"] == 2
+print(f"   ✅ Snapshot: {snapshot['ticker']} ${snapshot['price']} | RSI {snapshot['rsi']} | {snapshot['motif']}")
+
+# Test 2: Updates carry only changed fields and match full recomputation
+print("\n2️⃣  Polling new quotes...")
+hist = provider.history("AAPL", period="3mo")
+last_close = float(hist["Close"].iloc[-1])
+provider.prices = {"AAPL": last_close * 1.004, "NVDA": None}
+pushed = hub.poll()
+assert provider.quote_calls == 2 and pushed == 2
+
+event, update = first.queue.get_nowait()
+assert event == "update" and update == second.queue.get_nowait()[1]
+assert first.queue.empty()
+
+# The history ended on an earlier trading day, so today's first quote opens a new bar
+opened = pd.concat([hist["Close"], pd.Series([last_close * 1.004])], ignore_index=True)
+assert update["price"] == round(last_close * 1.004, 2)
+assert update["rsi"] == round(CaptionComposer.calculate_rsi(opened), 2)
+assert "consensus_rating" not in update and "earnings_date" not in update
+print(f"   ✅ Update: {sorted(update)}")
+
+# Test 2b: Quotes on the last bar's own trading day revise that bar
+print("\n2️⃣b Revising the last bar...")
+feed = _TickerFeed("AAPL", CaptionComposer.fetch_stock_data("AAPL"), hist)
+assert feed.session == hist.index[-1].date() and feed.session != date.today()
+feed.tick(last_close * 1.004, today=feed.session)
+revised = hist["Close"].copy()
+revised.iloc[-1] = last_close * 1.004
+assert feed.result["rsi"] == round(CaptionComposer.calculate_rsi(revised), 2)
+monday = pd.Timestamp("2025-06-30", tz="America/New_York")
+friday = hist.copy()
+friday.index = friday.index.tz_localize("America/New_York")
+friday = friday[friday.index < monday]
+feed = _TickerFeed("AAPL", CaptionComposer.fetch_stock_data("AAPL"), friday)
+assert feed.session == date(2025, 6, 27) and str(feed.tz) == "America/New_York"
+feed.tick(last_close, today=monday.date())
+opened = pd.concat([friday["Close"], pd.Series([last_close])], ignore_index=True)
+assert feed.session == monday.date() and feed.result["rsi"] == round(CaptionComposer.calculate_rsi(opened), 2)
+print("   ✅ Same-day quotes revise; Monday's first quote after a Friday history opens a bar")
+
+# Test 3: A repeated quote publishes nothing, recomputes nothing, and prose stays put while the motif holds
+print("\n3️⃣  Polling an unchanged quote...")
+runs = pipeline.runs
+assert hub.poll() == 0 and first.queue.empty() and pipeline.runs == runs
+feed = hub._feeds["AAPL"]
+if feed.result["motif"] == snapshot["motif"] and feed.result["sentiment"] == snapshot["sentiment"]:
+    assert feed.result["caption_echo"] == snapshot["caption_echo"]
+locked = []
+tick = feed.tick
+feed.tick = lambda price: locked.append(hub._lock.locked()) or tick(price)
+provider.prices["AAPL"] = last_close * 1.006
+assert hub.poll() == 2 and locked == [False] and pipeline.runs == runs + 1
+del feed.tick
+for subscription in (first, second):
+    subscription.queue.get_nowait()
+print("   ✅ No event or pipeline run for an unchanged tape; new quotes recompute outside the hub lock")
+
+# Test 4: Closing subscriptions retires unwatched feeds
+print("\n4️⃣  Unsubscribing...")
+first.close()
+assert sorted(hub._feeds) == ["AAPL"]
+second.close()
+assert hub.stats()["tickers"] == 0 and hub.stats()["subscribers"] == 0
+print("   ✅ Feeds retired once nobody watches them")
+
+# Test 5: Server-Sent Events endpoint
+print("\n5️⃣  Testing /api/stream...")
+from app import app
+import stream_hub
+stream_hub.hub = hub
+client = app.test_client()
+response = client.get("/api/stream?tickers=MSFT")
+assert response.mimetype == "text/event-stream"
+chunk = next(iter(response.response))
+chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+assert chunk.startswith("event: snapshot\ndata: ")
+assert json.loads(chunk.split("data: ", 1)[1])["ticker"] == "MSFT"
+response.close()
+assert hub.stats()["subscribers"] == 0
+assert client.get("/api/stream").status_code == 400
+print("   ✅ Snapshot streamed and subscription closed with the response")
+
+# Test 6: Under ASGI, open streams run on their own executor and never starve other routes
+print("\n6️⃣  ASGI streams...")
+import asyncio
+import asgi
+asgi.FLASK_WORKERS = 1
+server = asgi.CaptionASGIApp(app)
+server.max_streams = 1
+
+
+async def request(path, query=b"", until=None):
+    sent = []
+    requested = []
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await (until or asyncio.Event()).wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": []}
+    return sent, asyncio.create_task(server(scope, receive, send))
+
+
+async def scenario():
+    gone = asyncio.Event()
+    sent, streaming = await request("/api/stream", b"tickers=MSFT", until=gone)
+    while len(sent) < 2:
+        await asyncio.sleep(0.01)
+    health, task = await request("/api/health")
+    await asyncio.wait_for(task, timeout=5)
+    refused, task = await request("/api/stream", b"tickers=AAPL")
+    await asyncio.wait_for(task, timeout=5)
+    gone.set()
+    for subscription in list(set().union(*hub._subscribers.values())):
+        subscription.close()
+    await asyncio.wait_for(streaming, timeout=5)
+    return sent, health, refused
+
+
+sent, health, refused = asyncio.run(scenario())
+assert sent[0]["status"] == 200 and b"event: snapshot" in sent[1]["body"]
+assert health[0]["status"] == 200 and refused[0]["status"] == 503
+assert server.streams == 0 and server.streams_rejected == 1 and hub.stats()["subscribers"] == 0
+print("   ✅ /api/health served beside an open stream on a 1-thread Flask executor; stream 2 of 1 gets 503")
+
+hub.stop()
+CaptionComposer.set_provider(None)
+
+print("\n🎉 All stream hub tests passed!")